@@ -1,20 +1,45 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, g, has_request_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
+import hashlib
 import json
 import os
 from datetime import datetime, timedelta
-import requests
+from types import MappingProxyType
 import joblib
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from caching import QuantizedMemo, SingleFlight, TTLCache
+from forest_engine import FlatForest, compile_forest, verify_flat_forest
+from http_client import http_get
+from hydrology import simulate_water_levels, water_level_parameters
+from memory_report import cached_memory_report
+from prediction_log import PredictionLogWriter
+from prediction_store import PredictionStore
+from csv_history import CsvHistoryIndex
+from prediction_archive import PredictionArchive
+from history_buffer import RecentHistory
+from spatial_index import StationIndex, degrees_to_km, km_to_degrees
+from station_metadata import StationOverrides, validate_station_changes
+from risk_raster import BANGLADESH_BOUNDS, RiskRasterService
+from risk_tiles import TileCache, TileRenderer
+from model_registry import ModelRegistry, ModelValidationError
+from model_store import activate_version, current_version, load_artifacts
+from model_training import FEATURE_COLUMNS, generate_training_data, train_flood_model
+from weather_prefetcher import SharedWeatherStore, WeatherPrefetcher
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
 
+# A gunicorn worker serving a preloaded app runs under a different pid than the importer
+IMPORT_PID = os.getpid()
+# /api/status (polled by the dashboard) reuses the /proc memory walk for this long
+MEMORY_REPORT_MAX_AGE_SECONDS = float(os.environ.get('MEMORY_REPORT_MAX_AGE_SECONDS', 10))
+
 # Initialize models (will be trained on first run)
 rf_model = None
 scaler = None
@@ -24,124 +49,10 @@ def create_and_train_models():
     """Create and train advanced flood prediction models with geographic awareness"""
     global rf_model, scaler, feature_cols
     
-    print("Creating advanced synthetic training data with geographic factors...")
-    
-    # Generate comprehensive synthetic flood data
-    np.random.seed(42)
-    n_samples = 2500  # Increased sample size for better accuracy
-    
-    # Generate diverse rainfall patterns
-    rainfall_1day = np.random.gamma(1.8, 2.5, n_samples)
-    rainfall_3day = rainfall_1day + np.random.gamma(1.5, 3.2, n_samples) 
-    rainfall_7day = rainfall_3day + np.random.gamma(1.2, 4.5, n_samples)
-    
-    # Generate elevation and geographic factors
-    elevation = np.random.uniform(2, 45, n_samples)
-    river_distance = np.random.exponential(15, n_samples)  # Most locations near rivers
-    drainage_quality = np.random.choice([0.2, 0.5, 0.8], n_samples, p=[0.3, 0.5, 0.2])  # Good/Moderate/Poor
-    
-    # Water level calculation with geographic dependencies
-    base_water_level = 3.0 + (50 - elevation) / 20  # Lower elevation = higher base level
-    rainfall_impact = (rainfall_1day * 0.15 + rainfall_3day * 0.08) * (drainage_quality + 0.5)
-    river_impact = np.maximum(0, (10 - river_distance) / 10) * 0.8  # Closer to river = higher levels
-    
-    water_level_lag1 = base_water_level + rainfall_impact + river_impact + np.random.normal(0, 0.4, n_samples)
-    water_level_lag1 = np.maximum(water_level_lag1, 1.5)  # Minimum water level
-    
-    # Water level trend (momentum)
-    water_level_trend = np.random.normal(0, 0.3, n_samples)
-    
-    # Seasonal effects
-    is_monsoon = np.random.choice([0, 1], n_samples, p=[0.65, 0.35])
-    monsoon_multiplier = 1 + (is_monsoon * 0.4)  # 40% increase during monsoon
-    
-    # Apply monsoon effects
-    rainfall_1day *= monsoon_multiplier
-    rainfall_3day *= monsoon_multiplier
-    rainfall_7day *= monsoon_multiplier
-    water_level_lag1 *= (1 + is_monsoon * 0.2)
-    
-    # Geographic risk factor
-    geographic_risk = (
-        (50 - elevation) / 50 * 0.35 +  # Elevation factor
-        np.maximum(0, (20 - river_distance) / 20) * 0.4 +  # River proximity
-        drainage_quality * 0.25  # Drainage quality
-    )
-    geographic_risk = np.clip(geographic_risk, 0.1, 0.9)
-    
-    # Create comprehensive feature matrix (9 features)
-    X = np.column_stack([
-        rainfall_1day, rainfall_3day, rainfall_7day,
-        water_level_lag1, water_level_trend, is_monsoon,
-        elevation, river_distance, geographic_risk
-    ])
-    
-    feature_cols = ['rainfall_1day', 'rainfall_3day', 'rainfall_7day', 
-                   'water_level_lag1', 'water_level_trend', 'is_monsoon',
-                   'elevation', 'river_distance', 'geographic_risk']
-    
-    # Create realistic flood labels with multiple conditions
-    high_rainfall_flood = (rainfall_3day > 12) & (drainage_quality > 0.4)  # Heavy rain + poor drainage
-    water_level_flood = water_level_lag1 > (5.0 + elevation * 0.05)  # Dynamic threshold by elevation
-    geographic_flood = (geographic_risk > 0.7) & (rainfall_1day > 6)  # High risk areas with moderate rain
-    monsoon_flood = (is_monsoon == 1) & (rainfall_7day > 25) & (elevation < 15)  # Monsoon flooding
-    
-    y = (high_rainfall_flood | water_level_flood | geographic_flood | monsoon_flood).astype(int)
-    
-    print(f"Advanced training data: {X.shape[0]} samples, {y.sum()} flood events ({y.mean()*100:.1f}%)")
-    print(f"Feature distribution: {X.shape[1]} features including geographic factors")
-    
-    # Split with stratification to ensure balanced test set
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    
-    # Advanced scaling
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    # Train enhanced Random Forest with better parameters
-    rf_model = RandomForestClassifier(
-        n_estimators=200,  # More trees for better accuracy
-        max_depth=12,      # Prevent overfitting
-        min_samples_split=5,
-        min_samples_leaf=3,
-        max_features='sqrt',
-        class_weight='balanced',  # Handle class imbalance
-        random_state=42
-    )
-    rf_model.fit(X_train_scaled, y_train)
-    
-    # Comprehensive evaluation
-    from sklearn.metrics import classification_report, confusion_matrix
-    
-    train_accuracy = rf_model.score(X_train_scaled, y_train)
-    test_accuracy = rf_model.score(X_test_scaled, y_test)
-    y_pred = rf_model.predict(X_test_scaled)
-    
-    print(f"Advanced model trained!")
-    print(f"Training accuracy: {train_accuracy:.3f}")
-    print(f"Test accuracy: {test_accuracy:.3f}")
-    print(f"Overfitting check: {abs(train_accuracy - test_accuracy):.3f} (should be < 0.1)")
-    
-    # Feature importance analysis
-    feature_importance = rf_model.feature_importances_
-    importance_dict = dict(zip(feature_cols, feature_importance))
-    print("Feature importance:")
-    for feature, importance in sorted(importance_dict.items(), key=lambda x: x[1], reverse=True):
-        print(f"  {feature}: {importance:.3f}")
+    rf_model, scaler, feature_cols, model_metadata = train_flood_model()
     
     # Save models with version info
     os.makedirs('models', exist_ok=True)
-    model_metadata = {
-        'version': '2.0.0',
-        'features': feature_cols,
-        'accuracy': test_accuracy,
-        'samples': n_samples,
-        'created': datetime.now().isoformat()
-    }
-    
     joblib.dump(rf_model, 'models/rf_flood_model.pkl')
     joblib.dump(scaler, 'models/feature_scaler.pkl')
     joblib.dump(feature_cols, 'models/feature_columns.pkl')
@@ -149,29 +60,280 @@ def create_and_train_models():
     
     return rf_model, scaler, feature_cols
 
-# Load or create models
-try:
-    # Try to load existing models (will fail on first deployment)
-    rf_model = joblib.load('models/rf_flood_model.pkl')
-    scaler = joblib.load('models/feature_scaler.pkl')
-    feature_cols = joblib.load('models/feature_columns.pkl')
-    print("✅ Models loaded successfully from files!")
-except Exception as e:
-    print(f"⚠️ Model files not found, training new models: {str(e)}")
+# Model loading: 'serve' only loads prebuilt artifacts (build them with
+# `python train_models.py`) and refuses to train inside a web worker;
+# 'train-if-missing' keeps the old behaviour of training on first start
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+MODEL_VERSION = os.environ.get('MODEL_VERSION') or None
+MODEL_SERVE_MODE = os.environ.get('MODEL_SERVE_MODE', 'train-if-missing')
+# 'joblib' unpickles the sklearn forest; 'mmap' memory-maps its flat node arrays
+# (served by the flat engine, shared through the page cache across workers)
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'joblib')
+model_metadata = {}
+
+def load_models():
+    """Load the CURRENT (or MODEL_VERSION) artifacts, training in-process only if allowed"""
+    global model_metadata
+    
+    started = time.perf_counter()
     try:
-        rf_model, scaler, feature_cols = create_and_train_models()
+        artifacts = load_artifacts(MODEL_DIR, MODEL_VERSION, MODEL_FORMAT)
+        model_metadata = dict(artifacts.metadata)
+        model_metadata['load_seconds'] = round(time.perf_counter() - started, 4)
+        print(f"✅ Models loaded successfully from {artifacts.path} "
+              f"(version {model_metadata.get('version')}, {model_metadata['load_seconds'] * 1000:.0f} ms)")
+        return artifacts.rf_model, artifacts.scaler, artifacts.feature_cols
+    except Exception as e:
+        if MODEL_SERVE_MODE == 'serve':
+            raise RuntimeError(f"MODEL_SERVE_MODE=serve refuses to train in-process; "
+                               f"run `python train_models.py --output {MODEL_DIR}` first ({e})") from e
+        print(f"⚠️ Model files not found, training new models: {str(e)}")
+    
+    try:
+        trained = create_and_train_models()
+        model_metadata = {'version': 'in-process'}
         print("✅ New models trained successfully!")
+        return trained
     except Exception as training_error:
         print(f"❌ Error training models: {str(training_error)}")
         # Set default models to prevent app crash
-        rf_model = None
-        scaler = None
-        feature_cols = None
+        return None, None, None
+
+rf_model, scaler, feature_cols = load_models()
+
+# Inference engine: 'sklearn' (RandomForestClassifier.predict_proba),
+# 'flat' (all trees exported to NumPy node arrays and walked in one vectorized pass) or
+# 'compiled' (flat, with the StandardScaler folded into the split thresholds at load time)
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'sklearn')
+
+def build_inference_engine(model, feature_scaler=None):
+    """Export the forest for the flat/compiled engine, verified against sklearn on probe rows"""
+    if isinstance(model, FlatForest):
+        # Memory-mapped artifacts carry only the flat arrays, so they always use the flat engine
+        if INFERENCE_ENGINE == 'compiled' and feature_scaler is not None and not model.raw_features:
+            model = model.fold_scaler(feature_scaler.mean_, feature_scaler.scale_)
+        print(f"✅ Flat inference engine ready from memory-mapped arrays "
+              f"({model.n_trees} trees, {model.n_nodes} nodes)")
+        return model
+    
+    if INFERENCE_ENGINE not in ('flat', 'compiled') or model is None:
+        return None
+    
+    try:
+        if INFERENCE_ENGINE == 'compiled' and feature_scaler is not None:
+            engine = compile_forest(model, feature_scaler)
+            # Probe in raw feature space around the training distribution
+            mean = getattr(feature_scaler, 'mean_', None)
+            scale = getattr(feature_scaler, 'scale_', None)
+            probe_rows = np.random.RandomState(0).normal(0, 2, (256, engine.n_features))
+            probe_rows = probe_rows * (1.0 if scale is None else scale) + (0.0 if mean is None else mean)
+            verified = verify_flat_forest(model, engine, probe_rows, scaler=feature_scaler)
+        else:
+            engine = FlatForest.from_sklearn(model)
+            probe_rows = np.random.RandomState(0).normal(0, 2, (256, engine.n_features))
+            verified = verify_flat_forest(model, engine, probe_rows)
+        
+        if verified:
+            folded = " with scaler folded in" if engine.raw_features else ""
+            print(f"✅ {INFERENCE_ENGINE.capitalize()} inference engine ready "
+                  f"({engine.n_trees} trees, {engine.n_nodes} nodes{folded})")
+            return engine
+        print(f"⚠️ {INFERENCE_ENGINE.capitalize()} inference engine failed verification, using sklearn predict_proba")
+    except Exception as e:
+        print(f"⚠️ Could not build {INFERENCE_ENGINE} inference engine: {str(e)}")
+    return None
+
+flat_forest = build_inference_engine(rf_model, scaler)
+
+# Hot reload: the model globals are swapped together under model_lock, and
+# scoring takes one snapshot of them, so a request never mixes two versions
+MODEL_RELOAD_MIN_ACCURACY = float(os.environ.get('MODEL_RELOAD_MIN_ACCURACY', 0.8))
+MODEL_HOLDOUT_ROWS = int(os.environ.get('MODEL_HOLDOUT_ROWS', 512))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+# An admin reload only swaps the worker that serves it; the others follow through
+# CURRENT, so the watcher is on by default whenever the admin endpoint is usable
+# (but not under a MODEL_VERSION pin, which the watcher never moves off anyway)
+MODEL_WATCH_INTERVAL_SECONDS = float(os.environ.get('MODEL_WATCH_INTERVAL_SECONDS') or
+                                     (30 if ADMIN_TOKEN and not MODEL_VERSION else 0))
+model_lock = threading.Lock()
+model_generation = 0
+_model_holdout = None
+
+# Optional memo in front of the forest: feature vectors are snapped to a grid of
+# PREDICTION_MEMO_QUANTUM and near-identical vectors (static geography, slowly
+# changing rainfall) reuse the probability computed for their grid cell
+PREDICTION_MEMO_ENABLED = os.environ.get('PREDICTION_MEMO_ENABLED', 'false').lower() == 'true'
+PREDICTION_MEMO_QUANTUM = float(os.environ.get('PREDICTION_MEMO_QUANTUM', 0.01))
+PREDICTION_MEMO_MAX_ENTRIES = int(os.environ.get('PREDICTION_MEMO_MAX_ENTRIES', 4096))
+prediction_memo = QuantizedMemo(PREDICTION_MEMO_QUANTUM, PREDICTION_MEMO_MAX_ENTRIES)
+
+def model_holdout():
+    """Labelled feature vectors drawn independently of the training set (seed differs)"""
+    global _model_holdout
+    if _model_holdout is None:
+        _model_holdout = generate_training_data(MODEL_HOLDOUT_ROWS, seed=2024)
+    return _model_holdout
+
+def load_model_candidate(version):
+    """Load a model version and build its inference engine, off the request path"""
+    started = time.perf_counter()
+    artifacts = load_artifacts(MODEL_DIR, version, MODEL_FORMAT)
+    engine = build_inference_engine(artifacts.rf_model, artifacts.scaler)
+    metadata = dict(artifacts.metadata)
+    metadata['load_seconds'] = round(time.perf_counter() - started, 4)
+    return {
+        'rf_model': artifacts.rf_model,
+        'scaler': artifacts.scaler,
+        'feature_cols': artifacts.feature_cols,
+        'flat_forest': engine,
+        'metadata': metadata
+    }
+
+def validate_model_candidate(candidate):
+    """Reject versions with the wrong features, invalid probabilities or poor holdout accuracy"""
+    if list(candidate['feature_cols'] or []) != FEATURE_COLUMNS:
+        raise ModelValidationError(f"expected features {FEATURE_COLUMNS}, got {candidate['feature_cols']}")
+    
+    # Scored straight through the engines: holdout rows must not fill or evict the prediction memo
+    X_holdout, y_holdout = model_holdout()
+    probabilities = score_flood_probabilities(
+        X_holdout, (candidate['rf_model'], candidate['scaler'], candidate['flat_forest'])
+    )
+    if not np.all(np.isfinite(probabilities)) or probabilities.min() < 0 or probabilities.max() > 1:
+        raise ModelValidationError("holdout probabilities outside [0, 1]")
+    
+    accuracy = float(np.mean((probabilities >= 0.5) == y_holdout))
+    if accuracy < MODEL_RELOAD_MIN_ACCURACY:
+        raise ModelValidationError(f"holdout accuracy {accuracy:.3f} below {MODEL_RELOAD_MIN_ACCURACY}")
+    
+    report = {
+        'holdout_rows': len(y_holdout),
+        'holdout_accuracy': round(accuracy, 4),
+        'mean_probability': round(float(probabilities.mean()), 4)
+    }
+    if model_ready():
+        # How far the new version moves predictions relative to the one being replaced
+        with model_lock:
+            active_model = (rf_model, scaler, flat_forest)
+        active_probabilities = score_flood_probabilities(X_holdout, active_model)
+        report['mean_abs_change'] = round(float(np.mean(np.abs(probabilities - active_probabilities))), 4)
+    return report
+
+def activate_model_candidate(candidate):
+    global rf_model, scaler, feature_cols, flat_forest, model_metadata, model_generation
+    with model_lock:
+        # Memo entries are keyed by generation, so the new model never sees the old one's results
+        model_generation += 1
+        prediction_memo.invalidate()
+        rf_model = candidate['rf_model']
+        scaler = candidate['scaler']
+        feature_cols = candidate['feature_cols']
+        flat_forest = candidate['flat_forest']
+        model_metadata = candidate['metadata']
+
+model_registry = ModelRegistry(
+    MODEL_DIR,
+    load_fn=load_model_candidate,
+    validate_fn=validate_model_candidate,
+    activate_fn=activate_model_candidate,
+    active_version=model_metadata.get('version') if MODEL_VERSION or current_version(MODEL_DIR) else None,
+    watch_interval_seconds=MODEL_WATCH_INTERVAL_SECONDS,
+    pinned_version=MODEL_VERSION
+)
 
 # Configuration
 OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY', '4d6eb4cfda31ca9dd9e06e83566e0e7a')
 OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
 
+# Weather cache: repeated predictions within the TTL reuse the last API response
+WEATHER_CACHE_TTL_SECONDS = float(os.environ.get('WEATHER_CACHE_TTL_SECONDS', 600))
+WEATHER_CACHE_MAX_ENTRIES = int(os.environ.get('WEATHER_CACHE_MAX_ENTRIES', 256))
+# How long past its TTL an observation may still be served as last known good
+WEATHER_MAX_STALE_SECONDS = float(os.environ.get('WEATHER_MAX_STALE_SECONDS', 6 * 3600))
+weather_cache = TTLCache(ttl_seconds=WEATHER_CACHE_TTL_SECONDS,
+                         max_entries=WEATHER_CACHE_MAX_ENTRIES,
+                         max_stale_seconds=WEATHER_MAX_STALE_SECONDS)
+
+# 'stale-while-revalidate' (the default) answers from the last good observation and
+# refreshes in the background; 'blocking' is the previous behaviour of waiting for the
+# API on every cache miss
+WEATHER_SERVE_MODE = os.environ.get('WEATHER_SERVE_MODE', 'stale-while-revalidate')
+
+# Concurrent cache misses for the same location and time bucket share one API call
+WEATHER_FETCH_BUCKET_SECONDS = float(os.environ.get('WEATHER_FETCH_BUCKET_SECONDS', 60))
+weather_flights = SingleFlight()
+_weather_refreshes = set()
+_weather_refresh_lock = threading.Lock()
+
+# Background prefetcher that refreshes every station into the weather cache
+WEATHER_PREFETCH_ENABLED = os.environ.get('WEATHER_PREFETCH_ENABLED', 'false').lower() == 'true'
+WEATHER_PREFETCH_INTERVAL_SECONDS = float(os.environ.get('WEATHER_PREFETCH_INTERVAL_SECONDS', 300))
+WEATHER_PREFETCH_STAGGER_SECONDS = os.environ.get('WEATHER_PREFETCH_STAGGER_SECONDS')
+# Only one process per deployment calls the API: prefetchers elect a leader through a
+# lock file in WEATHER_SHARED_DIR and the leader publishes each station's frame there
+# for the other workers to load
+WEATHER_SHARED_DIR = os.environ.get('WEATHER_SHARED_DIR', 'data/weather')
+shared_weather = SharedWeatherStore(WEATHER_SHARED_DIR) if WEATHER_PREFETCH_ENABLED and WEATHER_SHARED_DIR else None
+_shared_weather_seen = {}  # (location, days) -> mtime of the frame last loaded
+
+# Concurrent fan-out over neighbouring stations for coordinate predictions
+WEATHER_FANOUT_WORKERS = int(os.environ.get('WEATHER_FANOUT_WORKERS', 8))
+WEATHER_FANOUT_DEADLINE_SECONDS = float(os.environ.get('WEATHER_FANOUT_DEADLINE_SECONDS', 12))
+_weather_executor = None
+_weather_executor_pid = None
+_weather_executor_lock = threading.Lock()
+
+def get_weather_executor():
+    """Bounded thread pool for weather fan-out (rebuilt in each forked worker)"""
+    global _weather_executor, _weather_executor_pid
+    
+    with _weather_executor_lock:
+        if _weather_executor is None or _weather_executor_pid != os.getpid():
+            _weather_executor = ThreadPoolExecutor(max_workers=WEATHER_FANOUT_WORKERS,
+                                                   thread_name_prefix='weather-fanout')
+            _weather_executor_pid = os.getpid()
+        return _weather_executor
+
+# Prediction log: 'async' queues rows for a background writer that appends them
+# in batches (flock + O_APPEND, safe across gunicorn workers); 'sync' writes
+# each row inside the request as before
+PREDICTION_LOG_FILE = 'logs/flood_predictions.csv'
+PREDICTION_LOG_COLUMNS = ['timestamp', 'location', 'date', 'rainfall', 'water_level', 'flood_threshold',
+                          'flood_risk', 'risk_probability', 'confidence', 'status']
+PREDICTION_LOG_MODE = os.environ.get('PREDICTION_LOG_MODE', 'async')
+
+# Prediction store: 'sqlite' keeps predictions in a WAL-mode database indexed on
+# (location, timestamp) so history reads stay O(log n + k); 'csv' keeps the flat file.
+# The existing CSV log is imported once, on first use (recorded in its imports table).
+PREDICTION_STORE = os.environ.get('PREDICTION_STORE', 'sqlite')
+PREDICTION_DB_PATH = os.environ.get('PREDICTION_DB_PATH', 'logs/predictions.db')
+prediction_store = PredictionStore(PREDICTION_DB_PATH)
+
+# CSV store: history reads seek to per-location row offsets kept in a sidecar
+# index (logs/flood_predictions.csv.idx) instead of parsing the whole log
+PREDICTION_HISTORY_INDEX_KEEP = int(os.environ.get('PREDICTION_HISTORY_INDEX_KEEP', 64))
+prediction_history_index = CsvHistoryIndex(PREDICTION_LOG_FILE, keep=PREDICTION_HISTORY_INDEX_KEEP)
+
+# Columnar archive (date/location partitions of .npy column files) for analytics
+# over long time ranges; every stored batch is mirrored into it. Empty disables it.
+PREDICTION_ARCHIVE_DIR = os.environ.get('PREDICTION_ARCHIVE_DIR', 'logs/archive')
+PREDICTION_ARCHIVE_COMPACT_PARTS = int(os.environ.get('PREDICTION_ARCHIVE_COMPACT_PARTS', 8))
+prediction_archive = (PredictionArchive(PREDICTION_ARCHIVE_DIR, compact_parts=PREDICTION_ARCHIVE_COMPACT_PARTS)
+                      if PREDICTION_ARCHIVE_DIR else None)
+
+prediction_log = PredictionLogWriter(
+    PREDICTION_DB_PATH if PREDICTION_STORE == 'sqlite' else PREDICTION_LOG_FILE,
+    PREDICTION_LOG_COLUMNS,
+    max_batch=int(os.environ.get('PREDICTION_LOG_BATCH_SIZE', 100)),
+    flush_interval_seconds=float(os.environ.get('PREDICTION_LOG_FLUSH_SECONDS', 1.0)),
+    max_queue=int(os.environ.get('PREDICTION_LOG_MAX_QUEUE', 10000)),
+    sink=prediction_store.insert_many if PREDICTION_STORE == 'sqlite' else None,
+    on_append=prediction_history_index.refresh if PREDICTION_STORE == 'csv' else None,
+    mirror=prediction_archive.append if prediction_archive is not None else None
+)
+# Flush whatever is still queued when the process exits
+atexit.register(prediction_log.close)
+
 LOCATIONS = {
     'Dhaka': (23.8103, 90.4125),
     'Sylhet': (24.8949, 91.8687),
@@ -180,6 +342,14 @@ LOCATIONS = {
     'Chittagong': (22.3569, 91.7832)
 }
 
+# Ball tree over station coordinates for nearest/radius lookups in km; coordinate
+# interpolation weights the STATION_INTERPOLATION_NEIGHBORS nearest stations
+station_index = StationIndex(LOCATIONS)
+STATION_INTERPOLATION_NEIGHBORS = int(os.environ.get('STATION_INTERPOLATION_NEIGHBORS', 16))
+
+# A station with no logged rows is remembered as empty instead of rescanning the log
+prediction_history_index.locations = frozenset(LOCATIONS)
+
 FLOOD_THRESHOLDS = {
     'Dhaka': 5.5,
     'Sylhet': 6.0,
@@ -262,6 +432,46 @@ GEOGRAPHIC_DATA = {
     }
 }
 
+weather_prefetcher = WeatherPrefetcher(
+    LOCATIONS.keys(),
+    refresh_fn=lambda location: prefetch_station_weather(location),
+    interval_seconds=WEATHER_PREFETCH_INTERVAL_SECONDS,
+    stagger_seconds=float(WEATHER_PREFETCH_STAGGER_SECONDS) if WEATHER_PREFETCH_STAGGER_SECONDS else None,
+    follow_fn=lambda location: load_shared_weather(location),
+    leader_lock_path=shared_weather.lock_path if shared_weather is not None else None
+)
+
+# Precomputed national risk raster: a background job evaluates the coordinate model
+# on a lat/lon grid (memory-mapped .npy layers under RISK_RASTER_DIR) and rebuilds it
+# whenever the cached station weather changes. Coordinate predictions then read it
+# bilinearly instead of recomputing; ?exact=true bypasses it.
+RISK_RASTER_ENABLED = os.environ.get('RISK_RASTER_ENABLED', 'false').lower() == 'true'
+RISK_RASTER_DIR = os.environ.get('RISK_RASTER_DIR', 'data/risk_raster')
+RISK_RASTER_RESOLUTION = float(os.environ.get('RISK_RASTER_RESOLUTION', 0.01))
+RISK_RASTER_REFRESH_SECONDS = float(os.environ.get('RISK_RASTER_REFRESH_SECONDS', 60))
+risk_raster = RiskRasterService(
+    RISK_RASTER_DIR,
+    layers_fn=lambda lats, lons: build_risk_raster_layers(lats, lons),
+    epoch_fn=lambda: weather_epoch(),
+    bounds=BANGLADESH_BOUNDS,
+    resolution=RISK_RASTER_RESOLUTION,
+    refresh_seconds=RISK_RASTER_REFRESH_SECONDS
+)
+
+# Flood-risk heatmap tiles (/api/tiles/risk/<z>/<x>/<y>.png): every pixel of a tile is
+# evaluated in one vectorized call; tiles up to RISK_TILE_CACHE_MAX_ZOOM are cached on
+# disk per weather epoch. An empty RISK_TILE_CACHE_DIR disables the cache.
+RISK_TILE_MAX_ZOOM = int(os.environ.get('RISK_TILE_MAX_ZOOM', 14))
+RISK_TILE_CACHE_DIR = os.environ.get('RISK_TILE_CACHE_DIR', 'data/tiles')
+RISK_TILE_CACHE_MAX_ZOOM = int(os.environ.get('RISK_TILE_CACHE_MAX_ZOOM', 12))
+RISK_TILE_MAX_AGE_SECONDS = int(os.environ.get('RISK_TILE_MAX_AGE_SECONDS', 300))
+risk_tiles = TileRenderer(
+    lambda lats, lons: calculate_coordinate_overall_risk_grid(lats, lons),
+    bounds=BANGLADESH_BOUNDS,
+    cache=TileCache(RISK_TILE_CACHE_DIR) if RISK_TILE_CACHE_DIR else None,
+    cache_max_zoom=RISK_TILE_CACHE_MAX_ZOOM
+)
+
 @app.route('/')
 def dashboard():
     """Main dashboard page - API status"""
@@ -272,6 +482,7 @@ def dashboard():
         "endpoints": [
             "/api/locations",
             "/api/predict/<location>",
+            "/api/predict/batch",
             "/api/predict/coordinates/<lat>/<lon>",
             "/api/history/<location>",
             "/api/alerts",
@@ -299,314 +510,501 @@ def predict_location(location):
         return jsonify({'error': 'Location not found'}), 404
     
     try:
-        # Fetch comprehensive weather data
-        weather_data = fetch_real_weather_data(location, days=7)
+        response_data = compute_station_prediction(location)
         
-        # Get enhanced geographic risk factors
-        geographic_risk = calculate_enhanced_geographic_risk(location)
-        flood_risk_profile = calculate_flood_risk_profile(location)
-        
-        # Calculate overall risk as weighted average of individual flood types
-        weighted_overall_risk = calculate_weighted_overall_risk(flood_risk_profile)
-        
-        geo_data = GEOGRAPHIC_DATA.get(location, {})
-        base_risk = geo_data.get('base_risk_factor', 0.5)
+        # Log prediction with enhanced details
+        log_prediction(location, response_data)
         
-        # Create enhanced DataFrame with all factors
-        live_data = weather_data.copy()
+        return jsonify(response_data)
         
-        # Calculate realistic water levels using multiple factors
-        elevation = geo_data.get('elevation', 10)
-        drainage_quality = geo_data.get('drainage_quality', 'Moderate')
-        distance_to_river = geo_data.get('distance_to_major_river', 5)
-        urbanization = geo_data.get('urbanization_factor', 0.5)
+    except Exception as e:
+        print(f"Prediction error for {location}: {str(e)}")
+        return jsonify({'error': str(e), 'location': location}), 500
+
+@app.route('/api/predict/batch', methods=['GET', 'POST'])
+def predict_batch():
+    """Get flood predictions for several locations, scored together in one model call"""
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body, dict):
+            return jsonify({'error': 'Request body must be a JSON object with a locations list'}), 400
+        requested = body.get('locations')
+    else:
+        requested = request.args.get('locations')
+        requested = [name.strip() for name in requested.split(',')] if requested else None
+    
+    if not requested:
+        requested = list(LOCATIONS.keys())
+    if not isinstance(requested, list) or not all(isinstance(name, str) for name in requested):
+        return jsonify({'error': 'locations must be a list of location names'}), 400
+    
+    # Preserve request order, drop duplicates
+    requested = list(dict.fromkeys(name for name in requested if name))
+    unknown = [name for name in requested if name not in LOCATIONS]
+    
+    try:
+        predictions, errors = compute_station_predictions(
+            [name for name in requested if name in LOCATIONS]
+        )
+        errors.update({name: 'Location not found' for name in unknown})
         
-        # Enhanced water level calculation
-        elevation_factor = max(0.3, 1.0 - (elevation / 50.0))  # Lower elevation = higher base level
-        drainage_multiplier = {'Poor': 1.4, 'Moderate': 1.1, 'Good': 0.8}.get(drainage_quality, 1.1)
-        river_proximity_factor = max(0.5, 1.0 - (distance_to_river / 20.0))
-        urban_runoff_factor = 1.0 + (urbanization * 0.3)  # Urban areas have more runoff
+        for location, response_data in predictions.items():
+            log_prediction(location, response_data)
         
-        # Base water level adjusted for all factors
-        base_water_level = (2.8 + elevation_factor * 2.2 + 
-                           river_proximity_factor * 0.8)
+        return jsonify({
+            'timestamp': datetime.now().isoformat(),
+            'count': len(predictions),
+            'predictions': predictions,
+            'errors': errors
+        })
         
-        # Calculate daily water levels with realistic modeling
-        water_levels = []
-        for i, rainfall in enumerate(live_data['rainfall']):
-            # Cumulative effect of recent rainfall
-            recent_rain_effect = 0
-            for j in range(max(0, i-2), i+1):  # 3-day influence
-                days_ago = i - j
-                decay_factor = 0.7 ** days_ago  # Exponential decay
-                if j < len(live_data):
-                    recent_rain_effect += live_data['rainfall'].iloc[j] * decay_factor
-            
-            # Daily water level calculation
-            daily_level = (base_water_level + 
-                          (rainfall * 0.08 * drainage_multiplier * urban_runoff_factor) +
-                          (recent_rain_effect * 0.04 * drainage_multiplier) +
-                          np.random.normal(0, 0.12))  # Natural variation
-            
-            water_levels.append(max(daily_level, 1.8))  # Minimum realistic level
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        return jsonify({'error': str(e), 'locations': requested}), 500
+
+def compute_station_predictions(locations):
+    """Predict several stations, stacking their features into one matrix for a single forest call.
+    
+    Returns (predictions, errors), both keyed by location.
+    """
+    prepared = {}
+    errors = {}
+    for location in locations:
+        try:
+            prepared[location] = prepare_station_inputs(location)
+        except Exception as e:
+            errors[location] = str(e)
+    
+    scored = [location for location, inputs in prepared.items() if inputs['features'] is not None]
+    probabilities = {}
+    ml_error = None
+    if scored:
+        try:
+            feature_matrix = np.vstack([prepared[location]['features'] for location in scored])
+            probabilities = dict(zip(scored, predict_flood_probabilities(feature_matrix)))
+        except Exception as e:
+            ml_error = e
+    
+    predictions = {}
+    for location, inputs in prepared.items():
+        try:
+            predictions[location] = finalize_station_prediction(
+                inputs,
+                ml_risk_probability=probabilities.get(location),
+                ml_error=ml_error if location in scored else None
+            )
+        except Exception as e:
+            errors[location] = str(e)
+    
+    return predictions, errors
+
+def get_station_prediction(location):
+    """Station prediction memoized for the current request.
+
+    Coordinate predictions blend several stations and may ask for the same
+    one more than once; within a request each station is computed once.
+    """
+    if not has_request_context():
+        return compute_station_prediction(location)
+    
+    memo = g.setdefault('station_predictions', {})
+    if location not in memo:
+        memo[location] = compute_station_prediction(location)
+    return memo[location]
+
+def compute_station_prediction(location):
+    """Compute a station's flood prediction as plain Python data (no logging, no Response)"""
+    inputs = prepare_station_inputs(location)
+    if inputs['features'] is None:
+        return finalize_station_prediction(inputs)
+    
+    try:
+        ml_risk_probability = predict_flood_probabilities(inputs['features'])[0]
+    except Exception as e:
+        return finalize_station_prediction(inputs, ml_error=e)
+    return finalize_station_prediction(inputs, ml_risk_probability)
+
+def model_ready():
+    """True when the 9-feature forest and its scaler are loaded"""
+    return rf_model is not None and scaler is not None and len(feature_cols) == 9
+
+def predict_flood_probabilities(features, model=None):
+    """Flood probability for every row of an (n, 9) feature matrix in one scaler/forest call"""
+    if model is None:
+        with model_lock:
+            model = (rf_model, scaler, flat_forest)
+            generation = model_generation
+        if PREDICTION_MEMO_ENABLED:
+            return prediction_memo.lookup(
+                features, lambda rows: score_flood_probabilities(rows, model), namespace=generation
+            )
+    return score_flood_probabilities(features, model)
+
+def score_flood_probabilities(features, model):
+    """Run one (rf_model, scaler, flat_forest) snapshot over a feature matrix"""
+    forest, feature_scaler, engine = model
+    if engine is not None and engine.raw_features:
+        # Compiled engine: scaling is already folded into the thresholds
+        return engine.predict_positive(features)
+    features_scaled = feature_scaler.transform(features)
+    if engine is not None:
+        return engine.predict_positive(features_scaled)
+    return forest.predict_proba(features_scaled)[:, 1]
+
+def prepare_station_inputs(location):
+    """Weather, simulated water levels and the 1x9 model feature row for one station"""
+    # Fetch comprehensive weather data
+    weather_data = fetch_real_weather_data(location, days=7)
+    
+    # Static geographic risk factors, precomputed per station
+    station_risk = get_station_risk(location)
+    geographic_risk = station_risk['geographic_risk']
+    flood_risk_profile = station_risk['flood_risk_profile']
+    
+    # Overall risk is the weighted average of the individual flood types
+    weighted_overall_risk = station_risk['weighted_overall_risk']
+    
+    geo_data = GEOGRAPHIC_DATA.get(location, {})
+    base_risk = geo_data.get('base_risk_factor', 0.5)
+    
+    # Create enhanced DataFrame with all factors
+    live_data = weather_data.copy()
+    
+    # Calculate realistic water levels using multiple factors
+    elevation = geo_data.get('elevation', 10)
+    distance_to_river = geo_data.get('distance_to_major_river', 5)
+    
+    # Base water level, drainage and urban runoff modifiers for this station
+    base_water_level, drainage_multiplier, urban_runoff_factor = water_level_parameters(geo_data)
+    
+    # Calculate daily water levels with realistic modeling (3-day decaying rainfall memory)
+    live_data['estimated_water_level'] = simulate_water_levels(
+        live_data['rainfall'].to_numpy(dtype=float),
+        base_water_level, drainage_multiplier, urban_runoff_factor
+    )
+    
+    # Current conditions
+    latest_rainfall = live_data['rainfall'].iloc[-1]
+    latest_water_level = live_data['estimated_water_level'].iloc[-1]
+    threshold = FLOOD_THRESHOLDS.get(location, 5.5)
+    
+    # Calculate basic aggregates needed for both ML and fallback
+    rainfall_3day = live_data['rainfall'].tail(3).sum()
+    rainfall_7day = live_data['rainfall'].sum()
+    
+    # Enhanced ML features (all 9, matching training)
+    features = None
+    if model_ready():
+        # Calculate comprehensive features
+        rainfall_1day = latest_rainfall
+        # rainfall_3day and rainfall_7day already calculated above
+        water_level_lag1 = latest_water_level
         
-        live_data['estimated_water_level'] = water_levels
+        # Water level trend (slope over last 3 days)
+        if len(live_data) >= 3:
+            recent_levels = live_data['estimated_water_level'].tail(3).values
+            water_level_trend = (recent_levels[-1] - recent_levels[0]) / 2
+        else:
+            water_level_trend = 0
         
-        # Current conditions
-        latest_rainfall = live_data['rainfall'].iloc[-1]
-        latest_water_level = live_data['estimated_water_level'].iloc[-1]
-        threshold = FLOOD_THRESHOLDS.get(location, 5.5)
+        # Seasonal factor
+        current_month = datetime.now().month
+        is_monsoon = 1 if 6 <= current_month <= 9 else 0
         
-        # Calculate basic aggregates needed for both ML and fallback
-        rainfall_3day = live_data['rainfall'].tail(3).sum()
-        rainfall_7day = live_data['rainfall'].sum()
+        # Geographic features
+        river_distance = distance_to_river
         
-        # Enhanced ML prediction with all 9 features
-        if rf_model is not None and scaler is not None and len(feature_cols) == 9:
-            try:
-                # Calculate comprehensive features
-                rainfall_1day = latest_rainfall
-                # rainfall_3day and rainfall_7day already calculated above
-                water_level_lag1 = latest_water_level
-                
-                # Water level trend (slope over last 3 days)
-                if len(live_data) >= 3:
-                    recent_levels = live_data['estimated_water_level'].tail(3).values
-                    water_level_trend = (recent_levels[-1] - recent_levels[0]) / 2
-                else:
-                    water_level_trend = 0
-                
-                # Seasonal factor
-                current_month = datetime.now().month
-                is_monsoon = 1 if 6 <= current_month <= 9 else 0
-                
-                # Geographic features
-                river_distance = distance_to_river
-                
-                # Create 9-feature array to match training
-                features = np.array([[
-                    rainfall_1day, rainfall_3day, rainfall_7day,
-                    water_level_lag1, water_level_trend, is_monsoon,
-                    elevation, river_distance, geographic_risk
-                ]])
-                
-                # Get ML prediction
-                features_scaled = scaler.transform(features)
-                ml_risk_probability = rf_model.predict_proba(features_scaled)[0, 1]
-                
-                # Confidence based on feature consistency
-                feature_ranges = {
-                    'rainfall_1day': [0, 30],
-                    'rainfall_3day': [0, 80],
-                    'elevation': [0, 50],
-                    'river_distance': [0, 100]
-                }
-                
-                confidence_factors = []
-                for i, feature_name in enumerate(['rainfall_1day', 'rainfall_3day', 'elevation', 'river_distance']):
-                    if i < len(features[0]) and feature_name in feature_ranges:
-                        feature_val = features[0][i]
-                        min_val, max_val = feature_ranges[feature_name]
-                        # Higher confidence when features are in expected ranges
-                        if min_val <= feature_val <= max_val:
-                            confidence_factors.append(0.9)
-                        else:
-                            confidence_factors.append(0.6)
-                
-                model_confidence = np.mean(confidence_factors) if confidence_factors else 0.8
-                
-                # Apply temporal consistency (smooth transitions)
-                temporal_smoothing = 0.82
-                historical_risk_estimate = geographic_risk  # Use as baseline
-                
-                # Extremely conservative risk calculation to prevent inflated values
-                # Start with very low base component weights
-                base_ml_risk = ml_risk_probability * model_confidence
-                
-                # Apply ultra-conservative risk scaling - ensure sunny days stay at 5-10%
-                # Only extreme conditions should show moderate to high risk
-                if base_ml_risk < 0.15:
-                    # Very low risk scenarios (most common) - keep them ultra-low
-                    final_risk_score = base_ml_risk * 0.25 + geographic_risk * 0.06
-                elif base_ml_risk < 0.35:
-                    # Low risk scenarios - minimal increase
-                    final_risk_score = base_ml_risk * 0.35 + geographic_risk * 0.08
-                else:
-                    # Moderate risk scenarios - gentle increase
-                    final_risk_score = base_ml_risk * 0.45 + geographic_risk * 0.10
-                
-                # Ultra-conservative extreme conditions check
-                extreme_rain = rainfall_3day > (geo_data.get('annual_rainfall_mm', 2000) / 20)  # More than 5% of annual rain in 3 days
-                extreme_water = latest_water_level > (threshold * 0.90)
-                
-                # Tiny boosts for extreme conditions
-                if extreme_rain and extreme_water:
-                    final_risk_score += 0.03  # Very small boost only when both conditions are extreme
-                elif extreme_rain or extreme_water:
-                    final_risk_score += 0.01  # Minimal boost for single extreme condition
-                
-                # Apply ultra-conservative temporal smoothing
-                temporal_smoothing = 0.70
-                ultra_conservative_base = min(base_risk, 0.08)  # Even lower cap on base risk influence
-                final_risk_score = (final_risk_score * temporal_smoothing + 
-                                  ultra_conservative_base * (1 - temporal_smoothing))
-                
-                # Ultra-conservative bounds - ensure sunny days are 5-10% max
-                min_risk = 0.02  # Lower minimum
-                max_risk = 0.45   # Lower maximum
-                final_risk_score = np.clip(final_risk_score, min_risk, max_risk)
-                
-                # Override ML risk with weighted overall risk from flood types
-                final_risk_score = weighted_overall_risk
-                
-                flood_prediction = int(final_risk_score > 0.6)
-                
-                # Enhanced debugging info
-                debug_info = {
-                    'ml_risk_probability': float(ml_risk_probability),
-                    'model_confidence': float(model_confidence),
-                    'temporal_smoothing_applied': temporal_smoothing,
-                    'extreme_conditions': {
-                        'extreme_rain': extreme_rain,
-                        'extreme_water': extreme_water
-                    },
-                    'features_used': dict(zip(feature_cols, features[0])),
-                    'risk_components': {
-                        'ml_component': float(ml_risk_probability * 0.70 * model_confidence),
-                        'geographic_component': float(geographic_risk * 0.20),
-                        'historical_component': float(historical_risk_estimate * 0.10)
-                    }
+        # Create 9-feature array to match training
+        features = np.array([[
+            rainfall_1day, rainfall_3day, rainfall_7day,
+            water_level_lag1, water_level_trend, is_monsoon,
+            elevation, river_distance, geographic_risk
+        ]])
+    
+    return {
+        'location': location,
+        'live_data': live_data,
+        'geo_data': geo_data,
+        'base_risk': base_risk,
+        'geographic_risk': geographic_risk,
+        'flood_risk_profile': flood_risk_profile,
+        'weighted_overall_risk': weighted_overall_risk,
+        'latest_rainfall': latest_rainfall,
+        'latest_water_level': latest_water_level,
+        'threshold': threshold,
+        'rainfall_3day': rainfall_3day,
+        'features': features
+    }
+
+def finalize_station_prediction(inputs, ml_risk_probability=None, ml_error=None):
+    """Turn prepared station inputs and the forest's probability into the prediction payload"""
+    location = inputs['location']
+    live_data = inputs['live_data']
+    geo_data = inputs['geo_data']
+    base_risk = inputs['base_risk']
+    geographic_risk = inputs['geographic_risk']
+    flood_risk_profile = inputs['flood_risk_profile']
+    weighted_overall_risk = inputs['weighted_overall_risk']
+    latest_rainfall = inputs['latest_rainfall']
+    latest_water_level = inputs['latest_water_level']
+    threshold = inputs['threshold']
+    rainfall_3day = inputs['rainfall_3day']
+    features = inputs['features']
+    
+    # Enhanced ML prediction with all 9 features
+    if features is not None:
+        try:
+            if ml_error is not None:
+                raise ml_error
+            
+            # Confidence based on feature consistency
+            feature_ranges = {
+                'rainfall_1day': [0, 30],
+                'rainfall_3day': [0, 80],
+                'elevation': [0, 50],
+                'river_distance': [0, 100]
+            }
+            
+            confidence_factors = []
+            for i, feature_name in enumerate(['rainfall_1day', 'rainfall_3day', 'elevation', 'river_distance']):
+                if i < len(features[0]) and feature_name in feature_ranges:
+                    feature_val = features[0][i]
+                    min_val, max_val = feature_ranges[feature_name]
+                    # Higher confidence when features are in expected ranges
+                    if min_val <= feature_val <= max_val:
+                        confidence_factors.append(0.9)
+                    else:
+                        confidence_factors.append(0.6)
+            
+            model_confidence = np.mean(confidence_factors) if confidence_factors else 0.8
+            
+            # Apply temporal consistency (smooth transitions)
+            temporal_smoothing = 0.82
+            historical_risk_estimate = geographic_risk  # Use as baseline
+            
+            # Extremely conservative risk calculation to prevent inflated values
+            # Start with very low base component weights
+            base_ml_risk = ml_risk_probability * model_confidence
+            
+            # Apply ultra-conservative risk scaling - ensure sunny days stay at 5-10%
+            # Only extreme conditions should show moderate to high risk
+            if base_ml_risk < 0.15:
+                # Very low risk scenarios (most common) - keep them ultra-low
+                final_risk_score = base_ml_risk * 0.25 + geographic_risk * 0.06
+            elif base_ml_risk < 0.35:
+                # Low risk scenarios - minimal increase
+                final_risk_score = base_ml_risk * 0.35 + geographic_risk * 0.08
+            else:
+                # Moderate risk scenarios - gentle increase
+                final_risk_score = base_ml_risk * 0.45 + geographic_risk * 0.10
+            
+            # Ultra-conservative extreme conditions check
+            extreme_rain = rainfall_3day > (geo_data.get('annual_rainfall_mm', 2000) / 20)  # More than 5% of annual rain in 3 days
+            extreme_water = latest_water_level > (threshold * 0.90)
+            
+            # Tiny boosts for extreme conditions
+            if extreme_rain and extreme_water:
+                final_risk_score += 0.03  # Very small boost only when both conditions are extreme
+            elif extreme_rain or extreme_water:
+                final_risk_score += 0.01  # Minimal boost for single extreme condition
+            
+            # Apply ultra-conservative temporal smoothing
+            temporal_smoothing = 0.70
+            ultra_conservative_base = min(base_risk, 0.08)  # Even lower cap on base risk influence
+            final_risk_score = (final_risk_score * temporal_smoothing + 
+                              ultra_conservative_base * (1 - temporal_smoothing))
+            
+            # Ultra-conservative bounds - ensure sunny days are 5-10% max
+            min_risk = 0.02  # Lower minimum
+            max_risk = 0.45   # Lower maximum
+            final_risk_score = np.clip(final_risk_score, min_risk, max_risk)
+            
+            # Override ML risk with weighted overall risk from flood types
+            final_risk_score = weighted_overall_risk
+            
+            flood_prediction = int(final_risk_score > 0.6)
+            
+            # Enhanced debugging info
+            debug_info = {
+                'ml_risk_probability': float(ml_risk_probability),
+                'model_confidence': float(model_confidence),
+                'temporal_smoothing_applied': temporal_smoothing,
+                'extreme_conditions': {
+                    'extreme_rain': bool(extreme_rain),
+                    'extreme_water': bool(extreme_water)
+                },
+                'features_used': dict(zip(feature_cols, features[0])),
+                'risk_components': {
+                    'ml_component': float(ml_risk_probability * 0.70 * model_confidence),
+                    'geographic_component': float(geographic_risk * 0.20),
+                    'historical_component': float(historical_risk_estimate * 0.10)
                 }
-                
-            except Exception as e:
-                print(f"Enhanced ML prediction error: {e}")
-                # Robust fallback calculation
-                final_risk_score = calculate_fallback_risk(location, latest_rainfall, rainfall_3day, 
-                                                         latest_water_level, threshold, geographic_risk)
-                flood_prediction = int(final_risk_score > 0.6)
-                debug_info = {'error': str(e), 'used_fallback': True}
-        else:
-            # Enhanced fallback calculation
+            }
+            
+        except Exception as e:
+            print(f"Enhanced ML prediction error: {e}")
+            # Robust fallback calculation
             final_risk_score = calculate_fallback_risk(location, latest_rainfall, rainfall_3day, 
                                                      latest_water_level, threshold, geographic_risk)
             flood_prediction = int(final_risk_score > 0.6)
-            debug_info = {'used_fallback': True, 'reason': 'Model not available or incomplete features'}
-        
-        # Override final_risk_score with weighted overall risk from flood types
-        final_risk_score = weighted_overall_risk
+            debug_info = {'error': str(e), 'used_fallback': True}
+    else:
+        # Enhanced fallback calculation
+        final_risk_score = calculate_fallback_risk(location, latest_rainfall, rainfall_3day, 
+                                                 latest_water_level, threshold, geographic_risk)
         flood_prediction = int(final_risk_score > 0.6)
-        
-        # Determine risk level with enhanced granularity
-        if final_risk_score >= 0.85:
-            status = 'EXTREME RISK'
-            risk_class = 'risk-extreme'
-        elif final_risk_score >= 0.75:
-            status = 'CRITICAL RISK'
-            risk_class = 'risk-critical'
-        elif final_risk_score >= 0.6:
-            status = 'HIGH RISK'
-            risk_class = 'risk-high'
-        elif final_risk_score >= 0.4:
-            status = 'MODERATE RISK'
-            risk_class = 'risk-medium'
-        elif final_risk_score >= 0.2:
-            status = 'LOW RISK'
-            risk_class = 'risk-low'
-        else:
-            status = 'MINIMAL RISK'
-            risk_class = 'risk-minimal'
-        
-        # Calculate prediction confidence
-        prediction_confidence = max(final_risk_score, 1-final_risk_score)
-        
-        # Create comprehensive response with enhanced data
-        response_data = {
-            'location': location,
-            'timestamp': datetime.now().isoformat(),
-            'current_rainfall': float(latest_rainfall),
-            'current_water_level': float(latest_water_level),
-            'flood_threshold': float(threshold),
-            'flood_risk': int(flood_prediction),
-            'risk_probability': float(final_risk_score),
-            'confidence': float(prediction_confidence),
-            'status': status,
-            'risk_class': risk_class,
-            'geographic_factors': {
-                'elevation_m': geo_data.get('elevation', 0),
-                'distance_to_river_km': geo_data.get('distance_to_major_river', 0),
-                'drainage_quality': geo_data.get('drainage_quality', 'Unknown'),
-                'topography': geo_data.get('topography', 'Unknown'),
-                'urbanization_factor': geo_data.get('urbanization_factor', 0.5),
-                'annual_rainfall_mm': geo_data.get('annual_rainfall_mm', 2000),
-                'flood_history_frequency': geo_data.get('flood_history_frequency', 5),
-                'soil_type': geo_data.get('soil_type', 'Unknown'),
-                'river_systems': geo_data.get('river_systems', []),
-                'base_risk_factor': float(base_risk),
-                'geographic_risk_contribution': float(geographic_risk)
-            },
-            'flood_risk_profile': {
-                flood_type: {
-                    'risk_percentage': float(profile['risk_percentage']),
-                    'severity_level': profile['severity_level'],
-                    'flood_degree': profile['flood_degree'],
-                    'estimated_depth': profile['estimated_depth'],
-                    'description': profile['description'],
-                    'typical_damage': profile['typical_damage']
-                } for flood_type, profile in flood_risk_profile.items()
-            },
-            'recent_data': [{
-                'date': row['date'],
-                'rainfall': float(row['rainfall']),
-                'estimated_water_level': float(row['estimated_water_level'])
-            } for _, row in live_data.iterrows()],
-            'model_info': {
-                'version': '2.0.0',
-                'features_count': len(feature_cols) if feature_cols else 0,
-                'prediction_method': 'enhanced_ml' if rf_model is not None else 'fallback',
-                'debug': debug_info
-            }
+        debug_info = {'used_fallback': True, 'reason': 'Model not available or incomplete features'}
+    
+    # Override final_risk_score with weighted overall risk from flood types
+    final_risk_score = weighted_overall_risk
+    flood_prediction = int(final_risk_score > 0.6)
+    
+    # Determine risk level with enhanced granularity
+    if final_risk_score >= 0.85:
+        status = 'EXTREME RISK'
+        risk_class = 'risk-extreme'
+    elif final_risk_score >= 0.75:
+        status = 'CRITICAL RISK'
+        risk_class = 'risk-critical'
+    elif final_risk_score >= 0.6:
+        status = 'HIGH RISK'
+        risk_class = 'risk-high'
+    elif final_risk_score >= 0.4:
+        status = 'MODERATE RISK'
+        risk_class = 'risk-medium'
+    elif final_risk_score >= 0.2:
+        status = 'LOW RISK'
+        risk_class = 'risk-low'
+    else:
+        status = 'MINIMAL RISK'
+        risk_class = 'risk-minimal'
+    
+    # Calculate prediction confidence
+    prediction_confidence = max(final_risk_score, 1-final_risk_score)
+    
+    # Create comprehensive response with enhanced data
+    response_data = {
+        'location': location,
+        'timestamp': datetime.now().isoformat(),
+        'current_rainfall': float(latest_rainfall),
+        'current_water_level': float(latest_water_level),
+        'flood_threshold': float(threshold),
+        'flood_risk': int(flood_prediction),
+        'risk_probability': float(final_risk_score),
+        'confidence': float(prediction_confidence),
+        'status': status,
+        'risk_class': risk_class,
+        'weather_source': live_data.attrs.get('weather_source'),
+        'geographic_factors': {
+            'elevation_m': geo_data.get('elevation', 0),
+            'distance_to_river_km': geo_data.get('distance_to_major_river', 0),
+            'drainage_quality': geo_data.get('drainage_quality', 'Unknown'),
+            'topography': geo_data.get('topography', 'Unknown'),
+            'urbanization_factor': geo_data.get('urbanization_factor', 0.5),
+            'annual_rainfall_mm': geo_data.get('annual_rainfall_mm', 2000),
+            'flood_history_frequency': geo_data.get('flood_history_frequency', 5),
+            'soil_type': geo_data.get('soil_type', 'Unknown'),
+            'river_systems': geo_data.get('river_systems', []),
+            'base_risk_factor': float(base_risk),
+            'geographic_risk_contribution': float(geographic_risk)
+        },
+        'flood_risk_profile': {
+            flood_type: {
+                'risk_percentage': float(profile['risk_percentage']),
+                'severity_level': profile['severity_level'],
+                'flood_degree': profile['flood_degree'],
+                'estimated_depth': profile['estimated_depth'],
+                'description': profile['description'],
+                'typical_damage': profile['typical_damage']
+            } for flood_type, profile in flood_risk_profile.items()
+        },
+        'recent_data': [{
+            'date': row['date'],
+            'rainfall': float(row['rainfall']),
+            'estimated_water_level': float(row['estimated_water_level'])
+        } for _, row in live_data.iterrows()],
+        'model_info': {
+            'version': '2.0.0',
+            'features_count': len(feature_cols) if feature_cols else 0,
+            'prediction_method': 'enhanced_ml' if rf_model is not None else 'fallback',
+            'debug': debug_info
         }
-        
-        # Log prediction with enhanced details
-        log_prediction(location, response_data)
-        
-        return jsonify(response_data)
-        
-    except Exception as e:
-        print(f"Prediction error for {location}: {str(e)}")
-        return jsonify({'error': str(e), 'location': location}), 500
+    }
+    
+    return response_data
 
-@app.route('/api/history/<location>')
-def get_history(location):
-    """Get prediction history for a location"""
-    log_file = 'logs/flood_predictions.csv'
+def read_history_from_disk(location, limit=30):
+    """Last ``limit`` history points for a location from the prediction store, oldest first"""
+    # Make this worker's queued predictions visible before reading
+    prediction_log.flush(timeout=1.0)
+    
+    if PREDICTION_STORE == 'sqlite':
+        ensure_prediction_store()
+        return [{
+            'date': row['date'],
+            'rainfall': float(row['rainfall'] or 0),
+            'water_level': float(row['water_level'] or 0),
+            'prediction': int(row['flood_risk'] or 0),
+            'probability': float(row['risk_probability'] or 0)
+        } for row in prediction_store.history(location, limit=limit)]
     
     # Create sample historical data if no log file exists
-    if not os.path.exists(log_file):
+    if not os.path.exists(PREDICTION_LOG_FILE):
         create_sample_history()
     
+    return [{
+        'date': row['date'],
+        'rainfall': float(row['rainfall']),
+        'water_level': float(row['water_level']),
+        'prediction': int(float(row['flood_risk'])),
+        'probability': float(row['risk_probability'])
+    } for row in prediction_history_index.history(location, limit=limit)]
+
+# Recent history: each worker keeps the last HISTORY_BUFFER_SIZE points per station
+# in a ring buffer, re-read from disk every HISTORY_BUFFER_MAX_AGE_SECONDS to see
+# rows logged by other workers. Longer requests (?limit=) go to disk.
+HISTORY_BUFFER_SIZE = int(os.environ.get('HISTORY_BUFFER_SIZE', 64))
+HISTORY_BUFFER_MAX_AGE_SECONDS = float(os.environ.get('HISTORY_BUFFER_MAX_AGE_SECONDS', 30))
+HISTORY_MAX_LIMIT = 1000
+recent_history = RecentHistory(
+    lambda location, limit: read_history_from_disk(location, limit),
+    capacity=HISTORY_BUFFER_SIZE,
+    max_age_seconds=HISTORY_BUFFER_MAX_AGE_SECONDS
+)
+
+def warm_history_buffers():
+    """Fill this worker's history buffers (called at worker start)"""
+    if HISTORY_BUFFER_SIZE > 0:
+        recent_history.warm(LOCATIONS.keys())
+
+@app.route('/api/history/<location>')
+def get_history(location):
+    """Get prediction history for a location"""
+    if location not in LOCATIONS:
+        return jsonify({'error': 'Location not found', 'history': []}), 404
+    limit = min(max(request.args.get('limit', 30, type=int), 1), HISTORY_MAX_LIMIT)
+    
     try:
-        df = pd.read_csv(log_file)
-        location_history = df[df['location'] == location].tail(30)
-        
-        history = []
-        for _, row in location_history.iterrows():
-            history.append({
-                'date': row['date'],
-                'rainfall': float(row['rainfall']),
-                'water_level': float(row['water_level']),
-                'prediction': int(row['flood_risk']),
-                'probability': float(row['risk_probability'])
-            })
-        
+        if HISTORY_BUFFER_SIZE > 0:
+            history = recent_history.latest(location, limit)
+        else:
+            history = read_history_from_disk(location, limit)
         return jsonify({'history': history})
         
     except Exception as e:
         return jsonify({'error': str(e), 'history': []}), 500
 
+def ensure_prediction_store():
+    """Seed the prediction database from the CSV log (or sample data) once, as recorded in its imports table"""
+    if prediction_store.was_imported(PREDICTION_LOG_FILE):
+        return
+    if not os.path.exists(PREDICTION_LOG_FILE):
+        create_sample_history()
+    prediction_store.import_csv(PREDICTION_LOG_FILE)
+
 def create_sample_history():
     """Create sample historical prediction data for demonstration"""
-    log_file = 'logs/flood_predictions.csv'
+    log_file = PREDICTION_LOG_FILE
     
     # Generate 30 days of sample data
     sample_data = []
@@ -647,15 +1045,17 @@ def create_sample_history():
                 'status': 'HIGH RISK' if flood_risk == 1 else 'LOW RISK'
             })
     
-    # Save to CSV
-    os.makedirs('logs', exist_ok=True)
+    # Save to CSV; rename into place so a worker importing it never reads half a file
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
     df = pd.DataFrame(sample_data)
-    df.to_csv(log_file, index=False)
+    tmp_file = f"{log_file}.{os.getpid()}.tmp"
+    df.to_csv(tmp_file, index=False)
+    os.replace(tmp_file, log_file)
     print(f"📊 Created sample historical data: {len(sample_data)} records")
 
 def log_prediction(location, prediction_data):
     """Log a prediction to the history file"""
-    log_file = 'logs/flood_predictions.csv'
+    log_file = PREDICTION_LOG_FILE
     
     log_entry = {
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -670,6 +1070,25 @@ def log_prediction(location, prediction_data):
         'status': prediction_data.get('status', 'LOW RISK')
     }
     
+    recent_history.append(location, {
+        'date': log_entry['date'],
+        'rainfall': log_entry['rainfall'],
+        'water_level': log_entry['water_level'],
+        'prediction': log_entry['flood_risk'],
+        'probability': log_entry['risk_probability']
+    })
+    
+    if PREDICTION_LOG_MODE == 'async':
+        prediction_log.write(log_entry)
+        return
+    
+    if prediction_archive is not None:
+        prediction_archive.append([log_entry])
+    
+    if PREDICTION_STORE == 'sqlite':
+        prediction_store.insert(log_entry)
+        return
+    
     log_df = pd.DataFrame([log_entry])
     
     if os.path.exists(log_file):
@@ -678,6 +1097,37 @@ def log_prediction(location, prediction_data):
         os.makedirs('logs', exist_ok=True)
         log_df.to_csv(log_file, mode='w', header=True, index=False)
 
+@app.route('/api/analytics/risk-summary')
+def get_risk_summary():
+    """Per-station risk summary over a time range, read from the columnar archive"""
+    if prediction_archive is None:
+        return jsonify({'error': 'Prediction archive is disabled'}), 404
+    
+    start = request.args.get('start')
+    end = request.args.get('end')
+    locations = request.args.get('locations')
+    try:
+        # Only the partitions in range and these two columns are read
+        rows = prediction_archive.scan(['risk_probability', 'flood_risk'], start=start, end=end,
+                                       locations=locations.split(',') if locations else None)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid time range: {e}'}), 400
+    
+    summary = {}
+    for location in np.unique(rows['location']):
+        mask = rows['location'] == location
+        probabilities = rows['risk_probability'][mask]
+        summary[str(location)] = {
+            'predictions': int(mask.sum()),
+            'mean_risk_probability': round(float(np.nanmean(probabilities)), 4) if np.isfinite(probabilities).any() else None,
+            'max_risk_probability': round(float(np.nanmax(probabilities)), 4) if np.isfinite(probabilities).any() else None,
+            'high_risk_predictions': int(np.nansum(rows['flood_risk'][mask] == 1)),
+            'first': str(rows['timestamp'][mask][0]),
+            'last': str(rows['timestamp'][mask][-1])
+        }
+    
+    return jsonify({'start': start, 'end': end, 'locations': summary})
+
 @app.route('/api/alerts')
 def get_alerts():
     """Get recent alerts"""
@@ -710,23 +1160,228 @@ def system_status():
     return jsonify({
         'status': 'operational',
         'models_loaded': rf_model is not None and scaler is not None,
+        'model': {
+            'version': model_metadata.get('version'),
+            'created': model_metadata.get('created'),
+            'load_seconds': model_metadata.get('load_seconds'),
+            'format': model_metadata.get('format'),
+            'serve_mode': MODEL_SERVE_MODE,
+            'registry': model_registry.stats()
+        },
+        'inference_engine': flat_forest.stats() if flat_forest is not None else {'engine': 'sklearn'},
+        'prediction_memo': dict(prediction_memo.stats(), enabled=PREDICTION_MEMO_ENABLED),
+        'prediction_log': dict(prediction_log.stats(), mode=PREDICTION_LOG_MODE),
+        'history_buffer': recent_history.stats(),
+        'prediction_store': (prediction_store.stats() if PREDICTION_STORE == 'sqlite'
+                             else dict(prediction_history_index.stats(), backend='csv')),
+        'station_risk_table': {
+            'stations': len(station_risk_table),
+            'builds': station_risk_builds,
+            'built_at': station_risk_built_at,
+            'overrides_path': STATION_OVERRIDES_PATH or None
+        },
         'last_update': datetime.now().isoformat(),
         'monitored_locations': len(LOCATIONS),
+        'weather_cache': weather_cache.stats(),
+        'weather_fetches': weather_flights.stats(),
+        'weather_serve_mode': WEATHER_SERVE_MODE,
+        'weather_prefetcher': weather_prefetcher.stats(),
+        'risk_raster': dict(risk_raster.stats(), enabled=RISK_RASTER_ENABLED),
+        'risk_tiles': risk_tiles.stats(),
+        'process': {
+            'pid': os.getpid(),
+            'preloaded': IMPORT_PID != os.getpid(),
+            'memory': cached_memory_report(MEMORY_REPORT_MAX_AGE_SECONDS)
+        },
         'version': '1.0.0'
     })
 
+@app.route('/api/admin/model/reload', methods=['POST'])
+def reload_model():
+    """Load, validate and swap in a model version (default: CURRENT) in this worker.
+    
+    A pinned version that activates becomes CURRENT, so workers running the
+    directory watcher follow it; without the watcher the response carries a
+    warning that only this worker changed.
+    """
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    payload = request.get_json(silent=True) or {}
+    version = payload.get('version')
+    outcome = model_registry.reload(version, force=bool(payload.get('force')))
+    if outcome['status'] == 'activated' and version and version != current_version(MODEL_DIR):
+        activate_version(MODEL_DIR, version)
+    
+    outcome['pid'] = os.getpid()
+    if outcome['status'] == 'activated' and not model_registry.watching:
+        outcome['warning'] = (f"Swapped in worker {os.getpid()} only: other workers keep their model until "
+                              f"restarted unless MODEL_WATCH_INTERVAL_SECONDS > 0 lets them follow CURRENT")
+    status_code = {'activated': 200, 'unchanged': 200, 'rejected': 409}.get(outcome['status'], 500)
+    return jsonify(outcome), status_code
+
+@app.route('/api/admin/stations/<location>', methods=['PATCH'])
+def update_station(location):
+    """Update a station's geographic metadata and rebuild the precomputed risk table.
+    
+    The edit is written to STATION_OVERRIDES_PATH, which the other workers apply
+    within STATION_OVERRIDES_CHECK_SECONDS; without it the response carries a
+    warning that only this worker changed.
+    """
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    if location not in LOCATIONS:
+        return jsonify({'error': 'Location not found'}), 404
+    
+    changes = request.get_json(silent=True)
+    if not isinstance(changes, dict) or not changes:
+        return jsonify({'error': 'Expected a JSON object of metadata fields'}), 400
+    errors = validate_station_changes(changes)
+    if errors:
+        return jsonify({'error': 'Invalid station metadata', 'fields': errors}), 400
+    
+    geo_data = update_station_metadata(location, changes)
+    outcome = {
+        'location': location,
+        'geographic_data': geo_data,
+        'geographic_risk': float(station_risk_table[location]['geographic_risk']),
+        'weighted_overall_risk': float(station_risk_table[location]['weighted_overall_risk']),
+        'pid': os.getpid()
+    }
+    if station_overrides is None:
+        outcome['warning'] = (f"Updated worker {os.getpid()} only: set STATION_OVERRIDES_PATH to share "
+                              f"station edits with the other workers")
+    return jsonify(outcome)
+
+def check_admin_token():
+    """Error response for admin endpoints, or None when the request carries ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin API disabled (set ADMIN_TOKEN)'}), 403
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Invalid admin token'}), 401
+    return None
+
 def fetch_real_weather_data(location='Dhaka', days=7):
-    """Fetch real weather data from OpenWeatherMap API"""
+    """Fetch real weather data from OpenWeatherMap API, served from the TTL cache when fresh"""
     if not OPENWEATHER_API_KEY or OPENWEATHER_API_KEY == 'your_openweather_api_key':
         print("⚠️ Using simulated data - OpenWeatherMap API key not configured")
-        return get_simulated_data(location, days)
+        return tag_weather_source(get_simulated_data(location, days), 'simulated')
+    
+    cache_key = (location, days)
+    cached = weather_cache.get(cache_key)
+    if cached is None and load_shared_weather(location, days):
+        cached = weather_cache.get(cache_key)
+    if cached is not None:
+        return tag_weather_source(cached.copy(), 'cache')
+    
+    # Answer from the last good observation right away and refresh it in the background
+    # (the prefetcher, when running, already keeps every station refreshed)
+    if WEATHER_SERVE_MODE == 'stale-while-revalidate' or weather_prefetcher.running:
+        stale = weather_cache.get_stale(cache_key)
+        if stale is not None:
+            if not weather_prefetcher.running:
+                schedule_weather_refresh(location, days)
+            return tag_weather_source(stale[0].copy(), 'stale')
+    
+    # A burst of requests for the same station waits on one in-flight fetch
+    weather_data = weather_flights.do(
+        weather_flight_key(location, days),
+        lambda: fetch_and_cache_weather(location, days)
+    )
+    if weather_data is not None:
+        return tag_weather_source(weather_data.copy(), 'openweathermap')
     
+    # Upstream failed: last known good data beats simulated data
+    stale = weather_cache.get_stale(cache_key)
+    if stale is not None:
+        return tag_weather_source(stale[0].copy(), 'stale')
+    
+    # Simulated data is never cached so the next request retries the API
+    return tag_weather_source(get_simulated_data(location, days), 'simulated')
+
+def weather_flight_key(location, days):
+    """Single-flight key: location, window length and current time bucket"""
+    bucket = int(time.time() // WEATHER_FETCH_BUCKET_SECONDS) if WEATHER_FETCH_BUCKET_SECONDS > 0 else 0
+    return (location, days, bucket)
+
+def fetch_and_cache_weather(location='Dhaka', days=7):
+    """Fetch weather from the API and store it in the cache (single-flight leader only)"""
+    weather_data = fetch_weather_from_api(location, days)
+    if weather_data is not None:
+        weather_data.attrs['fetched_at'] = time.time()
+        weather_cache.set((location, days), weather_data)
+        if shared_weather is not None:
+            try:
+                shared_weather.write(location, days, weather_data)
+            except OSError as e:
+                print(f"⚠️ Could not publish weather for {location}: {str(e)}")
+    return weather_data
+
+def load_shared_weather(location, days=7):
+    """Copy a frame another process published into this worker's cache if it is newer; True if loaded"""
+    if shared_weather is None:
+        return False
+    published_at = shared_weather.mtime(location, days)
+    if published_at is None or _shared_weather_seen.get((location, days)) == published_at:
+        return False
+    _shared_weather_seen[(location, days)] = published_at
+    weather_data = shared_weather.read(location, days)
+    if weather_data is None:
+        return False
+    fetched_at = weather_data.attrs.get('fetched_at') or 0
+    cached = weather_cache.peek((location, days))
+    if cached is not None and (cached.attrs.get('fetched_at') or 0) >= fetched_at:
+        return False
+    weather_cache.set((location, days), weather_data, age_seconds=time.time() - fetched_at)
+    return True
+
+def prefetch_station_weather(location, days=7):
+    """Prefetcher callback: refresh one station into the weather cache, bypassing the fresh entry"""
+    if not OPENWEATHER_API_KEY or OPENWEATHER_API_KEY == 'your_openweather_api_key':
+        return None
+    return weather_flights.do(weather_flight_key(location, days),
+                              lambda: fetch_and_cache_weather(location, days))
+
+def schedule_weather_refresh(location='Dhaka', days=7):
+    """Refresh a station's weather on a background thread (at most one per station)"""
+    refresh_key = (location, days)
+    with _weather_refresh_lock:
+        if refresh_key in _weather_refreshes:
+            return
+        _weather_refreshes.add(refresh_key)
+    
+    def refresh():
+        try:
+            weather_flights.do(weather_flight_key(location, days),
+                               lambda: fetch_and_cache_weather(location, days))
+        except Exception as e:
+            print(f"⚠️ Background weather refresh failed for {location}: {str(e)}")
+        finally:
+            with _weather_refresh_lock:
+                _weather_refreshes.discard(refresh_key)
+    
+    threading.Thread(target=refresh, name=f"weather-refresh-{location}", daemon=True).start()
+
+def tag_weather_source(weather_data, source):
+    """Record where a weather frame came from and how old it is (carried in DataFrame.attrs)"""
+    fetched_at = weather_data.attrs.get('fetched_at')
+    weather_data.attrs['weather_source'] = {
+        'source': source,
+        'stale': source == 'stale',
+        'age_seconds': round(time.time() - fetched_at, 1) if fetched_at else None
+    }
+    return weather_data
+
+def fetch_weather_from_api(location='Dhaka', days=7):
+    """Call OpenWeatherMap for a location; returns None when the API is unusable"""
     lat, lon = LOCATIONS.get(location, LOCATIONS['Dhaka'])
     
     try:
         # Get current weather
         current_url = f"{OPENWEATHER_BASE_URL}/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(current_url, timeout=10)
+        response = http_get(current_url)
         
         if response.status_code == 200:
             current_data = response.json()
@@ -755,11 +1410,11 @@ def fetch_real_weather_data(location='Dhaka', days=7):
             })
         else:
             print(f"⚠️ Weather API error: {response.status_code}, using simulated data")
-            return get_simulated_data(location, days)
+            return None
             
     except Exception as e:
         print(f"⚠️ Weather API exception: {str(e)}, using simulated data")
-        return get_simulated_data(location, days)
+        return None
 
 def get_simulated_data(location='Dhaka', days=7):
     """Generate simulated rainfall data as fallback"""
@@ -777,9 +1432,11 @@ def get_simulated_data(location='Dhaka', days=7):
         'rainfall': rainfall
     })
 
-def calculate_flood_risk_profile(location, lat=None, lon=None):
+def calculate_flood_risk_profile(location, lat=None, lon=None, geographic_data=None):
     """Calculate comprehensive flood risk profile with type-specific assessments and flood degrees"""
-    geo_data = GEOGRAPHIC_DATA.get(location, {}) if location else {}
+    if geographic_data is None:
+        geographic_data = GEOGRAPHIC_DATA
+    geo_data = geographic_data.get(location, {}) if location else {}
     
     # Base geographic factors
     elevation = geo_data.get('elevation', 10)
@@ -887,12 +1544,14 @@ def calculate_flood_risk_profile(location, lat=None, lon=None):
     
     return flood_types
 
-def calculate_enhanced_geographic_risk(location):
+def calculate_enhanced_geographic_risk(location, geographic_data=None):
     """Calculate enhanced geographic risk factor with comprehensive analysis"""
-    if location not in GEOGRAPHIC_DATA:
+    if geographic_data is None:
+        geographic_data = GEOGRAPHIC_DATA
+    if location not in geographic_data:
         return 0.5  # Default moderate risk
     
-    geo_data = GEOGRAPHIC_DATA[location]
+    geo_data = geographic_data[location]
     
     # 1. Elevation factor (more sophisticated curve)
     elevation = geo_data['elevation']
@@ -1044,17 +1703,13 @@ def calculate_fallback_risk(location, latest_rainfall, rainfall_3day, latest_wat
 
 def calculate_transition_zone_factor(lat, lon):
     """Calculate a factor to smooth transitions between locations"""
-    import math
-    
-    # Define transition zones around each location (in degrees, roughly 10-20km)
-    transition_radius = 0.15  # About 15-20km depending on latitude
+    # Define transition zones around each location (0.15 degrees, about 16.7km)
+    transition_radius = degrees_to_km(0.15)
     
     total_influence = 0
     weighted_factors = {}
     
-    for loc_name, (loc_lat, loc_lon) in LOCATIONS.items():
-        distance = math.sqrt((lat - loc_lat)**2 + (lon - loc_lon)**2)
-        
+    for loc_name, distance in station_index.within(lat, lon, transition_radius):
         if distance <= transition_radius:
             # Calculate influence (stronger closer to center)
             influence = 1.0 - (distance / transition_radius)
@@ -1075,22 +1730,17 @@ def calculate_transition_zone_factor(lat, lon):
 
 def get_enhanced_interpolated_risk_for_coordinates(lat, lon):
     """Enhanced interpolation for coordinates with better accuracy"""
-    import math
-    
-    # Calculate distances to all known locations
-    distances = {}
-    for loc_name, (loc_lat, loc_lon) in LOCATIONS.items():
-        distance = math.sqrt((lat - loc_lat)**2 + (lon - loc_lon)**2)
-        distances[loc_name] = distance
-    
-    # Find closest location
-    closest_location = min(distances.items(), key=lambda x: x[1])
-    closest_name, closest_distance = closest_location
+    # Great-circle distances (km) to the nearest stations, nearest first
+    neighbors = station_index.nearest(lat, lon, k=STATION_INTERPOLATION_NEIGHBORS)
+    closest_name, closest_distance = neighbors[0]
     
     # If very close to a known location (within 0.008 degrees ≈ 0.9km), use that location
-    if closest_distance < 0.008:
+    if closest_distance < degrees_to_km(0.008):
         return closest_name
     
+    # The weighting below was tuned on distances in degrees
+    distances = {loc_name: km_to_degrees(distance) for loc_name, distance in neighbors}
+    
     # Enhanced inverse distance weighting with exponential decay
     weights = {}
     total_weight = 0
@@ -1174,34 +1824,47 @@ def get_enhanced_interpolated_risk_for_coordinates(lat, lon):
 
 def get_interpolated_weather_data(lat, lon, days=7):
     """Get weather data interpolated from nearby locations"""
-    # Calculate distances and weights for weather interpolation
-    distances = {}
-    for loc_name, (loc_lat, loc_lon) in LOCATIONS.items():
-        distance = ((lat - loc_lat)**2 + (lon - loc_lon)**2)**0.5
-        distances[loc_name] = distance
+    # Stations within 2 degrees (about 223km); weights below use distances in degrees
+    distances = {loc_name: km_to_degrees(distance)
+                 for loc_name, distance in station_index.within(lat, lon, degrees_to_km(2.0))}
+    
+    # Fetch all nearby locations concurrently under one overall deadline
+    nearby = list(distances)
+    executor = get_weather_executor()
+    futures = {loc_name: executor.submit(fetch_real_weather_data, loc_name, days) for loc_name in nearby}
+    _, not_done = wait(futures.values(), timeout=WEATHER_FANOUT_DEADLINE_SECONDS)
     
     # Get weather data from multiple nearby locations
     weather_datasets = {}
     weights = {}
     total_weight = 0
     
-    for loc_name, distance in distances.items():
-        if distance < 2.0:  # Only use locations within reasonable distance
-            try:
-                weather_data = fetch_real_weather_data(loc_name, days)
-                weather_datasets[loc_name] = weather_data
-                
-                # Weight by inverse distance squared
-                weight = 1.0 / (distance + 0.1) ** 2
-                weights[loc_name] = weight
-                total_weight += weight
-            except Exception as e:
-                print(f"Could not fetch weather for {loc_name}: {e}")
-                continue
+    for loc_name in nearby:  # Keep station order stable regardless of completion order
+        future = futures[loc_name]
+        if future in not_done:
+            print(f"Weather for {loc_name} missed the {WEATHER_FANOUT_DEADLINE_SECONDS:.0f}s deadline, skipping")
+            continue
+        try:
+            weather_data = future.result()
+            weather_datasets[loc_name] = weather_data
+            
+            # Weight by inverse distance squared
+            weight = 1.0 / (distances[loc_name] + 0.1) ** 2
+            weights[loc_name] = weight
+            total_weight += weight
+        except Exception as e:
+            print(f"Could not fetch weather for {loc_name}: {e}")
+            continue
     
     # If no weather data available, use nearest location
     if not weather_datasets:
-        nearest_location = min(distances.items(), key=lambda x: x[1])[0]
+        nearest_location = station_index.nearest(lat, lon)[0][0]
+        if not_done:
+            # Deadline already spent: don't wait on the network again
+            stale = weather_cache.get_stale((nearest_location, days))
+            if stale is not None:
+                return tag_weather_source(stale[0].copy(), 'stale')
+            return tag_weather_source(get_simulated_data(nearest_location, days), 'simulated')
         return fetch_real_weather_data(nearest_location, days)
     
     # Normalize weights
@@ -1223,23 +1886,31 @@ def get_interpolated_weather_data(lat, lon, days=7):
         daily_rainfall *= spatial_variation
         interpolated_rainfall.append(max(0, daily_rainfall))
     
-    return pd.DataFrame({
+    interpolated_weather = pd.DataFrame({
         'date': dates,
         'rainfall': interpolated_rainfall
     })
+    station_sources = {
+        loc_name: data.attrs.get('weather_source', {}).get('source')
+        for loc_name, data in weather_datasets.items()
+    }
+    interpolated_weather.attrs['weather_source'] = {
+        'source': 'interpolated',
+        'stale': any(source == 'stale' for source in station_sources.values()),
+        'stations': station_sources
+    }
+    return interpolated_weather
 
 def calculate_enhanced_transition_zone_factor(lat, lon):
     """Calculate enhanced transition zone factors with better accuracy"""
-    import math
-    
     # Enhanced transition zones with different radii based on geographic features
-    base_transition_radius = 0.12  # About 12-15km
+    base_transition_radius = degrees_to_km(0.12)  # About 13km
     
     total_influence = 0
     weighted_factors = {}
     
-    for loc_name, (loc_lat, loc_lon) in LOCATIONS.items():
-        distance = math.sqrt((lat - loc_lat)**2 + (lon - loc_lon)**2)
+    # Candidates within the widest possible zone (river x1.3, rural x1.15)
+    for loc_name, distance in station_index.within(lat, lon, base_transition_radius * 1.3 * 1.15):
         
         # Dynamic transition radius based on location characteristics
         geo_data = GEOGRAPHIC_DATA.get(loc_name, {})
@@ -1293,6 +1964,109 @@ def calculate_enhanced_transition_zone_factor(lat, lon):
             return filtered_factors
     
     return None
+
+def estimate_coordinate_water_level(geo_data, latest_rainfall, rainfall_3day):
+    """Water level (m) from interpolated geography and rainfall, before noise and the 1.8m floor"""
+    elevation = geo_data['elevation']
+    drainage_quality = geo_data.get('drainage_quality', 'Moderate')
+    distance_to_river = geo_data['distance_to_major_river']
+    urbanization = geo_data.get('urbanization_factor', 0.5)
+
+    # Realistic water level modeling
+    elevation_factor = max(0.3, 1.0 - (elevation / 50.0))
+    drainage_multiplier = {'Poor': 1.4, 'Moderate': 1.1, 'Good': 0.8}.get(drainage_quality, 1.1)
+    river_proximity_factor = max(0.5, 1.0 - (distance_to_river / 20.0))
+    urban_runoff_factor = 1.0 + (urbanization * 0.3)
+
+    base_water_level = (2.8 + elevation_factor * 2.2 + river_proximity_factor * 0.8)
+    return (base_water_level +
+            (latest_rainfall * 0.08 * drainage_multiplier * urban_runoff_factor) +
+            (rainfall_3day * 0.04 * drainage_multiplier))
+
+def classify_coordinate_risk(risk, in_transition_zone):
+    """(status, risk_class) as predict_coordinates assigns them; only outside transition zones is there MINIMAL"""
+    if risk >= 0.85:
+        return 'EXTREME RISK', 'risk-extreme'
+    if risk >= 0.75:
+        return 'CRITICAL RISK', 'risk-critical'
+    if risk >= 0.6:
+        return 'HIGH RISK', 'risk-high'
+    if risk >= 0.4:
+        return 'MODERATE RISK', 'risk-medium'
+    if risk >= 0.2 or in_transition_zone:
+        return 'LOW RISK', 'risk-low'
+    return 'MINIMAL RISK', 'risk-minimal'
+
+def predict_coordinates_from_raster(lat, lon, raster, geo_data):
+    """Coordinate prediction read from the precomputed risk raster
+
+    The coordinate risk is the weighted flood-type risk of the location's geography,
+    so the raster reproduces it up to bilinear interpolation between grid nodes.
+    Rainfall comes from the raster's station-weather layers (IDW as in
+    get_interpolated_weather_data, without the random spatial jitter).
+    """
+    final_risk_score = raster.sample('risk', lat, lon)
+
+    if raster.has_layer('rainfall'):
+        latest_rainfall = raster.sample('rainfall', lat, lon)
+        rainfall_3day = raster.sample('rainfall_3day', lat, lon)
+        weather_source = {'source': 'risk_raster', 'epoch': raster.epoch}
+    else:
+        # No station weather was cached when the raster was built
+        weather_data = get_interpolated_weather_data(lat, lon)
+        latest_rainfall = weather_data['rainfall'].iloc[-1]
+        rainfall_3day = weather_data['rainfall'].tail(3).sum()
+        weather_source = weather_data.attrs.get('weather_source')
+
+    estimated_water_level = max(estimate_coordinate_water_level(geo_data, latest_rainfall, rainfall_3day), 1.8)
+
+    transition_factors = calculate_enhanced_transition_zone_factor(lat, lon)
+    in_transition_zone = bool(transition_factors and len(transition_factors) > 1)
+    status, risk_class = classify_coordinate_risk(final_risk_score, in_transition_zone)
+    coordinate_flood_profile = calculate_flood_risk_profile(None, lat=lat, lon=lon)
+
+    return jsonify({
+        'location': f"Coordinates ({lat:.3f}, {lon:.3f})",
+        'coordinates': {'lat': lat, 'lon': lon},
+        'timestamp': datetime.now().isoformat(),
+        'current_rainfall': float(latest_rainfall),
+        'current_water_level': float(estimated_water_level),
+        'flood_threshold': 5.5,
+        'flood_risk': int(final_risk_score > 0.6),
+        'risk_probability': float(final_risk_score),
+        'confidence': float(max(0.6, 0.9 - geo_data.get('smoothing_applied', 0) * 0.3)),
+        'status': status,
+        'risk_class': risk_class,
+        'weather_source': weather_source,
+        'geographic_factors': {
+            'elevation_m': geo_data['elevation'],
+            'distance_to_river_km': geo_data['distance_to_major_river'],
+            'drainage_quality': geo_data.get('drainage_quality', 'Unknown'),
+            'urbanization_factor': geo_data.get('urbanization_factor', 0.5),
+            'interpolated': True,
+            'in_transition_zone': in_transition_zone,
+            'base_risk_factor': float(geo_data.get('base_risk_factor', 0.5)),
+            'transition_influences': {loc: f"{weight:.3f}" for loc, weight in (transition_factors.items() if transition_factors else [])},
+            'smoothing_applied': geo_data.get('smoothing_applied', 0.0)
+        },
+        'flood_risk_profile': {
+            flood_type: {
+                'risk_percentage': float(profile['risk_percentage']),
+                'severity_level': profile['severity_level'],
+                'flood_degree': profile['flood_degree'],
+                'estimated_depth': profile['estimated_depth'],
+                'description': profile['description'],
+                'typical_damage': profile['typical_damage']
+            } for flood_type, profile in coordinate_flood_profile.items()
+        },
+        'model_info': {
+            'version': '2.0.0',
+            'prediction_method': 'risk_raster',
+            'raster': raster.info()
+        },
+        'note': f'Read from the precomputed risk raster ({raster.resolution:g}° grid); add ?exact=true to recompute'
+    })
+
 @app.route('/api/predict/coordinates/<float:lat>/<float:lon>')
 def predict_coordinates(lat, lon):
     """Get highly accurate flood prediction for arbitrary coordinates using advanced interpolation"""
@@ -1311,33 +2085,28 @@ def predict_coordinates(lat, lon):
             # Very close to a known location, use that location's prediction
             return predict_location(interpolated_data)
         
-        # Generate weather data based on weighted average from nearby locations
-        weather_data = get_interpolated_weather_data(lat, lon)
-        
         # Use interpolated geographic data
         geo_data = interpolated_data['geographic_data']
         
+        # Precomputed raster: a constant-time read instead of re-running the model
+        raster = risk_raster.current
+        if raster is not None and raster.contains(lat, lon) and \
+                request.args.get('exact', '').lower() not in ('1', 'true'):
+            return predict_coordinates_from_raster(lat, lon, raster, geo_data)
+        
+        # Generate weather data based on weighted average from nearby locations
+        weather_data = get_interpolated_weather_data(lat, lon)
+        
         # Calculate enhanced water levels using interpolated factors
         latest_rainfall = weather_data['rainfall'].iloc[-1]
         rainfall_3day = weather_data['rainfall'].tail(3).sum()
         rainfall_7day = weather_data['rainfall'].sum()
         
-        # Enhanced water level calculation
         elevation = geo_data['elevation']
-        drainage_quality = geo_data.get('drainage_quality', 'Moderate')
         distance_to_river = geo_data['distance_to_major_river']
-        urbanization = geo_data.get('urbanization_factor', 0.5)
         
-        # Realistic water level modeling
-        elevation_factor = max(0.3, 1.0 - (elevation / 50.0))
-        drainage_multiplier = {'Poor': 1.4, 'Moderate': 1.1, 'Good': 0.8}.get(drainage_quality, 1.1)
-        river_proximity_factor = max(0.5, 1.0 - (distance_to_river / 20.0))
-        urban_runoff_factor = 1.0 + (urbanization * 0.3)
-        
-        base_water_level = (2.8 + elevation_factor * 2.2 + river_proximity_factor * 0.8)
-        estimated_water_level = (base_water_level + 
-                               (latest_rainfall * 0.08 * drainage_multiplier * urban_runoff_factor) +
-                               (rainfall_3day * 0.04 * drainage_multiplier) +
+        # Enhanced water level calculation
+        estimated_water_level = (estimate_coordinate_water_level(geo_data, latest_rainfall, rainfall_3day) +
                                np.random.normal(0, 0.12))
         estimated_water_level = max(estimated_water_level, 1.8)
         
@@ -1356,15 +2125,13 @@ def predict_coordinates(lat, lon):
             for loc_name, weight in (transition_factors.items() if transition_factors else []):
                 try:
                     # Get prediction for this location with error handling
-                    loc_response = predict_location(loc_name)
-                    if hasattr(loc_response, 'get_json'):
-                        loc_data = loc_response.get_json()
-                        loc_risk = loc_data.get('risk_probability', 0.5)
-                        loc_confidence = loc_data.get('confidence', 0.7)
-                        
-                        blended_risk += loc_risk * weight * loc_confidence
-                        total_weight += weight * loc_confidence
-                        confidence_sum += loc_confidence * weight
+                    loc_data = get_station_prediction(loc_name)
+                    loc_risk = loc_data.get('risk_probability', 0.5)
+                    loc_confidence = loc_data.get('confidence', 0.7)
+                    
+                    blended_risk += loc_risk * weight * loc_confidence
+                    total_weight += weight * loc_confidence
+                    confidence_sum += loc_confidence * weight
                 except Exception as e:
                     print(f"Error getting data for {loc_name}: {e}")
                     # Use fallback calculation for this location
@@ -1425,6 +2192,7 @@ def predict_coordinates(lat, lon):
                     'confidence': float(prediction_confidence),
                     'status': status,
                     'risk_class': risk_class,
+                    'weather_source': weather_data.attrs.get('weather_source'),
                     'geographic_factors': {
                         'elevation_m': geo_data['elevation'],
                         'distance_to_river_km': geo_data['distance_to_major_river'],
@@ -1477,8 +2245,7 @@ def predict_coordinates(lat, lon):
                 ]])
                 
                 # Get ML prediction
-                features_scaled = scaler.transform(features)
-                ml_risk_probability = rf_model.predict_proba(features_scaled)[0, 1]
+                ml_risk_probability = predict_flood_probabilities(features)[0]
                 
                 # Adjust confidence based on interpolation uncertainty
                 interpolation_uncertainty = geo_data.get('smoothing_applied', 0) * 0.3
@@ -1494,18 +2261,16 @@ def predict_coordinates(lat, lon):
                 primary_influence = geo_data.get('primary_influence')
                 if primary_influence and primary_influence in LOCATIONS:
                     try:
-                        primary_response = predict_location(primary_influence)
-                        if hasattr(primary_response, 'get_json'):
-                            primary_data = primary_response.get_json()
-                            primary_risk = primary_data.get('risk_probability', 0.5)
-                            
-                            # Limit deviation from primary location (more restrictive for interpolated)
-                            max_deviation = 0.15  # 15% max deviation
-                            if abs(final_risk_score - primary_risk) > max_deviation:
-                                if final_risk_score > primary_risk:
-                                    final_risk_score = primary_risk + max_deviation
-                                else:
-                                    final_risk_score = primary_risk - max_deviation
+                        primary_data = get_station_prediction(primary_influence)
+                        primary_risk = primary_data.get('risk_probability', 0.5)
+                        
+                        # Limit deviation from primary location (more restrictive for interpolated)
+                        max_deviation = 0.15  # 15% max deviation
+                        if abs(final_risk_score - primary_risk) > max_deviation:
+                            if final_risk_score > primary_risk:
+                                final_risk_score = primary_risk + max_deviation
+                            else:
+                                final_risk_score = primary_risk - max_deviation
                     except:
                         pass  # Continue with ML prediction if primary location fails
                 
@@ -1587,6 +2352,7 @@ def predict_coordinates(lat, lon):
             'confidence': float(prediction_confidence),
             'status': status,
             'risk_class': risk_class,
+            'weather_source': weather_data.attrs.get('weather_source'),
             'geographic_factors': {
                 'elevation_m': geo_data['elevation'],
                 'distance_to_river_km': geo_data['distance_to_major_river'],
@@ -1626,6 +2392,27 @@ def predict_coordinates(lat, lon):
             'coordinates': {'lat': lat, 'lon': lon}
         }), 500
 
+@app.route('/api/tiles/risk/<int:z>/<int:x>/<int:y>.png')
+def get_risk_tile(z, x, y):
+    """Flood-risk heatmap tile (XYZ / Web Mercator) for map overlays"""
+    if not (0 <= z <= RISK_TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'error': f'Invalid tile {z}/{x}/{y} (zoom 0-{RISK_TILE_MAX_ZOOM})'}), 400
+
+    epoch = weather_epoch()
+    etag = f"{epoch}-{risk_tiles.style}-{z}-{x}-{y}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            response = Response(risk_tiles.tile(epoch, z, x, y), mimetype='image/png')
+        except Exception as e:
+            print(f"Tile render error for {z}/{x}/{y}: {e}")
+            return jsonify({'error': f'Tile rendering failed: {str(e)}'}), 500
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = RISK_TILE_MAX_AGE_SECONDS
+    return response
+
 def calculate_weighted_overall_risk(flood_risk_profile):
     """Calculate overall risk as weighted average of individual flood type risks"""
     
@@ -1659,8 +2446,171 @@ def calculate_weighted_overall_risk(flood_risk_profile):
     
     return overall_risk
 
+def calculate_coordinate_overall_risk_grid(lats, lons):
+    """Vectorized calculate_weighted_overall_risk(calculate_flood_risk_profile(None, lat, lon)) over arrays"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    # Coordinate geography estimates from calculate_flood_risk_profile ('Moderate' drainage)
+    elevation = np.maximum(5, 15 - np.abs(lats - 23.5) * 2)
+    river_distance = np.minimum(50, np.abs(lats - 23.5) * 10 + np.abs(lons - 90.0) * 8)
+    urbanization = np.maximum(0.2, 0.8 - (np.abs(lats - 23.68) + np.abs(lons - 90.35)) * 0.3)
+
+    riverine = np.clip(np.maximum(0.01, 1.0 - river_distance / 25.0) * (1.0 - elevation / 40.0) * 0.15, 0.01, 0.15)
+    urban_drainage = np.clip(urbanization * 0.5 * 0.9 * 0.12, 0.01, 0.12)
+    flash = np.clip((1.0 - elevation / 35.0) * 0.4 * 0.18, 0.01, 0.14)
+    tidal = np.clip(0.01 * 0.12, 0.01, 0.10)
+
+    # Flood-type weights from calculate_weighted_overall_risk
+    return riverine * 0.35 + urban_drainage * 0.30 + flash * 0.25 + tidal * 0.10
+
+def cached_station_rainfall(days=7):
+    """{station: (latest, 3-day total) rainfall} for stations in the weather cache; never fetches"""
+    snapshot = {}
+    for location in LOCATIONS:
+        weather_data = weather_cache.peek((location, days))
+        if weather_data is not None and len(weather_data):
+            snapshot[location] = (round(float(weather_data['rainfall'].iloc[-1]), 1),
+                                  round(float(weather_data['rainfall'].tail(3).sum()), 1))
+    return snapshot
+
+def weather_epoch():
+    """Identifier of the cached station weather; changes whenever a station's rainfall does"""
+    snapshot = cached_station_rainfall()
+    if not snapshot:
+        return 'geo'
+    digest = hashlib.sha1(json.dumps(sorted(snapshot.items())).encode()).hexdigest()[:12]
+    return f"w{digest}"
+
+def build_risk_raster_layers(lats, lons):
+    """Risk raster layers over lat/lon grids: weighted coordinate risk plus station rainfall"""
+    layers = {'risk': calculate_coordinate_overall_risk_grid(lats, lons)}
+
+    snapshot = cached_station_rainfall()
+    if snapshot:
+        # Inverse distance squared over stations within 2 degrees, else the nearest
+        # station, as in get_interpolated_weather_data
+        stations = StationIndex({location: LOCATIONS[location] for location in snapshot})
+        distances, indices = stations.query(lats, lons, k=STATION_INTERPOLATION_NEIGHBORS)
+        distances = km_to_degrees(distances)
+        weights = np.where(distances <= 2.0, 1.0 / (distances + 0.1) ** 2, 0.0)
+        weights[weights.sum(axis=1) == 0, 0] = 1.0
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        rainfall = np.array([snapshot[name] for name in stations.names])
+        for column, layer in enumerate(('rainfall', 'rainfall_3day')):
+            layers[layer] = (weights * rainfall[indices, column]).sum(axis=1).reshape(np.shape(lats))
+    return layers
+
+def compute_station_risk(location, geographic_data=None):
+    """Geographic risk, flood-type profile and weighted overall risk for one station"""
+    flood_risk_profile = calculate_flood_risk_profile(location, geographic_data=geographic_data)
+    return MappingProxyType({
+        'geographic_risk': calculate_enhanced_geographic_risk(location, geographic_data),
+        'flood_risk_profile': MappingProxyType({
+            flood_type: MappingProxyType(profile) for flood_type, profile in flood_risk_profile.items()
+        }),
+        'weighted_overall_risk': calculate_weighted_overall_risk(flood_risk_profile)
+    })
+
+def build_station_risk_table(geographic_data=None):
+    """Read-only table of compute_station_risk() for every station in geographic_data (default GEOGRAPHIC_DATA)"""
+    if geographic_data is None:
+        geographic_data = GEOGRAPHIC_DATA
+    return MappingProxyType({location: compute_station_risk(location, geographic_data)
+                             for location in geographic_data})
+
+# These depend only on GEOGRAPHIC_DATA, so they are computed once here (in the
+# gunicorn master when preloading) and rebuilt only by apply_station_changes
+station_risk_lock = threading.Lock()
+station_risk_table = build_station_risk_table()
+station_risk_builds = 1
+station_risk_built_at = datetime.now().isoformat()
+
+# Admin station edits are merged into STATION_OVERRIDES_PATH (flock + rename), and
+# every worker applies a newer file within STATION_OVERRIDES_CHECK_SECONDS and again
+# at import after a restart. Empty keeps an edit in the worker that served it.
+STATION_OVERRIDES_PATH = os.environ.get('STATION_OVERRIDES_PATH', 'data/station_overrides.json')
+STATION_OVERRIDES_CHECK_SECONDS = float(os.environ.get('STATION_OVERRIDES_CHECK_SECONDS', 5))
+station_overrides = StationOverrides(STATION_OVERRIDES_PATH) if STATION_OVERRIDES_PATH else None
+_station_overrides_checked = 0.0
+
+def get_station_risk(location):
+    """Precomputed risk for a station; stations without metadata are computed on demand"""
+    sync_station_overrides()
+    station_risk = station_risk_table.get(location)
+    if station_risk is None:
+        station_risk = compute_station_risk(location)
+    return station_risk
+
+def apply_station_changes(updates):
+    """Apply {location: changes} to GEOGRAPHIC_DATA and the risk table (the only invalidation path)
+    
+    The table is built from a copy first; nothing is swapped in unless the build succeeds.
+    """
+    global station_risk_table, station_risk_builds, station_risk_built_at
+    with station_risk_lock:
+        updated = {location: {**GEOGRAPHIC_DATA.get(location, {}), **changes}
+                   for location, changes in updates.items()}
+        table = build_station_risk_table({**GEOGRAPHIC_DATA, **updated})
+        # Readers keep whichever complete table they already hold
+        GEOGRAPHIC_DATA.update(updated)
+        station_risk_table = table
+        station_risk_builds += 1
+        station_risk_built_at = datetime.now().isoformat()
+
+def update_station_metadata(location, changes):
+    """Validate and apply metadata changes to a station, then share them with the other workers"""
+    errors = validate_station_changes(changes)
+    if errors:
+        raise ValueError(f"Invalid station metadata: {errors}")
+    
+    apply_station_changes({location: changes})
+    if station_overrides is not None:
+        station_overrides.merge(location, changes)
+    return dict(GEOGRAPHIC_DATA[location])
+
+def sync_station_overrides(force=False):
+    """Apply station edits from STATION_OVERRIDES_PATH if the file changed since this worker last looked"""
+    global _station_overrides_checked
+    if station_overrides is None:
+        return False
+    now = time.monotonic()
+    if not force and now - _station_overrides_checked < STATION_OVERRIDES_CHECK_SECONDS:
+        return False
+    _station_overrides_checked = now
+    if not station_overrides.changed():
+        return False
+    
+    station_overrides.loaded_version = station_overrides.version()
+    overrides = {location: changes for location, changes in station_overrides.load().items()
+                 if location in LOCATIONS}
+    try:
+        apply_station_changes(overrides)
+    except Exception as e:
+        print(f"⚠️ Could not apply station overrides from {STATION_OVERRIDES_PATH}: {str(e)}")
+        return False
+    return True
+
+sync_station_overrides(force=True)
+
+def start_background_threads():
+    """Start the weather prefetcher, risk raster job and model watcher in this process (idempotent)"""
+    if WEATHER_PREFETCH_ENABLED:
+        weather_prefetcher.start()
+    if RISK_RASTER_ENABLED:
+        risk_raster.start()
+    model_registry.start()
+
+# Under a preloading gunicorn this module is imported in the master, which must not
+# run threads that forked workers could inherit mid-lock; gunicorn.conf.py turns this
+# off and starts the threads in each worker's post_fork instead
+if os.environ.get('BACKGROUND_THREADS_AT_IMPORT', 'true').lower() == 'true':
+    start_background_threads()
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 10000))  # Render uses port 10000 by default
     debug = os.environ.get('FLASK_ENV') != 'production'
+    warm_history_buffers()
     app.run(debug=debug, host='0.0.0.0', port=port)
@@ -15,6 +15,7 @@ from flask_cors import CORS
 import logging
 import random
 from typing import Dict, List, Tuple, Optional
+from hydrology import simulate_water_levels, water_level_parameters
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -24,6 +25,7 @@ try:
     from sklearn.preprocessing import StandardScaler
     from sklearn.model_selection import train_test_split
     import joblib
+    from model_store import load_artifacts
     ML_AVAILABLE = True
 except ImportError:
     ML_AVAILABLE = False
@@ -43,6 +45,12 @@ feature_cols = ['rainfall_1day', 'rainfall_3day', 'rainfall_7day',
                'water_level_lag1', 'water_level_trend', 'is_monsoon',
                'elevation', 'river_distance', 'geographic_risk']
 
+# Prebuilt artifacts from `python train_models.py --target ml-production`;
+# MODEL_SERVE_MODE=serve refuses to fall back to training at startup
+ML_MODEL_DIR = os.environ.get('ML_MODEL_DIR', 'models/ml_production')
+MODEL_SERVE_MODE = os.environ.get('MODEL_SERVE_MODE', 'train-if-missing')
+model_version = None
+
 # Bangladesh flood monitoring locations with precise coordinates
 LOCATIONS = {
     'Dhaka': (23.8103, 90.4125),
@@ -256,6 +264,28 @@ def train_ml_model():
         logger.error(f"Error training ML model: {e}")
         return False
 
+def load_ml_model() -> bool:
+    """Load prebuilt model artifacts from ML_MODEL_DIR"""
+    global rf_model, scaler, model_version
+    
+    if not ML_AVAILABLE:
+        return False
+    
+    try:
+        artifacts = load_artifacts(ML_MODEL_DIR, os.environ.get('MODEL_VERSION') or None)
+    except Exception as e:
+        logger.info(f"No prebuilt model in {ML_MODEL_DIR}: {e}")
+        return False
+    
+    if list(artifacts.feature_cols) != feature_cols:
+        logger.warning(f"Model in {artifacts.path} has unexpected features {artifacts.feature_cols}")
+        return False
+    
+    rf_model, scaler = artifacts.rf_model, artifacts.scaler
+    model_version = artifacts.metadata.get('version')
+    logger.info(f"Loaded model version {model_version} from {artifacts.path}")
+    return True
+
 def generate_realistic_weather_data(location: str, days: int = 7) -> pd.DataFrame:
     """Generate realistic weather data for a location"""
     
@@ -343,42 +373,16 @@ def calculate_water_levels(location: str, weather_data: pd.DataFrame) -> List[fl
     """Calculate realistic water levels based on multiple factors"""
     geo_data = GEOGRAPHIC_DATA.get(location, {})
     
-    # Base parameters
-    elevation = geo_data.get('elevation', 10)
-    drainage_quality = geo_data.get('drainage_quality', 'Moderate')
-    distance_to_river = geo_data.get('distance_to_major_river', 5)
-    urbanization = geo_data.get('urbanization_factor', 0.5)
-    
-    # Calculate modifiers
-    elevation_factor = max(0.3, 1.0 - (elevation / 50.0))
-    drainage_multiplier = {'Poor': 1.4, 'Moderate': 1.1, 'Good': 0.8}.get(drainage_quality, 1.1)
-    river_proximity_factor = max(0.5, 1.0 - (distance_to_river / 20.0))
-    urban_runoff_factor = 1.0 + (urbanization * 0.3)
-    
-    # Base water level
-    base_water_level = 2.8 + elevation_factor * 2.2 + river_proximity_factor * 0.8
-    
-    water_levels = []
-    for i, rainfall in enumerate(weather_data['rainfall']):
-        # Cumulative effect of recent rainfall
-        recent_rain_effect = 0
-        for j in range(max(0, i-2), i+1):  # 3-day influence
-            days_ago = i - j
-            decay_factor = 0.7 ** days_ago
-            if j < len(weather_data):
-                recent_rain_effect += weather_data['rainfall'].iloc[j] * decay_factor
-        
-        # Daily water level
-        daily_level = (
-            base_water_level +
-            (rainfall * 0.08 * drainage_multiplier * urban_runoff_factor) +
-            (recent_rain_effect * 0.04 * drainage_multiplier) +
-            np.random.normal(0, 0.12)
-        )
-        
-        water_levels.append(max(daily_level, 1.8))
+    # Base level, drainage and urban runoff modifiers for this station
+    base_water_level, drainage_multiplier, urban_runoff_factor = water_level_parameters(geo_data)
+    
+    # 3-day decaying rainfall memory, computed in one vectorized pass
+    water_levels = simulate_water_levels(
+        weather_data['rainfall'].to_numpy(dtype=float),
+        base_water_level, drainage_multiplier, urban_runoff_factor
+    )
     
-    return water_levels
+    return water_levels.tolist()
 
 def get_ml_prediction(location: str, weather_data: pd.DataFrame, water_levels: List[float]) -> Dict:
     """Get ML-based flood prediction"""
@@ -716,7 +720,8 @@ def get_status():
             'available': rf_model is not None,
             'type': 'RandomForestClassifier' if rf_model else None,
             'features': len(feature_cols) if rf_model else 0,
-            'training_samples': 2500 if rf_model else 0
+            'training_samples': 2500 if rf_model else 0,
+            'version': model_version if rf_model else None
         },
         'locations_monitored': len(LOCATIONS),
         'last_model_update': datetime.now().isoformat(),
@@ -726,11 +731,16 @@ def get_status():
 
 # Initialize the application
 def initialize_app():
-    """Initialize the application and train ML model"""
+    """Initialize the application: load the prebuilt ML model, or train one if allowed"""
     logger.info("🚀 Starting AI Flood Prediction System - Full ML Version")
     logger.info(f"ML libraries available: {ML_AVAILABLE}")
     
-    if ML_AVAILABLE:
+    if ML_AVAILABLE and load_ml_model():
+        logger.info("✅ ML model loaded from prebuilt artifacts")
+    elif ML_AVAILABLE and MODEL_SERVE_MODE == 'serve':
+        raise RuntimeError(f"MODEL_SERVE_MODE=serve refuses to train in-process; run "
+                           f"`python train_models.py --target ml-production` to build {ML_MODEL_DIR}")
+    elif ML_AVAILABLE:
         logger.info("Training ML model...")
         success = train_ml_model()
         if success:
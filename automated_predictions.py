@@ -16,6 +16,9 @@ from datetime import datetime, timedelta
 import requests
 import logging
 
+from prediction_archive import PredictionArchive
+from prediction_store import PredictionStore, normalize_record
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,6 +46,16 @@ FLOOD_THRESHOLDS = {
     'Chittagong': 3.5
 }
 
+# Predictions go to the same store as the web app: 'sqlite' (default) or 'csv'
+PREDICTION_STORE = os.environ.get('PREDICTION_STORE', 'sqlite')
+PREDICTION_DB_PATH = os.environ.get('PREDICTION_DB_PATH', 'logs/predictions.db')
+PREDICTION_ARCHIVE_DIR = os.environ.get('PREDICTION_ARCHIVE_DIR', 'logs/archive')
+PREDICTION_ARCHIVE_COMPACT_PARTS = int(os.environ.get('PREDICTION_ARCHIVE_COMPACT_PARTS', 8))
+# One store (one SQLite connection) and one archive for the whole run
+prediction_store = PredictionStore(PREDICTION_DB_PATH) if PREDICTION_STORE == 'sqlite' else None
+prediction_archive = (PredictionArchive(PREDICTION_ARCHIVE_DIR, compact_parts=PREDICTION_ARCHIVE_COMPACT_PARTS)
+                      if PREDICTION_ARCHIVE_DIR else None)
+
 def load_models():
     """Load trained models"""
     try:
@@ -178,7 +191,7 @@ def predict_flood_risk(rainfall_data, xgb_model, lstm_model, scaler, flood_thres
         return None, f"Error in prediction: {str(e)}"
 
 def log_prediction(location, rainfall_data, predictions, log_file='logs/flood_predictions.csv'):
-    """Log prediction results to CSV"""
+    """Log prediction results to the prediction store (or CSV)"""
     log_entry = {
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'location': location,
@@ -195,6 +208,15 @@ def log_prediction(location, rainfall_data, predictions, log_file='logs/flood_pr
             log_entry[f'{model_name}_prediction'] = pred['prediction']
             log_entry[f'{model_name}_confidence'] = pred['confidence']
     
+    if prediction_archive is not None:
+        prediction_archive.append([normalize_record(log_entry)])
+    
+    if prediction_store is not None:
+        # Per-model columns are kept in the row's JSON details; ensemble_* fill the shared columns
+        prediction_store.insert(log_entry, source='automated')
+        logging.info(f"📝 Prediction logged for {location}")
+        return
+    
     # Create DataFrame
     log_df = pd.DataFrame([log_entry])
     
@@ -269,6 +291,9 @@ def main():
         except Exception as e:
             logging.error(f"❌ Error processing {location}: {str(e)}")
     
+    if prediction_store is not None:
+        prediction_store.close()
+    
     logging.info(f"✅ Automated predictions completed!")
     logging.info(f"   Locations processed: {total_locations}")
     logging.info(f"   Alerts sent: {alerts_sent}")
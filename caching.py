@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+In-process caching primitives shared by the flood prediction API
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+class TTLCache:
+    """Thread-safe cache with per-entry expiry and size-bounded LRU eviction.
+
+    Expired entries are kept for a further ``max_stale_seconds`` so callers can
+    fall back to the last known good value with ``get_stale``. Every lookup that
+    ``get`` cannot answer fresh is a miss; ``stale_hits`` counts the misses that
+    were then served stale, so ``hit_rate`` is the fresh-hit rate.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 256,
+                 max_stale_seconds: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.max_stale_seconds = max(0.0, float(max_stale_seconds))
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._expired = set()  # keys whose expiry has been counted
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None (a miss) if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            age = self._clock() - stored_at
+            if age >= self.ttl_seconds:
+                if key not in self._expired:
+                    # Count each entry's expiry once, however often it is looked up stale
+                    self.expirations += 1
+                    self._expired.add(key)
+                if age >= self.ttl_seconds + self.max_stale_seconds:
+                    self._delete(key)
+                # Still a miss inside the stale window; get_stale counts it as a stale hit if served
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) even if expired, as long as it is inside the stale window"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            age = self._clock() - stored_at
+            if age >= self.ttl_seconds + self.max_stale_seconds:
+                self._delete(key)
+                return None
+
+            if age >= self.ttl_seconds:
+                self.stale_hits += 1
+            return value, age
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Like get_stale without counting a lookup or evicting; for background observers"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry[0] >= self.ttl_seconds + self.max_stale_seconds:
+                return None
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, age_seconds: float = 0.0) -> None:
+        """Store value under key, evicting the least recently used entries if full
+
+        ``age_seconds`` backdates a value that was produced earlier (e.g. by another process).
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() - max(0.0, age_seconds), value)
+            self._entries.move_to_end(key)
+            self._expired.discard(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._expired.discard(evicted)
+                self.evictions += 1
+
+    def _delete(self, key: Hashable) -> None:
+        del self._entries[key]
+        self._expired.discard(key)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._expired.clear()
+            else:
+                self._entries.pop(key, None)
+                self._expired.discard(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters suitable for the /api/status payload"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'ttl_seconds': self.ttl_seconds,
+                'max_stale_seconds': self.max_stale_seconds,
+                'max_entries': self.max_entries,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale_hits': self.stale_hits,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class _Flight:
+    """One in-progress call that followers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is still running block until it finishes and receive the same result (or
+    exception).
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                is_leader = True
+                self.executions += 1
+            else:
+                is_leader = False
+                self.coalesced += 1
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights)
+            }
+
+
+class QuantizedMemo:
+    """LRU memo for a row-wise function of feature vectors.
+
+    Rows are snapped to a grid of ``quantum`` and the function is evaluated on
+    the snapped row, so every input in a grid cell gets the same answer no
+    matter which one arrived first. Repeats inside a cell are served without
+    calling the function at all.
+    """
+
+    def __init__(self, quantum: float = 0.01, max_entries: int = 4096):
+        if quantum <= 0:
+            raise ValueError("quantum must be positive")
+        self.quantum = float(quantum)
+        self._cache = TTLCache(ttl_seconds=float('inf'), max_entries=max_entries)
+
+    def quantize(self, rows) -> np.ndarray:
+        """Grid cell index of every row, as int64"""
+        return np.round(np.asarray(rows, dtype=np.float64) / self.quantum).astype(np.int64)
+
+    def lookup(self, rows, compute_fn: Callable[[np.ndarray], np.ndarray],
+               namespace: Hashable = None) -> np.ndarray:
+        """compute_fn(snapped_rows) for every row, reusing remembered cells.
+
+        ``namespace`` separates results of different functions (e.g. model versions).
+        """
+        cells = self.quantize(np.atleast_2d(rows))
+        results = np.empty(len(cells), dtype=np.float64)
+        missing = {}  # cell key -> row positions needing it
+
+        for i, cell in enumerate(cells):
+            key = (namespace, cell.tobytes())
+            value = self._cache.get(key)
+            if value is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                results[i] = value
+
+        if missing:
+            first_rows = [positions[0] for positions in missing.values()]
+            values = np.asarray(compute_fn(cells[first_rows] * self.quantum), dtype=np.float64)
+            for (key, positions), value in zip(missing.items(), values):
+                results[positions] = value
+                self._cache.set(key, float(value))
+        return results
+
+    def invalidate(self) -> None:
+        self._cache.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        cache_stats = self._cache.stats()
+        return {
+            'quantum': self.quantum,
+            'max_entries': cache_stats['max_entries'],
+            'size': cache_stats['size'],
+            'hits': cache_stats['hits'],
+            'misses': cache_stats['misses'],
+            'evictions': cache_stats['evictions'],
+            'hit_rate': cache_stats['hit_rate']
+        }
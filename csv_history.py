@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Tail-only history reads from the CSV prediction log.
+
+``CsvHistoryIndex`` keeps, per location, the byte offsets of its most recent
+rows in a small sidecar file (``<log>.idx``). Reading the last N rows for a
+station is N seeks plus N short reads, however large the log is.
+
+The index only ever scans bytes it has not seen: rows appended since the last
+look are read forward from the indexed size (the background writer does this
+under its flock right after each batch), and rows older than the index are
+found by reading the file backward in blocks, stopping as soon as enough rows
+for the station are found. A log that is replaced, shrinks or changes header
+resets the index.
+
+For each location the index holds every row offset in ``[floor, size)``;
+anything below ``floor`` has not been scanned for that location yet.
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def iter_lines_backward(f, end: int, start: int = 0,
+                        block_size: int = 65536) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) for the lines in [start, end), last line first
+
+    ``start`` and ``end`` must be line boundaries.
+    """
+    pos = end
+    tail = b''
+    while pos > start:
+        size = min(block_size, pos - start)
+        pos -= size
+        f.seek(pos)
+        buf = f.read(size) + tail
+        lines = buf.split(b'\n')
+        # lines[0] may continue in the previous block; the others follow a newline
+        tail = lines[0]
+        offsets = []
+        offset = pos + len(lines[0]) + 1
+        for line in lines[1:]:
+            offsets.append(offset)
+            offset += len(line) + 1
+        for offset, line in zip(reversed(offsets), reversed(lines[1:])):
+            if line:
+                yield offset, line
+    if tail:
+        yield start, tail
+
+
+def _parse(line: bytes) -> List[str]:
+    return next(csv.reader([line.decode('utf-8').rstrip('\r\n')]), [])
+
+
+def _complete_size(f, size: int, block_size: int = 65536) -> int:
+    """Offset just past the last newline (a concurrent append may be half written)"""
+    pos = size
+    while pos > 0:
+        start = max(0, pos - block_size)
+        f.seek(start)
+        newline = f.read(pos - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        pos = start
+    return 0
+
+
+class CsvHistoryIndex:
+    """Per-location recent-row offsets for an append-only CSV log"""
+
+    def __init__(self, path: str, keep: int = 64, index_path: Optional[str] = None,
+                 locations: Iterable[str] = ()):
+        self.path = path
+        self.keep = max(1, int(keep))
+        self.index_path = index_path or path + '.idx'
+        # Known stations are indexed even with no rows yet, so an empty history is not rescanned
+        self.locations = frozenset(locations)
+        self._lock = threading.Lock()
+        self._index = None
+        self.resets = 0
+        self.backward_scans = 0
+
+    def _load_sidecar(self) -> Optional[Dict]:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_sidecar(self) -> None:
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._index, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save history index {self.index_path}: {e}")
+
+    @staticmethod
+    def _matches(index: Optional[Dict], stat, columns: List[str]) -> bool:
+        return (index is not None and index.get('inode') == stat.st_ino
+                and index.get('columns') == columns and index.get('size', 0) <= stat.st_size)
+
+    def _reset(self) -> None:
+        self._index = None
+        try:
+            os.remove(self.index_path)
+        except OSError:
+            pass
+        self.resets += 1
+
+    def _refresh_locked(self, f) -> bool:
+        """Bring the in-memory index up to the end of the log; False if the log has no header yet"""
+        stat = os.fstat(f.fileno())
+        f.seek(0)
+        header = f.readline()
+        if not header.endswith(b'\n'):
+            self._index = None
+            return False
+        columns = _parse(header)
+        if 'location' not in columns:
+            self._index = None
+            return False
+
+        changed = False
+        if not self._matches(self._index, stat, columns):
+            sidecar = self._load_sidecar()
+            if self._matches(sidecar, stat, columns):
+                self._index = sidecar
+            else:
+                # Start at the current end; older rows are found backward on demand
+                end = max(_complete_size(f, stat.st_size), len(header))
+                self._index = {'inode': stat.st_ino, 'columns': columns, 'header_end': len(header),
+                               'base': end, 'size': end, 'locations': {}}
+                changed = True
+
+        index = self._index
+        if stat.st_size > index['size']:
+            f.seek(index['size'])
+            data = f.read(stat.st_size - index['size'])
+            complete = data.rfind(b'\n') + 1
+            location_column = columns.index('location')
+            offset = index['size']
+            for line in data[:complete].split(b'\n')[:-1]:
+                row = _parse(line) if line else []
+                if len(row) > location_column:
+                    entry = self._entry(row[location_column])
+                    entry['offsets'].append(offset)
+                    self._trim(entry, self.keep)
+                offset += len(line) + 1
+            index['size'] += complete
+            changed = changed or complete > 0
+
+        if changed:
+            self._save_sidecar()
+        return True
+
+    def _entry(self, location: str) -> Dict:
+        locations = self._index['locations']
+        if location not in locations:
+            locations[location] = self._new_entry()
+        return locations[location]
+
+    def _new_entry(self) -> Dict:
+        return {'offsets': [], 'floor': self._index['base']}
+
+    @staticmethod
+    def _trim(entry: Dict, keep: int) -> None:
+        if len(entry['offsets']) > keep:
+            del entry['offsets'][:-keep]
+            entry['floor'] = entry['offsets'][0]
+
+    def _scan_older(self, f, location: str, entry: Dict, wanted: int) -> None:
+        """Walk backward from the entry's floor until it has ``wanted`` rows or reaches the header
+
+        Known locations always join the index (an empty one with its floor at the
+        header, so the scan is not repeated); any other name joins only once it has
+        rows, so lookups of arbitrary names do not grow it.
+        """
+        location_column = self._index['columns'].index('location')
+        floor = self._index['header_end']
+        found = []
+        self.backward_scans += 1
+        for offset, line in iter_lines_backward(f, entry['floor'], start=self._index['header_end']):
+            row = _parse(line)
+            if len(row) > location_column and row[location_column] == location:
+                found.append(offset)
+                if len(entry['offsets']) + len(found) >= wanted:
+                    floor = offset
+                    break
+        entry['offsets'][:0] = reversed(found)
+        entry['floor'] = floor
+        self._trim(entry, max(self.keep, wanted))
+        if entry['offsets'] or location in self.locations:
+            self._index['locations'][location] = entry
+            self._save_sidecar()
+
+    def refresh(self) -> None:
+        """Index rows appended since the last call (the log writer calls this after each batch)"""
+        with self._lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    self._refresh_locked(f)
+            except FileNotFoundError:
+                self._index = None
+
+    def history(self, location: str, limit: int = 30) -> List[Dict[str, str]]:
+        """The last ``limit`` rows for a location as dicts of strings, oldest first"""
+        with self._lock:
+            try:
+                f = open(self.path, 'rb')
+            except FileNotFoundError:
+                self._index = None
+                return []
+            with f:
+                for _ in range(2):
+                    if not self._refresh_locked(f):
+                        return []
+                    entry = self._index['locations'].get(location) or self._new_entry()
+                    if len(entry['offsets']) < limit and entry['floor'] > self._index['header_end']:
+                        self._scan_older(f, location, entry, limit)
+
+                    columns = self._index['columns']
+                    location_column = columns.index('location')
+                    rows = []
+                    for offset in entry['offsets'][-limit:]:
+                        f.seek(offset)
+                        row = _parse(f.readline())
+                        if len(row) <= location_column or row[location_column] != location:
+                            break
+                        rows.append(dict(zip(columns, row)))
+                    else:
+                        return rows
+                    # The log was rewritten underneath the index: rebuild and read again
+                    logger.warning(f"History index for {self.path} is stale; rebuilding")
+                    self._reset()
+                return []
+
+    def stats(self) -> Dict[str, object]:
+        index = self._index
+        return {
+            'path': self.path,
+            'index_path': self.index_path,
+            'indexed_bytes': index['size'] if index else 0,
+            'locations': len(index['locations']) if index else 0,
+            'keep': self.keep,
+            'backward_scans': self.backward_scans,
+            'resets': self.resets
+        }
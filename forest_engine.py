@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Flattened NumPy evaluator for trained scikit-learn RandomForestClassifier models.
+
+All trees are exported into one set of flat node arrays and every tree is
+walked at once with vectorized gathers, so scoring a single row costs a few
+dozen small NumPy operations instead of sklearn's per-call validation and
+joblib dispatch. Probabilities are identical to ``predict_proba``.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# On-disk layout written by FlatForest.save: one raw .npy file per node array
+# plus a small JSON header, so the arrays can be memory-mapped on load
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'leaf_proba', 'roots')
+FOREST_HEADER = 'forest.json'
+
+
+class FlatForest:
+    """A random forest stored as flat node arrays.
+
+    Leaves point to themselves, so walking every tree for ``max_depth`` steps
+    lands each row on its leaf without per-tree bookkeeping.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, leaf_proba: np.ndarray, roots: np.ndarray,
+                 max_depth: int, n_features: int, input_dtype=np.float32,
+                 classes: Optional[np.ndarray] = None, raw_features: bool = False):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.input_dtype = np.dtype(input_dtype)
+        self.classes = classes if classes is not None else np.arange(leaf_proba.shape[1])
+        # True once a StandardScaler has been folded into the thresholds
+        self.raw_features = bool(raw_features)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'FlatForest':
+        """Export a fitted RandomForestClassifier (single output) into flat arrays"""
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("FlatForest supports single-output forests only")
+
+        n_classes = int(forest.n_classes_)
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves; their split test is irrelevant
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = np.where(is_leaf, 0.0, tree.threshold)
+
+            features.append(feature.astype(np.intp))
+            thresholds.append(threshold.astype(np.float64))
+            lefts.append(left.astype(np.intp))
+            rights.append(right.astype(np.intp))
+            # DecisionTreeClassifier.predict_proba returns tree_.value at the leaf
+            probas.append(np.asarray(tree.value[:, 0, :n_classes], dtype=np.float64))
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            leaf_proba=np.concatenate(probas),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+            classes=np.asarray(forest.classes_)
+        )
+
+    def save(self, directory: str) -> None:
+        """Write the node arrays as .npy files; the header is written last and marks completion"""
+        os.makedirs(directory, exist_ok=True)
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+
+        header = {
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'input_dtype': self.input_dtype.name,
+            'classes': np.asarray(self.classes).tolist(),
+            'raw_features': self.raw_features
+        }
+        with open(os.path.join(directory, FOREST_HEADER), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'FlatForest':
+        """Open a saved forest; with mmap_mode='r' the arrays stay in the shared page cache"""
+        with open(os.path.join(directory, FOREST_HEADER)) as f:
+            header = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in FOREST_ARRAYS
+        }
+        return cls(
+            max_depth=header['max_depth'],
+            n_features=header['n_features'],
+            input_dtype=header['input_dtype'],
+            classes=np.asarray(header['classes']),
+            raw_features=header.get('raw_features', False),
+            **arrays
+        )
+
+    def fold_scaler(self, mean, scale) -> 'FlatForest':
+        """Return a copy whose thresholds apply to unscaled features.
+
+        sklearn tests ``float32((x - mean) / scale) <= t``. That predicate is
+        monotone in x, so for every split there is a largest float64 x for
+        which it holds; using that value as the raw-space threshold gives the
+        same branch for every finite input, with no scaler call at predict time.
+        """
+        mean = np.zeros(self.n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(self.n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        node_mean = mean[self.feature]
+        node_scale = scale[self.feature]
+        node_threshold = self.threshold
+
+        def split_holds(x):
+            # Probes near +-inf overflow float32 by design
+            with np.errstate(over='ignore', invalid='ignore'):
+                return ((x - node_mean) / node_scale).astype(self.input_dtype) <= node_threshold
+
+        # Bisect over the ordered bit patterns of float64 between -inf and +inf
+        low = _ordered_key(np.full(self.n_nodes, -np.inf))
+        high = _ordered_key(np.full(self.n_nodes, np.inf))
+        while True:
+            gap = high.view(np.uint64) - low.view(np.uint64)
+            active = gap > 1
+            if not active.any():
+                break
+            middle = low + (gap >> np.uint64(1)).astype(np.int64)
+            holds = split_holds(_from_ordered_key(middle))
+            low = np.where(active & holds, middle, low)
+            high = np.where(active & ~holds, middle, high)
+
+        return FlatForest(
+            feature=self.feature,
+            threshold=_from_ordered_key(low),
+            left=self.left,
+            right=self.right,
+            leaf_proba=self.leaf_proba,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            input_dtype=np.float64,
+            classes=self.classes,
+            raw_features=True
+        )
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index for every (row, tree) pair, shape (n_rows, n_trees)"""
+        # sklearn evaluates splits on float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, shape (n_rows, n_classes), matching RandomForestClassifier"""
+        leaves = self.apply(X)
+        # Sum tree by tree (axis 0 of a C-ordered array is accumulated sequentially),
+        # the same order sklearn adds each estimator's prediction in
+        proba = self.leaf_proba[leaves.T].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict_positive(self, X) -> np.ndarray:
+        """Probability of the positive (last) class for every row"""
+        return self.predict_proba(X)[:, -1]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'engine': 'flat',
+            'trees': self.n_trees,
+            'nodes': self.n_nodes,
+            'max_depth': self.max_depth,
+            'features': self.n_features,
+            'input_dtype': str(self.input_dtype),
+            'scaler_folded': self.raw_features,
+            'memory_mapped': isinstance(self.left, np.memmap)
+        }
+
+
+def _ordered_key(values: np.ndarray) -> np.ndarray:
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, np.iinfo(np.int64).min - bits, bits)
+
+
+def _from_ordered_key(keys: np.ndarray) -> np.ndarray:
+    bits = np.where(keys < 0, np.iinfo(np.int64).min - keys, keys)
+    return bits.view(np.float64)
+
+
+def compile_forest(forest, scaler=None) -> FlatForest:
+    """Load-time compilation: flatten the forest and fold the StandardScaler into its thresholds"""
+    flat_forest = FlatForest.from_sklearn(forest)
+    if scaler is None:
+        return flat_forest
+    return flat_forest.fold_scaler(getattr(scaler, 'mean_', None), getattr(scaler, 'scale_', None))
+
+
+def max_probability_difference(reference_proba, candidate_proba) -> float:
+    """Largest absolute difference between two probability matrices"""
+    return float(np.max(np.abs(np.asarray(reference_proba) - np.asarray(candidate_proba))))
+
+
+def verify_flat_forest(forest, flat_forest: FlatForest, X, tolerance: float = 0.0,
+                       scaler=None) -> bool:
+    """Check the flat evaluator reproduces ``forest.predict_proba`` on sample rows.
+
+    For a compiled forest pass the scaler: X is then raw features, scaled only
+    for the sklearn reference.
+    """
+    reference = forest.predict_proba(scaler.transform(X) if scaler is not None else X)
+    difference = max_probability_difference(reference, flat_forest.predict_proba(X))
+    if difference > tolerance:
+        logger.warning(f"Flat forest disagrees with sklearn by {difference:.3g}")
+        return False
+    return True
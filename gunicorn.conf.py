@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings (picked up automatically from the working directory).
+
+With preloading, app.py (models, scaler, flattened forest, station tables and
+the pandas/sklearn stack) is imported once in the master and every worker
+inherits it copy-on-write instead of loading its own copy.
+"""
+
+import gc
+import os
+import sys
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if preload_app:
+    # Collector passes touch every object header; keep them from running in the
+    # master while the app is imported (see the gc.freeze() docs)
+    gc.disable()
+    # No background threads in the master: a worker forked while one of them holds
+    # a lock (weather cache, HTTP session, single-flight) would deadlock on it.
+    # post_fork starts them in each worker.
+    os.environ['BACKGROUND_THREADS_AT_IMPORT'] = 'false'
+
+
+def pre_fork(server, worker):
+    # Park everything allocated so far in the permanent generation, so a worker's
+    # garbage collections never write to (and un-share) the inherited pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
+
+    # With preload the app was imported in the master without its threads: start
+    # the weather prefetcher, the model directory watcher and the risk raster job
+    # here, in each worker
+    app_module = sys.modules.get('app')
+    if app_module is None:
+        return
+    app_module.start_background_threads()
+    # Each worker serves recent history from its own buffers
+    if hasattr(app_module, 'warm_history_buffers'):
+        app_module.warm_history_buffers()
+
+
+def worker_exit(server, worker):
+    # Write out predictions still queued in this worker before it goes away
+    app_module = sys.modules.get('app')
+    if app_module is not None and hasattr(app_module, 'prediction_log'):
+        app_module.prediction_log.close()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+In-memory per-location ring buffers of recent prediction history.
+
+Each worker keeps the last ``capacity`` history points per station in a
+fixed-size NumPy structured array, so the dashboard's "last 30 points" read
+is a slice of memory instead of a disk query. Buffers are filled from disk
+(``load_fn``) on first use or when warmed at worker start, updated as the
+worker logs predictions, and re-read from disk every ``max_age_seconds`` to
+pick up rows logged by sibling workers. Requests for more points than a
+buffer holds go straight to disk.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DTYPE = np.dtype([
+    ('date', 'U19'),
+    ('rainfall', 'f8'),
+    ('water_level', 'f8'),
+    ('prediction', 'i8'),
+    ('probability', 'f8')
+])
+
+
+class RingBuffer:
+    """Fixed-capacity array that overwrites its oldest row when full"""
+
+    def __init__(self, capacity: int, dtype: np.dtype = HISTORY_DTYPE):
+        self.capacity = max(1, int(capacity))
+        self.data = np.zeros(self.capacity, dtype=dtype)
+        self.start = 0
+        self.size = 0
+
+    def append(self, row: tuple) -> None:
+        if self.size < self.capacity:
+            self.data[(self.start + self.size) % self.capacity] = row
+            self.size += 1
+        else:
+            self.data[self.start] = row
+            self.start = (self.start + 1) % self.capacity
+
+    def extend(self, rows: Iterable[tuple]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def last(self, n: int) -> np.ndarray:
+        """The newest ``n`` rows, oldest first"""
+        n = max(0, min(int(n), self.size))
+        return self.data[(self.start + self.size - n + np.arange(n)) % self.capacity]
+
+
+def _to_row(point: Dict) -> tuple:
+    return (
+        '' if point.get('date') is None else str(point['date']),
+        float(point.get('rainfall') or 0),
+        float(point.get('water_level') or 0),
+        int(point.get('prediction') or 0),
+        float(point.get('probability') or 0)
+    )
+
+
+def _to_point(row) -> Dict:
+    return {
+        'date': str(row['date']) or None,
+        'rainfall': float(row['rainfall']),
+        'water_level': float(row['water_level']),
+        'prediction': int(row['prediction']),
+        'probability': float(row['probability'])
+    }
+
+
+class RecentHistory:
+    """Ring-buffered history per location in front of a disk ``load_fn(location, limit)``"""
+
+    def __init__(self, load_fn: Callable[[str, int], List[Dict]], capacity: int = 64,
+                 max_age_seconds: float = 30.0):
+        self.load_fn = load_fn
+        self.capacity = max(1, int(capacity))
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+
+        self.hits = 0
+        self.disk_reads = 0
+        self.fills = 0
+
+        # _lock guards the dicts below and is never held across load_fn; each
+        # location has its own fill lock, so a slow disk read for one station
+        # does not hold up history reads for the others
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._filled_at = {}
+        self._fill_locks = {}
+        self._pending = {}  # location -> points appended while its fill was reading disk
+
+    def _fill(self, location: str) -> RingBuffer:
+        """Read a location from disk (outside _lock) and swap its new buffer in"""
+        with self._lock:
+            fill_lock = self._fill_locks.setdefault(location, threading.Lock())
+        with fill_lock:
+            with self._lock:
+                # Another request may have filled it while this one waited
+                if self._fresh(location):
+                    return self._buffers[location]
+                self._pending[location] = []
+            try:
+                points = self.load_fn(location, self.capacity)
+                buffer = RingBuffer(self.capacity)
+                buffer.extend(_to_row(point) for point in points)
+            except BaseException:
+                with self._lock:
+                    self._pending.pop(location, None)
+                raise
+            with self._lock:
+                buffer.extend(self._pending.pop(location))
+                self._buffers[location] = buffer
+                self._filled_at[location] = time.monotonic()
+                self.fills += 1
+            return buffer
+
+    def _fresh(self, location: str) -> bool:
+        if location not in self._buffers:
+            return False
+        return not self.max_age_seconds or \
+            time.monotonic() - self._filled_at[location] < self.max_age_seconds
+
+    def warm(self, locations: Iterable[str]) -> None:
+        """Fill buffers up front (at worker start) so first requests do not touch disk"""
+        for location in locations:
+            try:
+                self._fill(location)
+            except Exception as e:
+                logger.warning(f"Could not warm history for {location}: {e}")
+
+    def append(self, location: str, point: Dict) -> None:
+        """Record a point this worker just logged; unloaded stations load it from disk later"""
+        with self._lock:
+            pending = self._pending.get(location)
+            if pending is not None:
+                pending.append(_to_row(point))
+            buffer = self._buffers.get(location)
+            if buffer is not None:
+                buffer.append(_to_row(point))
+
+    def latest(self, location: str, limit: int = 30) -> List[Dict]:
+        """The last ``limit`` points, oldest first
+
+        A buffer is filled with up to ``capacity`` rows, so one holding fewer
+        than ``limit`` already has the station's whole history.
+        """
+        if limit > self.capacity:
+            self.disk_reads += 1
+            return self.load_fn(location, limit)
+        with self._lock:
+            if self._fresh(location):
+                self.hits += 1
+                return [_to_point(row) for row in self._buffers[location].last(limit)]
+
+        buffer = self._fill(location)
+        with self._lock:
+            return [_to_point(row) for row in buffer.last(limit)]
+
+    def invalidate(self, location: Optional[str] = None) -> None:
+        with self._lock:
+            for name in ([location] if location is not None else list(self._buffers)):
+                self._buffers.pop(name, None)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'capacity': self.capacity,
+            'locations': len(self._buffers),
+            'max_age_seconds': self.max_age_seconds,
+            'hits': self.hits,
+            'disk_reads': self.disk_reads,
+            'fills': self.fills
+        }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Shared keep-alive HTTP session for outbound API calls (OpenWeatherMap)
+"""
+
+import os
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool and retry configuration
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', 0.3))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_size: int = HTTP_POOL_SIZE, max_retries: int = HTTP_MAX_RETRIES,
+                  backoff_factor: float = HTTP_RETRY_BACKOFF) -> requests.Session:
+    """Create a session with a bounded connection pool and retry/backoff policy
+
+    Failed connects and retryable statuses are retried, read timeouts are not:
+    each would wait another full HTTP_READ_TIMEOUT, pushing one weather call far
+    past the request budget and the fan-out deadline.
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return this process's shared session.
+
+    Sockets must not be shared across fork(), so a gunicorn worker that
+    inherits a session from the master builds its own on first use.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = build_session()
+            _session_pid = pid
+        return _session
+
+
+def default_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout pair used for every outbound call"""
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+def http_get(url: str, params: Optional[dict] = None,
+             timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+    """GET through the pooled session with separate connect/read timeouts"""
+    return get_session().get(url, params=params, timeout=timeout or default_timeout())
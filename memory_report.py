@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Resident/shared memory figures for this process and its gunicorn siblings.
+
+Read from /proc/<pid>/smaps_rollup (Linux 4.14+). ``shared_kb`` counts pages
+mapped by more than one process: with a preloaded app these are the model
+arrays and imported libraries inherited copy-on-write from the master.
+``pss_kb`` splits shared pages evenly between their users, so summing it over
+the workers gives the real footprint.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+_cache_lock = threading.Lock()
+_cached = None  # (pid, generated_at, report)
+
+SMAPS_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb',
+}
+
+
+def read_smaps_rollup(pid: int) -> Optional[Dict[str, int]]:
+    """Memory counters in kB for one process, or None if /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    usage = {}
+    for line in lines:
+        name, _, rest = line.partition(':')
+        key = SMAPS_FIELDS.get(name)
+        if key:
+            usage[key] = int(rest.split()[0])
+    usage['shared_kb'] = usage.get('shared_clean_kb', 0) + usage.get('shared_dirty_kb', 0)
+    usage['private_kb'] = usage.get('private_clean_kb', 0) + usage.get('private_dirty_kb', 0)
+    return usage
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+    except OSError:
+        return ''
+
+
+def child_pids(parent_pid: int) -> List[int]:
+    """Direct children of a process (scans /proc/*/stat)"""
+    children = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Field 4 (ppid) follows the parenthesised command name, which may contain spaces
+        fields = stat[stat.rfind(')') + 2:].split()
+        if len(fields) > 1 and int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def _process_entry(pid: int, role: str) -> Dict[str, object]:
+    entry = {'pid': pid, 'role': role}
+    usage = read_smaps_rollup(pid)
+    if usage is not None:
+        entry.update(usage)
+    return entry
+
+
+def memory_report() -> Dict[str, object]:
+    """This worker's memory plus every sibling worker's when running under gunicorn"""
+    pid = os.getpid()
+    own = read_smaps_rollup(pid)
+    if own is None:
+        # No /proc (e.g. macOS dev machines): peak RSS is all we can offer
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {
+            'source': 'getrusage',
+            'pid': pid,
+            'max_rss_kb': max_rss // 1024 if sys.platform == 'darwin' else max_rss
+        }
+
+    report = {'source': 'smaps_rollup', 'pid': pid, 'current': dict(own, pid=pid)}
+
+    master_pid = os.getppid()
+    if 'gunicorn' not in _cmdline(master_pid):
+        return report
+
+    processes = [_process_entry(master_pid, 'master')]
+    processes += [_process_entry(worker_pid, 'worker') for worker_pid in child_pids(master_pid)]
+    workers = [p for p in processes if p['role'] == 'worker' and 'rss_kb' in p]
+
+    report['master_pid'] = master_pid
+    report['processes'] = processes
+    report['workers'] = {
+        'count': len(workers),
+        'rss_kb': sum(p['rss_kb'] for p in workers),
+        'pss_kb': sum(p['pss_kb'] for p in workers),
+        'shared_kb': sum(p['shared_kb'] for p in workers),
+        'private_kb': sum(p['private_kb'] for p in workers)
+    }
+    return report
+
+
+def cached_memory_report(max_age_seconds: float = 5.0) -> Dict[str, object]:
+    """memory_report() reused for up to max_age_seconds (it walks /proc and every worker's smaps)"""
+    global _cached
+    with _cache_lock:
+        now = time.monotonic()
+        pid = os.getpid()
+        if _cached is None or _cached[0] != pid or now - _cached[1] >= max_age_seconds:
+            _cached = (pid, now, memory_report())
+        return dict(_cached[2], age_seconds=round(now - _cached[1], 3))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Hot model reload: load a new model version in the background, validate it,
+then swap it in while requests keep being served by the old one
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from model_store import current_version
+
+logger = logging.getLogger(__name__)
+
+
+class ModelValidationError(ValueError):
+    """A candidate model version failed holdout validation"""
+
+
+class ModelRegistry:
+    """Tracks the active model version under a model directory.
+
+    ``load_fn(version)`` builds a candidate (any object), ``validate_fn(candidate)``
+    returns a report dict or raises ModelValidationError, and ``activate_fn(candidate)``
+    swaps it in. Reloads are serialized; a version that failed validation is not
+    retried by the watcher until CURRENT moves to another version. With a
+    ``pinned_version`` (MODEL_VERSION) the watcher never follows CURRENT, and a
+    reload without an explicit version reloads the pin.
+    """
+
+    def __init__(self, root: str, load_fn: Callable[[Optional[str]], Any],
+                 validate_fn: Callable[[Any], Dict[str, Any]],
+                 activate_fn: Callable[[Any], None],
+                 active_version: Optional[str] = None,
+                 watch_interval_seconds: float = 0,
+                 pinned_version: Optional[str] = None):
+        self.root = root
+        self.load_fn = load_fn
+        self.validate_fn = validate_fn
+        self.activate_fn = activate_fn
+        self.watch_interval_seconds = max(0.0, float(watch_interval_seconds))
+        self.pinned_version = pinned_version
+        self._ignored_version = None
+
+        self.active_version = active_version
+        self.activated_at = time.time() if active_version else None
+        self.last_load_seconds = None
+        self.last_validation = None
+        self.last_error = None
+        self.rejected_version = None
+        self.reloads = 0
+        self.rejections = 0
+        self.failures = 0
+
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def reload(self, version: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Load, validate and activate a version (default: the pin, else CURRENT); returns an outcome dict"""
+        with self._reload_lock:
+            target = version or self.pinned_version or current_version(self.root)
+            if target is not None and target == self.active_version and not force:
+                return {'status': 'unchanged', 'version': target}
+
+            started = time.perf_counter()
+            try:
+                candidate = self.load_fn(target)
+                load_seconds = time.perf_counter() - started
+                report = self.validate_fn(candidate)
+            except ModelValidationError as e:
+                self.rejections += 1
+                self.rejected_version = target
+                self.last_error = str(e)
+                logger.warning(f"Model version {target} rejected: {e}")
+                return {'status': 'rejected', 'version': target, 'error': str(e)}
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Model version {target} failed to load: {e}")
+                return {'status': 'failed', 'version': target, 'error': str(e)}
+
+            self.activate_fn(candidate)
+            previous = self.active_version
+            self.active_version = target
+            self.activated_at = time.time()
+            self.last_load_seconds = load_seconds
+            self.last_validation = report
+            self.last_error = None
+            self.rejected_version = None
+            self.reloads += 1
+            logger.info(f"Activated model version {target} (was {previous}, loaded in {load_seconds:.3f}s)")
+            return {'status': 'activated', 'version': target, 'previous_version': previous,
+                    'load_seconds': round(load_seconds, 4), 'validation': report}
+
+    def reload_async(self, version: Optional[str] = None, force: bool = False) -> threading.Thread:
+        thread = threading.Thread(target=self.reload, args=(version, force),
+                                  name='model-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def check_for_update(self) -> Optional[Dict[str, Any]]:
+        """Reload if CURRENT names a version other than the active (or last rejected) one"""
+        target = current_version(self.root)
+        if target is None or target in (self.active_version, self.rejected_version):
+            return None
+        if self.pinned_version is not None:
+            if target != self._ignored_version:
+                self._ignored_version = target
+                logger.info(f"CURRENT is {target}; staying on pinned model version {self.pinned_version}")
+            return None
+        return self.reload(target)
+
+    @property
+    def watching(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Start the directory watcher; safe to call again (e.g. in a freshly forked worker)"""
+        if self.watch_interval_seconds <= 0:
+            return False
+        with self._thread_lock:
+            if self.watching:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+            self._thread.start()
+            logger.info(f"Watching {self.root} for new model versions every {self.watch_interval_seconds:.0f}s")
+            return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.watch_interval_seconds):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                logger.warning(f"Model watcher check failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'active_version': self.active_version,
+            'activated_at': (time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.activated_at))
+                             if self.activated_at else None),
+            'last_load_seconds': round(self.last_load_seconds, 4) if self.last_load_seconds is not None else None,
+            'last_validation': self.last_validation,
+            'reloads': self.reloads,
+            'rejections': self.rejections,
+            'failures': self.failures,
+            'rejected_version': self.rejected_version,
+            'last_error': self.last_error,
+            'pinned_version': self.pinned_version,
+            'watching': self.watching,
+            'watch_interval_seconds': self.watch_interval_seconds
+        }
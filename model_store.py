@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Versioned on-disk model artifacts.
+
+Each training run writes a complete set of files into its own directory and
+only then moves the ``CURRENT`` pointer, so a serving process never sees a
+half-written model:
+
+    models/
+        CURRENT                      -> "20250101120000"
+        versions/20250101120000/
+            rf_flood_model.pkl
+            feature_scaler.pkl
+            feature_columns.pkl
+            flat_forest/             (raw node arrays, see forest_engine.FlatForest.save)
+            metadata.json
+
+Two loaders are available. ``joblib`` unpickles the sklearn forest into
+private heap. ``mmap`` opens the flat_forest arrays with ``np.load(mmap_mode='r')``,
+so loading is close to zero-copy and every process serving the same
+version shares one copy in the page cache.
+
+Models written before versioning (``models/rf_flood_model.pkl`` etc.) are still
+loaded when no version exists.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import joblib
+
+from forest_engine import FlatForest
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = 'rf_flood_model.pkl'
+SCALER_FILE = 'feature_scaler.pkl'
+FEATURES_FILE = 'feature_columns.pkl'
+FOREST_DIR = 'flat_forest'
+METADATA_FILE = 'metadata.json'
+LEGACY_METADATA_FILE = 'model_metadata.pkl'
+CURRENT_POINTER = 'CURRENT'
+VERSIONS_DIR = 'versions'
+MODEL_FORMATS = ('joblib', 'mmap')
+
+
+class ModelArtifacts(NamedTuple):
+    rf_model: Any
+    scaler: Any
+    feature_cols: List[str]
+    metadata: Dict[str, Any]
+    path: str
+
+
+class ModelNotFoundError(FileNotFoundError):
+    """No usable model artifacts under the model directory"""
+
+
+def new_version() -> str:
+    return datetime.now().strftime('%Y%m%d%H%M%S')
+
+
+def version_path(root: str, version: str) -> str:
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def list_versions(root: str) -> List[str]:
+    """Complete versions under root, oldest first"""
+    versions_root = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_root):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_root)
+        if os.path.isfile(os.path.join(versions_root, name, METADATA_FILE))
+    )
+
+
+def current_version(root: str) -> Optional[str]:
+    """Version named by the CURRENT pointer, or the newest complete version"""
+    try:
+        with open(os.path.join(root, CURRENT_POINTER)) as f:
+            version = f.read().strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    versions = list_versions(root)
+    return versions[-1] if versions else None
+
+
+def activate_version(root: str, version: str) -> None:
+    """Atomically point CURRENT at an existing version"""
+    if version not in list_versions(root):
+        raise ModelNotFoundError(f"Model version {version} not found in {root}")
+    _write_pointer(root, version)
+
+
+def _write_pointer(root: str, version: str) -> None:
+    pointer = os.path.join(root, CURRENT_POINTER)
+    tmp = f"{pointer}.tmp.{os.getpid()}"
+    with open(tmp, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp, pointer)
+
+
+def save_artifacts(root: str, rf_model, scaler, feature_cols: List[str],
+                   metadata: Optional[Dict[str, Any]] = None,
+                   version: Optional[str] = None, activate: bool = True) -> str:
+    """Write one model version and (by default) make it CURRENT; returns the version"""
+    version = version or new_version()
+    path = version_path(root, version)
+    if os.path.exists(os.path.join(path, METADATA_FILE)):
+        raise FileExistsError(f"Model version {version} already exists in {root}")
+    os.makedirs(path, exist_ok=True)
+
+    joblib.dump(rf_model, os.path.join(path, MODEL_FILE))
+    joblib.dump(scaler, os.path.join(path, SCALER_FILE))
+    joblib.dump(list(feature_cols), os.path.join(path, FEATURES_FILE))
+
+    metadata = dict(metadata or {})
+    try:
+        FlatForest.from_sklearn(rf_model).save(os.path.join(path, FOREST_DIR))
+        metadata['formats'] = list(MODEL_FORMATS)
+    except (AttributeError, ValueError) as e:
+        logger.warning(f"Model version {version} has no memory-mappable copy: {e}")
+        metadata['formats'] = ['joblib']
+
+    # The artifact version wins; a trainer's own schema version is kept alongside
+    if metadata.get('version') not in (None, version):
+        metadata['model_schema_version'] = metadata['version']
+    metadata['version'] = version
+    metadata.setdefault('created', datetime.now().isoformat())
+    metadata.setdefault('features', list(feature_cols))
+    # metadata.json is written last: its presence marks the version complete
+    with open(os.path.join(path, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    if activate:
+        _write_pointer(root, version)
+    logger.info(f"Saved model version {version} to {path}")
+    return version
+
+
+def load_version(root: str, version: str, model_format: str = 'joblib') -> ModelArtifacts:
+    """Load one version; with model_format='mmap' rf_model is a memory-mapped FlatForest"""
+    if model_format not in MODEL_FORMATS:
+        raise ValueError(f"Unknown model format {model_format!r}, expected one of {MODEL_FORMATS}")
+
+    path = version_path(root, version)
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+
+    forest_path = os.path.join(path, FOREST_DIR)
+    if model_format == 'mmap' and not os.path.isdir(forest_path):
+        logger.warning(f"Model version {version} has no {FOREST_DIR}/, loading it with joblib")
+        model_format = 'joblib'
+    if model_format == 'mmap':
+        rf_model = FlatForest.load(forest_path, mmap_mode='r')
+    else:
+        rf_model = joblib.load(os.path.join(path, MODEL_FILE))
+    metadata['format'] = model_format
+
+    return ModelArtifacts(
+        rf_model=rf_model,
+        scaler=joblib.load(os.path.join(path, SCALER_FILE)),
+        feature_cols=joblib.load(os.path.join(path, FEATURES_FILE)),
+        metadata=metadata,
+        path=path
+    )
+
+
+def load_legacy(root: str) -> ModelArtifacts:
+    """Unversioned files written directly into root by older releases"""
+    metadata_path = os.path.join(root, LEGACY_METADATA_FILE)
+    metadata = joblib.load(metadata_path) if os.path.exists(metadata_path) else {}
+    metadata.setdefault('version', 'legacy')
+    metadata['format'] = 'joblib'
+    return ModelArtifacts(
+        rf_model=joblib.load(os.path.join(root, MODEL_FILE)),
+        scaler=joblib.load(os.path.join(root, SCALER_FILE)),
+        feature_cols=joblib.load(os.path.join(root, FEATURES_FILE)),
+        metadata=metadata,
+        path=root
+    )
+
+
+def load_artifacts(root: str, version: Optional[str] = None,
+                   model_format: str = 'joblib') -> ModelArtifacts:
+    """Load a pinned version, else CURRENT, else the legacy flat files (joblib only)"""
+    version = version or current_version(root)
+    try:
+        if version:
+            return load_version(root, version, model_format)
+        return load_legacy(root)
+    except (OSError, EOFError) as e:
+        raise ModelNotFoundError(f"No model artifacts in {root} (version {version or 'legacy'}): {e}") from e
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Training for the geographic flood model served by app.py.
+
+Kept free of Flask and app state so the training CLI (train_models.py) can
+build artifacts without importing the web app.
+"""
+
+from datetime import datetime
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+MODEL_VERSION = '2.0.0'
+
+FEATURE_COLUMNS = ['rainfall_1day', 'rainfall_3day', 'rainfall_7day', 
+                   'water_level_lag1', 'water_level_trend', 'is_monsoon',
+                   'elevation', 'river_distance', 'geographic_risk']
+
+
+def generate_training_data(n_samples=2500, seed=42):
+    """Synthetic (X, y) with geographic factors; columns follow FEATURE_COLUMNS.
+
+    A different seed gives an independent draw from the same distribution,
+    which is what the model registry validates new versions against.
+    """
+    # Generate comprehensive synthetic flood data
+    rng = np.random.RandomState(seed)
+    
+    # Generate diverse rainfall patterns
+    rainfall_1day = rng.gamma(1.8, 2.5, n_samples)
+    rainfall_3day = rainfall_1day + rng.gamma(1.5, 3.2, n_samples) 
+    rainfall_7day = rainfall_3day + rng.gamma(1.2, 4.5, n_samples)
+    
+    # Generate elevation and geographic factors
+    elevation = rng.uniform(2, 45, n_samples)
+    river_distance = rng.exponential(15, n_samples)  # Most locations near rivers
+    drainage_quality = rng.choice([0.2, 0.5, 0.8], n_samples, p=[0.3, 0.5, 0.2])  # Good/Moderate/Poor
+    
+    # Water level calculation with geographic dependencies
+    base_water_level = 3.0 + (50 - elevation) / 20  # Lower elevation = higher base level
+    rainfall_impact = (rainfall_1day * 0.15 + rainfall_3day * 0.08) * (drainage_quality + 0.5)
+    river_impact = np.maximum(0, (10 - river_distance) / 10) * 0.8  # Closer to river = higher levels
+    
+    water_level_lag1 = base_water_level + rainfall_impact + river_impact + rng.normal(0, 0.4, n_samples)
+    water_level_lag1 = np.maximum(water_level_lag1, 1.5)  # Minimum water level
+    
+    # Water level trend (momentum)
+    water_level_trend = rng.normal(0, 0.3, n_samples)
+    
+    # Seasonal effects
+    is_monsoon = rng.choice([0, 1], n_samples, p=[0.65, 0.35])
+    monsoon_multiplier = 1 + (is_monsoon * 0.4)  # 40% increase during monsoon
+    
+    # Apply monsoon effects
+    rainfall_1day *= monsoon_multiplier
+    rainfall_3day *= monsoon_multiplier
+    rainfall_7day *= monsoon_multiplier
+    water_level_lag1 *= (1 + is_monsoon * 0.2)
+    
+    # Geographic risk factor
+    geographic_risk = (
+        (50 - elevation) / 50 * 0.35 +  # Elevation factor
+        np.maximum(0, (20 - river_distance) / 20) * 0.4 +  # River proximity
+        drainage_quality * 0.25  # Drainage quality
+    )
+    geographic_risk = np.clip(geographic_risk, 0.1, 0.9)
+    
+    # Create comprehensive feature matrix (9 features)
+    X = np.column_stack([
+        rainfall_1day, rainfall_3day, rainfall_7day,
+        water_level_lag1, water_level_trend, is_monsoon,
+        elevation, river_distance, geographic_risk
+    ])
+    
+    # Create realistic flood labels with multiple conditions
+    high_rainfall_flood = (rainfall_3day > 12) & (drainage_quality > 0.4)  # Heavy rain + poor drainage
+    water_level_flood = water_level_lag1 > (5.0 + elevation * 0.05)  # Dynamic threshold by elevation
+    geographic_flood = (geographic_risk > 0.7) & (rainfall_1day > 6)  # High risk areas with moderate rain
+    monsoon_flood = (is_monsoon == 1) & (rainfall_7day > 25) & (elevation < 15)  # Monsoon flooding
+    
+    y = (high_rainfall_flood | water_level_flood | geographic_flood | monsoon_flood).astype(int)
+    
+    return X, y
+
+
+def train_flood_model():
+    """Create and train advanced flood prediction models with geographic awareness.
+
+    Returns (rf_model, scaler, feature_cols, metadata); nothing is written to disk.
+    """
+    print("Creating advanced synthetic training data with geographic factors...")
+    
+    n_samples = 2500  # Increased sample size for better accuracy
+    X, y = generate_training_data(n_samples, seed=42)
+    feature_cols = list(FEATURE_COLUMNS)
+    
+    print(f"Advanced training data: {X.shape[0]} samples, {y.sum()} flood events ({y.mean()*100:.1f}%)")
+    print(f"Feature distribution: {X.shape[1]} features including geographic factors")
+    
+    # Split with stratification to ensure balanced test set
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    
+    # Advanced scaling
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    # Train enhanced Random Forest with better parameters
+    rf_model = RandomForestClassifier(
+        n_estimators=200,  # More trees for better accuracy
+        max_depth=12,      # Prevent overfitting
+        min_samples_split=5,
+        min_samples_leaf=3,
+        max_features='sqrt',
+        class_weight='balanced',  # Handle class imbalance
+        random_state=42
+    )
+    rf_model.fit(X_train_scaled, y_train)
+    
+    # Comprehensive evaluation
+    train_accuracy = rf_model.score(X_train_scaled, y_train)
+    test_accuracy = rf_model.score(X_test_scaled, y_test)
+    y_pred = rf_model.predict(X_test_scaled)
+    
+    print(f"Advanced model trained!")
+    print(f"Training accuracy: {train_accuracy:.3f}")
+    print(f"Test accuracy: {test_accuracy:.3f}")
+    print(f"Overfitting check: {abs(train_accuracy - test_accuracy):.3f} (should be < 0.1)")
+    
+    # Feature importance analysis
+    feature_importance = rf_model.feature_importances_
+    importance_dict = dict(zip(feature_cols, feature_importance))
+    print("Feature importance:")
+    for feature, importance in sorted(importance_dict.items(), key=lambda x: x[1], reverse=True):
+        print(f"  {feature}: {importance:.3f}")
+    
+    model_metadata = {
+        'version': MODEL_VERSION,
+        'features': feature_cols,
+        'accuracy': float(test_accuracy),
+        'samples': n_samples,
+        'created': datetime.now().isoformat()
+    }
+    
+    return rf_model, scaler, feature_cols, model_metadata
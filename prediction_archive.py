@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Date/location partitioned columnar archive of predictions.
+
+Layout (one ``.npy`` file per column, so a query loads only the columns it
+asks for, memory-mapped)::
+
+    logs/archive/date=2025-07-28/location=Dhaka/part-<id>/
+        _meta.json          rows, column dtypes, min/max timestamp
+        timestamp.npy       datetime64[s]
+        risk_probability.npy, rainfall.npy, status.npy, ...
+
+A time-range scan prunes whole days by directory name, then whole parts by
+their min/max timestamp, and only then masks rows. Each part keeps its own
+column set, so rows from the web app and from ``automated_predictions`` (which
+logs per-model columns) live side by side; a column missing from a part reads
+as NaN (numbers) or '' (text).
+
+Every append writes a new part into a temporary directory and renames it into
+place. Compaction is tiered: appended parts are level 0, and once a partition
+holds ``compact_parts`` parts of one level they (and only they) are merged into
+a single part one level up. A row is therefore rewritten once per level, a
+logarithmic number of times, instead of on every merge of a growing part. The
+merged part lists the parts it replaces, so a reader that races the merge never
+counts a row twice. ``compact`` (and the CLI) merges every part of a partition.
+
+    python prediction_archive.py import logs/flood_predictions.csv
+    python prediction_archive.py compact
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process compaction lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+META_FILE = '_meta.json'
+TEXT_COLUMNS = {'date', 'status'}
+_counter_lock = threading.Lock()
+_counter = 0
+
+
+def _to_datetime64(value) -> np.datetime64:
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[s]')
+    if isinstance(value, datetime):
+        return np.datetime64(value.replace(tzinfo=None), 's')
+    if isinstance(value, date):
+        return np.datetime64(value.isoformat(), 's')
+    return np.datetime64(str(value).strip().replace(' ', 'T'), 's')
+
+
+def _part_id() -> str:
+    global _counter
+    with _counter_lock:
+        _counter += 1
+        return f"{time.time_ns():020d}-{os.getpid()}-{_counter}"
+
+
+def _column_array(name: str, values: List) -> np.ndarray:
+    """Numbers become float64 (missing -> NaN); anything else becomes fixed-width text"""
+    if name not in TEXT_COLUMNS:
+        try:
+            return np.array([np.nan if v is None or v == '' else float(v) for v in values],
+                            dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+def _level(meta: Dict) -> int:
+    """Compaction level of a part (merged parts written before levels existed count as 1)"""
+    return int(meta.get('level', 1 if meta.get('replaces') else 0))
+
+
+def _fill(kind: str, rows: int) -> np.ndarray:
+    return np.full(rows, np.nan) if kind == 'f' else np.full(rows, '', dtype='<U1')
+
+
+class PredictionArchive:
+    """Append-only, partitioned, columnar prediction history"""
+
+    def __init__(self, root: str, compact_parts: int = 8):
+        self.root = root
+        self.compact_parts = max(2, int(compact_parts))
+        self.compactions = 0
+        self.compacted_rows = 0
+
+    # -- layout --------------------------------------------------------------
+
+    def partition_path(self, day: str, location: str) -> str:
+        return os.path.join(self.root, f"date={day}", f"location={quote(location, safe='')}")
+
+    def partitions(self, start=None, end=None,
+                   locations: Optional[Sequence[str]] = None) -> List[Tuple[str, str, str]]:
+        """(day, location, path) for partitions that can hold rows in [start, end)"""
+        first = str(_to_datetime64(start).astype('datetime64[D]')) if start is not None else None
+        last = str(_to_datetime64(end).astype('datetime64[D]')) if end is not None else None
+        wanted = set(locations) if locations is not None else None
+        found = []
+        try:
+            day_dirs = sorted(os.listdir(self.root))
+        except FileNotFoundError:
+            return []
+        for day_dir in day_dirs:
+            if not day_dir.startswith('date='):
+                continue
+            day = day_dir[5:]
+            # ISO dates compare correctly as strings
+            if (first is not None and day < first) or (last is not None and day > last):
+                continue
+            for location_dir in sorted(os.listdir(os.path.join(self.root, day_dir))):
+                if not location_dir.startswith('location='):
+                    continue
+                location = unquote(location_dir[9:])
+                if wanted is None or location in wanted:
+                    found.append((day, location, os.path.join(self.root, day_dir, location_dir)))
+        return found
+
+    @staticmethod
+    def _live_parts(partition: str) -> List[Tuple[str, Dict]]:
+        """(part path, meta) for complete parts not superseded by a compacted part"""
+        parts = []
+        for name in sorted(os.listdir(partition)):
+            if not name.startswith('part-') or name.endswith('.tmp'):
+                continue
+            try:
+                with open(os.path.join(partition, name, META_FILE)) as f:
+                    parts.append((name, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        replaced = {old for _, meta in parts for old in meta.get('replaces', ())}
+        return [(os.path.join(partition, name), meta) for name, meta in parts if name not in replaced]
+
+    # -- writes --------------------------------------------------------------
+
+    def _write_part(self, partition: str, columns: Dict[str, np.ndarray],
+                    replaces: Sequence[str] = (), level: int = 0) -> str:
+        os.makedirs(partition, exist_ok=True)
+        name = f"part-{_part_id()}"
+        tmp_path = os.path.join(partition, name + '.tmp')
+        os.makedirs(tmp_path)
+        timestamps = columns['timestamp'].astype('datetime64[s]').astype(np.int64)
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values, allow_pickle=False)
+        meta = {
+            'rows': int(len(timestamps)),
+            'columns': {column: values.dtype.str for column, values in columns.items()},
+            'min_ts': int(timestamps.min()),
+            'max_ts': int(timestamps.max()),
+            'replaces': list(replaces),
+            'level': int(level)
+        }
+        # The meta file is written last and the directory renamed: readers see whole parts only
+        with open(os.path.join(tmp_path, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        final_path = os.path.join(partition, name)
+        os.rename(tmp_path, final_path)
+        return final_path
+
+    def append(self, records: Iterable[Dict]) -> int:
+        """Write records as one new part per (day, location); returns the number of rows"""
+        groups = defaultdict(list)
+        for record in records:
+            if not record.get('location'):
+                continue
+            timestamp = _to_datetime64(record.get('timestamp') or datetime.now())
+            groups[(str(timestamp.astype('datetime64[D]')), str(record['location']))].append((timestamp, record))
+
+        written = 0
+        for (day, location), rows in groups.items():
+            rows.sort(key=lambda item: item[0])
+            names = []
+            for _, record in rows:
+                names.extend(key for key in record if key not in ('timestamp', 'location') and key not in names)
+            columns = {'timestamp': np.array([ts for ts, _ in rows], dtype='datetime64[s]')}
+            for name in names:
+                columns[name] = _column_array(name, [record.get(name) for _, record in rows])
+
+            partition = self.partition_path(day, location)
+            self._write_part(partition, columns)
+            written += len(rows)
+            # New parts are level 0; a merge there can fill the next level, and so on
+            level = 0
+            while self.compact_partition(partition, level=level):
+                level += 1
+        return written
+
+    def compact_partition(self, partition: str, level: Optional[int] = None) -> bool:
+        """Merge parts into one; returns True if anything was merged
+
+        With ``level`` only that level's parts are merged, and only once there
+        are ``compact_parts`` of them; without it every live part is.
+        """
+        lock_fd = os.open(os.path.join(partition, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            parts = self._live_parts(partition)
+            if level is not None:
+                parts = [(path, meta) for path, meta in parts if _level(meta) == level]
+                if len(parts) < self.compact_parts:
+                    return False
+            if len(parts) < 2:
+                return False
+            kinds = {}
+            for _, meta in parts:
+                for column, dtype in meta['columns'].items():
+                    kind = np.dtype(dtype).kind
+                    kinds[column] = kind if kinds.get(column, kind) == kind else 'U'
+            merged = {column: self._read_columns(parts, [column], kinds)[column] for column in kinds}
+            order = np.argsort(merged['timestamp'], kind='stable')
+            merged = {column: values[order] for column, values in merged.items()}
+            self._write_part(partition, merged, replaces=[os.path.basename(path) for path, _ in parts],
+                             level=max(_level(meta) for _, meta in parts) + 1)
+            for path, _ in parts:
+                shutil.rmtree(path, ignore_errors=True)
+            self.compactions += 1
+            self.compacted_rows += len(order)
+            return True
+        finally:
+            os.close(lock_fd)
+
+    def compact(self) -> int:
+        """Compact every partition with more than one part; returns how many were merged"""
+        return sum(self.compact_partition(path) for _, _, path in self.partitions())
+
+    def import_csv(self, csv_path: str, batch_size: int = 10000) -> int:
+        imported = 0
+        with open(csv_path, newline='') as f:
+            batch = []
+            for record in csv.DictReader(f):
+                batch.append({k: v for k, v in record.items() if k is not None and v not in (None, '')})
+                if len(batch) >= batch_size:
+                    imported += self.append(batch)
+                    batch = []
+            imported += self.append(batch)
+        self.compact()
+        return imported
+
+    # -- reads ---------------------------------------------------------------
+
+    @staticmethod
+    def _read_columns(parts: List[Tuple[str, Dict]], columns: Sequence[str], kinds: Dict[str, str],
+                      masks: Optional[List[np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        out = {}
+        for column in columns:
+            pieces = []
+            for i, (path, meta) in enumerate(parts):
+                if column in meta['columns']:
+                    values = np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')
+                else:
+                    values = _fill(kinds.get(column, 'f'), meta['rows'])
+                values = values[masks[i]] if masks is not None else np.asarray(values)
+                if kinds.get(column) == 'U' and values.dtype.kind != 'U':
+                    values = values.astype(str)
+                pieces.append(values)
+            out[column] = np.concatenate(pieces) if pieces else np.array([])
+        return out
+
+    def scan(self, columns: Optional[Sequence[str]] = None, start=None, end=None,
+             locations: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Rows with start <= timestamp < end, sorted by time
+
+        Returns ``timestamp`` and ``location`` arrays plus the requested columns
+        (all columns when ``columns`` is None).
+        """
+        start_s = int(_to_datetime64(start).astype(np.int64)) if start is not None else None
+        end_s = int(_to_datetime64(end).astype(np.int64)) if end is not None else None
+
+        for attempt in range(3):
+            try:
+                return self._scan(columns, start, end, start_s, end_s, locations)
+            except FileNotFoundError:
+                # A compaction removed a part between listing and reading
+                if attempt == 2:
+                    raise
+        return {}
+
+    def _scan(self, columns, start, end, start_s, end_s, locations) -> Dict[str, np.ndarray]:
+        parts, part_locations = [], []
+        for _, location, partition in self.partitions(start, end, locations):
+            for path, meta in self._live_parts(partition):
+                if (start_s is not None and meta['max_ts'] < start_s) or \
+                        (end_s is not None and meta['min_ts'] >= end_s):
+                    continue
+                parts.append((path, meta))
+                part_locations.append(location)
+
+        kinds = {}
+        for _, meta in parts:
+            for column, dtype in meta['columns'].items():
+                kind = np.dtype(dtype).kind
+                kinds[column] = kind if kinds.get(column, kind) == kind else 'U'
+        if columns is None:
+            columns = [column for column in kinds if column != 'timestamp']
+        columns = [column for column in columns if column not in ('timestamp', 'location')]
+
+        masks = []
+        for path, meta in parts:
+            timestamps = np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='r').astype(np.int64)
+            mask = np.ones(meta['rows'], dtype=bool)
+            if start_s is not None:
+                mask &= timestamps >= start_s
+            if end_s is not None:
+                mask &= timestamps < end_s
+            masks.append(mask)
+
+        result = self._read_columns(parts, ['timestamp'] + list(columns), kinds, masks)
+        result['timestamp'] = result['timestamp'].astype('datetime64[s]') if len(parts) else \
+            np.array([], dtype='datetime64[s]')
+        result['location'] = np.repeat(np.array(part_locations, dtype=str),
+                                       [int(mask.sum()) for mask in masks])
+
+        order = np.argsort(result['timestamp'], kind='stable')
+        return {column: values[order] for column, values in result.items()}
+
+    def stats(self) -> Dict[str, object]:
+        partitions = self.partitions()
+        parts = rows = size = 0
+        for _, _, partition in partitions:
+            for path, meta in self._live_parts(partition):
+                parts += 1
+                rows += meta['rows']
+                size += sum(entry.stat().st_size for entry in os.scandir(path))
+        return {
+            'root': self.root,
+            'partitions': len(partitions),
+            'parts': parts,
+            'rows': rows,
+            'size_bytes': size,
+            'compact_parts': self.compact_parts,
+            'compactions': self.compactions,
+            'compacted_rows': self.compacted_rows
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the columnar prediction archive")
+    parser.add_argument('--root', default=os.environ.get('PREDICTION_ARCHIVE_DIR') or 'logs/archive')
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='archive a CSV prediction log')
+    import_parser.add_argument('csv_path')
+    commands.add_parser('compact', help='merge small parts in every partition')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    archive = PredictionArchive(args.root)
+    if args.command == 'import':
+        print(f"✅ Archived {archive.import_csv(args.csv_path)} rows in {args.root}")
+    elif args.command == 'compact':
+        print(f"✅ Compacted {archive.compact()} partitions in {args.root}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
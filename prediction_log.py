@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Buffered background writer for the prediction CSV log.
+
+Requests only put a dict on an in-memory queue. A writer thread formats
+records in batches (flushing when ``max_batch`` records are waiting or
+``flush_interval_seconds`` after the first one arrived) and appends each batch
+with a single ``write()`` on an O_APPEND descriptor held under an exclusive
+``flock``, so rows from several gunicorn workers never interleave or
+duplicate the header. A ``sink`` callable replaces the CSV append, e.g.
+``PredictionStore.insert_many`` to batch rows into SQLite instead, and
+``on_append`` runs under the lock after each CSV batch (the history index
+catches up there). ``mirror`` receives every stored batch as well (the
+columnar archive); its failures are counted but do not drop the batch.
+"""
+
+import csv
+import io
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND alone
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+
+
+class PredictionLogWriter:
+    """Queue-backed CSV appender; call ``write`` from request threads"""
+
+    def __init__(self, path: str, columns: List[str], max_batch: int = 100,
+                 flush_interval_seconds: float = 1.0, max_queue: int = 10000,
+                 sink: Optional[Callable[[List[Dict]], object]] = None,
+                 on_append: Optional[Callable[[], object]] = None,
+                 mirror: Optional[Callable[[List[Dict]], object]] = None):
+        self.path = path
+        self.columns = list(columns)
+        self.sink = sink
+        self.on_append = on_append
+        self.mirror = mirror
+        self.max_batch = max(1, int(max_batch))
+        self.flush_interval_seconds = max(0.0, float(flush_interval_seconds))
+        self.max_queue = max(1, int(max_queue))
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+        self.mirror_errors = 0
+        self.last_flush = None
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._closed = False
+
+    def _ensure_started(self) -> None:
+        """One writer thread per process: a forked worker starts its own"""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # Anything queued in the parent before fork belongs to the parent
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._pid = pid
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name='prediction-log-writer', daemon=True)
+            self._thread.start()
+
+    def write(self, record: Dict) -> bool:
+        """Queue one record; returns False (and counts a drop) if the queue is full or closed"""
+        if self._closed and self._pid == os.getpid():
+            self.dropped += 1
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write everything queued so far; returns False if it did not finish in time"""
+        if self._queue is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush and stop the writer thread (registered as a shutdown hook)"""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self.flush(timeout)
+        self._closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+
+            if item is None:
+                self._write_batch(pending)
+                return
+
+            if isinstance(item, tuple) and item and item[0] is _FLUSH:
+                self._write_batch(pending)
+                pending, deadline = [], None
+                item[1].set()
+                continue
+
+            if item is _FLUSH:
+                self._write_batch(pending)
+                pending, deadline = [], None
+                continue
+
+            pending.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval_seconds
+            if len(pending) >= self.max_batch:
+                self._write_batch(pending)
+                pending, deadline = [], None
+
+    def _format(self, records: List[Dict], with_header: bool) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns, extrasaction='ignore',
+                                lineterminator='\n')
+        if with_header:
+            writer.writeheader()
+        writer.writerows(records)
+        return buffer.getvalue().encode('utf-8')
+
+    def _write_batch(self, records: List[Dict]) -> None:
+        if not records:
+            return
+        try:
+            if self.sink is not None:
+                self.sink(records)
+            else:
+                self._append_csv(records)
+            self.written += len(records)
+            self.batches += 1
+            self.last_flush = time.time()
+        except Exception as e:
+            self.errors += 1
+            self.dropped += len(records)
+            logger.error(f"Could not append {len(records)} predictions to {self.path}: {e}")
+            return
+        if self.mirror is not None:
+            try:
+                self.mirror(records)
+            except Exception as e:
+                self.mirror_errors += 1
+                logger.error(f"Could not mirror {len(records)} predictions: {e}")
+
+    def _append_csv(self, records: List[Dict]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            # Under the lock, an empty file means no process has written the header yet
+            data = self._format(records, with_header=os.fstat(fd).st_size == 0)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if self.on_append is not None:
+                self.on_append()
+        finally:
+            os.close(fd)  # also releases the flock
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'path': self.path,
+            'queued': self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0,
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'mirror_errors': self.mirror_errors,
+            'max_batch': self.max_batch,
+            'flush_interval_seconds': self.flush_interval_seconds,
+            'max_queue': self.max_queue,
+            'last_flush_age_seconds': round(time.time() - self.last_flush, 1) if self.last_flush else None
+        }
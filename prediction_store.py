@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+SQLite prediction store (WAL mode) replacing the append-only CSV log.
+
+Rows are indexed on (location, timestamp), so the history of one station is
+an index range scan: O(log n + k) however long the log grows. WAL lets
+readers run alongside the single writer, and every gunicorn worker (and the
+automated prediction script) can write through its own connection.
+
+One-shot import of the old CSV log:
+
+    python prediction_store.py import logs/flood_predictions.csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['timestamp', 'location', 'date', 'rainfall', 'water_level', 'flood_threshold',
+           'flood_risk', 'risk_probability', 'confidence', 'status']
+
+# automated_predictions logs its own column names; they fill the shared columns
+ALIASES = {
+    'rainfall': ('recent_rainfall',),
+    'water_level': ('estimated_water_level',),
+    'flood_risk': ('ensemble_prediction',),
+    'risk_probability': ('ensemble_probability',),
+    'confidence': ('ensemble_confidence',)
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    location TEXT NOT NULL,
+    date TEXT,
+    rainfall REAL,
+    water_level REAL,
+    flood_threshold REAL,
+    flood_risk INTEGER,
+    risk_probability REAL,
+    confidence REAL,
+    status TEXT,
+    source TEXT NOT NULL DEFAULT 'app',
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_location_timestamp
+    ON predictions (location, timestamp);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    imported_at TEXT NOT NULL
+);
+"""
+
+INSERT_SQL = (
+    "INSERT INTO predictions (timestamp, location, date, rainfall, water_level, flood_threshold, "
+    "flood_risk, risk_probability, confidence, status, source, details) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _field(record: Dict, column: str):
+    value = record.get(column)
+    for alias in ALIASES.get(column, ()):
+        if value is not None and value != '':
+            break
+        value = record.get(alias)
+    return value
+
+
+def normalize_record(record: Dict) -> Dict:
+    """A copy of the record with the shared columns filled from their aliases"""
+    normalized = dict(record)
+    for column in ALIASES:
+        value = _field(record, column)
+        if value is not None:
+            normalized[column] = value
+    return normalized
+
+
+def _number(value, cast=float):
+    if value is None or value == '':
+        return None
+    try:
+        return cast(float(value)) if cast is int else cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PredictionStore:
+    """Thread- and process-safe access to the predictions database"""
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready_pid = None
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (a forked worker opens its own)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        with self._schema_lock:
+            if self._schema_ready_pid != os.getpid():
+                conn.executescript(SCHEMA)
+                self._schema_ready_pid = os.getpid()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _row(record: Dict, source: str):
+        extra = {key: value for key, value in record.items() if key not in COLUMNS}
+        return (
+            str(record.get('timestamp') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+            str(record['location']),
+            None if record.get('date') is None else str(record.get('date')),
+            _number(_field(record, 'rainfall')),
+            _number(_field(record, 'water_level')),
+            _number(record.get('flood_threshold')),
+            _number(_field(record, 'flood_risk'), int),
+            _number(_field(record, 'risk_probability')),
+            _number(_field(record, 'confidence')),
+            None if record.get('status') is None else str(record.get('status')),
+            source,
+            json.dumps(extra, default=str) if extra else None
+        )
+
+    def insert_many(self, records: Iterable[Dict], source: str = 'app') -> int:
+        """Insert records in one transaction; keys outside COLUMNS are kept as JSON details"""
+        rows = [self._row(record, source) for record in records]
+        if not rows:
+            return 0
+        conn = self.connection()
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+        return len(rows)
+
+    def insert(self, record: Dict, source: str = 'app') -> None:
+        self.insert_many([record], source)
+
+    def history(self, location: str, limit: int = 30) -> List[Dict]:
+        """The most recent ``limit`` rows for a location, oldest first"""
+        rows = self.connection().execute(
+            "SELECT * FROM predictions WHERE location = ? "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (location, int(limit))
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def count(self, location: Optional[str] = None) -> int:
+        if location is None:
+            return self.connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM predictions WHERE location = ?", (location,)
+        ).fetchone()[0]
+
+    def was_imported(self, csv_path: str) -> bool:
+        return self.connection().execute(
+            "SELECT 1 FROM imports WHERE path = ?", (os.path.abspath(csv_path),)
+        ).fetchone() is not None
+
+    def import_csv(self, csv_path: str, source: str = 'csv-import', force: bool = False,
+                   batch_size: int = 1000) -> int:
+        """Copy an existing CSV log into the store once; returns the number of rows imported
+
+        The imports check, the rows and the imports entry share one BEGIN IMMEDIATE
+        transaction, so workers seeding the same database at once import it only once.
+        """
+        key = os.path.abspath(csv_path)
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not force and conn.execute("SELECT 1 FROM imports WHERE path = ?", (key,)).fetchone():
+                conn.rollback()
+                logger.info(f"{csv_path} was already imported into {self.path}")
+                return 0
+
+            imported = 0
+            with open(csv_path, newline='') as f:
+                batch = []
+                for record in csv.DictReader(f):
+                    if not record.get('location'):
+                        continue
+                    record = {k: v for k, v in record.items() if k is not None and v not in (None, '')}
+                    batch.append(self._row(record, source))
+                    if len(batch) >= batch_size:
+                        conn.executemany(INSERT_SQL, batch)
+                        imported += len(batch)
+                        batch = []
+                conn.executemany(INSERT_SQL, batch)
+                imported += len(batch)
+
+            conn.execute("INSERT OR REPLACE INTO imports (path, rows, imported_at) VALUES (?, ?, ?)",
+                         (key, imported, datetime.now().isoformat()))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        logger.info(f"Imported {imported} predictions from {csv_path} into {self.path}")
+        return imported
+
+    def max_id(self) -> int:
+        """Highest row id: an index lookup, and the row count as long as rows are never deleted"""
+        return self.connection().execute("SELECT COALESCE(MAX(id), 0) FROM predictions").fetchone()[0]
+
+    def stats(self) -> Dict[str, object]:
+        exists = os.path.exists(self.path)
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            # COUNT(*) scans the whole table; /api/status is polled by the dashboard
+            'rows': self.max_id() if exists else 0,
+            'size_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the SQLite prediction store")
+    parser.add_argument('--db', default=os.environ.get('PREDICTION_DB_PATH', 'logs/predictions.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='import a CSV prediction log')
+    import_parser.add_argument('csv_path')
+    import_parser.add_argument('--force', action='store_true', help='import again even if already imported')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    store = PredictionStore(args.db)
+    if args.command == 'import':
+        imported = store.import_csv(args.csv_path, force=args.force)
+        print(f"✅ Imported {imported} rows; {store.count()} predictions in {args.db}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
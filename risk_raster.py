@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Precomputed national flood-risk raster with constant-time coordinate lookup.
+
+A background job evaluates the coordinate model on a regular lat/lon grid over
+Bangladesh and stores each layer as a ``.npy`` file that workers memory-map.
+Map clicks then read four grid cells and interpolate bilinearly instead of
+recomputing the model.
+
+Rasters are keyed by a weather epoch (an identifier of the station weather the
+rainfall layers were built from), one directory per epoch::
+
+    data/risk_raster/<epoch>-<resolution>/meta.json, risk.npy, rainfall.npy, ...
+
+Every worker polls the epoch; the first to see a new one builds it under a file
+lock and the others map the finished directory. Only the newest ``keep``
+rasters are kept on disk.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builds are harmless, just wasted work
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# (min_lat, max_lat, min_lon, max_lon)
+BANGLADESH_BOUNDS = (20.5, 26.7, 88.0, 92.8)
+
+
+def grid_axes(bounds: Tuple[float, float, float, float], resolution: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitudes and longitudes of the grid nodes, edges included"""
+    min_lat, max_lat, min_lon, max_lon = bounds
+    n_lat = int(round((max_lat - min_lat) / resolution)) + 1
+    n_lon = int(round((max_lon - min_lon) / resolution)) + 1
+    return min_lat + np.arange(n_lat) * resolution, min_lon + np.arange(n_lon) * resolution
+
+
+class RiskRaster:
+    """One built raster: memory-mapped layers plus bilinear sampling"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.epoch = self.meta['epoch']
+        self.resolution = float(self.meta['resolution'])
+        self.min_lat, self.max_lat, self.min_lon, self.max_lon = self.meta['bounds']
+        self.layers = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                       for name in self.meta['layers']}
+        self.shape = tuple(self.meta['shape'])
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon
+
+    def has_layer(self, layer: str) -> bool:
+        return layer in self.layers
+
+    def sample(self, layer: str, lat: float, lon: float) -> float:
+        """Bilinear value of one layer at a point inside the bounds"""
+        grid = self.layers[layer]
+        y = min(max((lat - self.min_lat) / self.resolution, 0.0), self.shape[0] - 1.0)
+        x = min(max((lon - self.min_lon) / self.resolution, 0.0), self.shape[1] - 1.0)
+        i, j = min(int(y), self.shape[0] - 2), min(int(x), self.shape[1] - 2)
+        fy, fx = y - i, x - j
+        top = float(grid[i, j]) * (1 - fx) + float(grid[i, j + 1]) * fx
+        bottom = float(grid[i + 1, j]) * (1 - fx) + float(grid[i + 1, j + 1]) * fx
+        return top * (1 - fy) + bottom * fy
+
+    def sample_many(self, layer: str, lats, lons) -> np.ndarray:
+        """Vectorized bilinear sampling; points outside the bounds are NaN"""
+        grid = self.layers[layer]
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        inside = (lats >= self.min_lat) & (lats <= self.max_lat) & (lons >= self.min_lon) & (lons <= self.max_lon)
+        y = np.clip((lats - self.min_lat) / self.resolution, 0.0, self.shape[0] - 1.0)
+        x = np.clip((lons - self.min_lon) / self.resolution, 0.0, self.shape[1] - 1.0)
+        i = np.minimum(y.astype(np.int64), self.shape[0] - 2)
+        j = np.minimum(x.astype(np.int64), self.shape[1] - 2)
+        fy, fx = y - i, x - j
+        top = grid[i, j] * (1 - fx) + grid[i, j + 1] * fx
+        bottom = grid[i + 1, j] * (1 - fx) + grid[i + 1, j + 1] * fx
+        return np.where(inside, top * (1 - fy) + bottom * fy, np.nan)
+
+    def info(self) -> Dict[str, object]:
+        return {
+            'epoch': self.epoch,
+            'resolution': self.resolution,
+            'shape': list(self.shape),
+            'layers': list(self.layers),
+            'built_at': self.meta.get('built_at'),
+            'build_seconds': self.meta.get('build_seconds')
+        }
+
+
+def build_raster(path: str, epoch: str, layers_fn: Callable[[np.ndarray, np.ndarray], Dict[str, np.ndarray]],
+                 bounds: Tuple[float, float, float, float], resolution: float) -> str:
+    """Evaluate ``layers_fn`` over the grid and write it to ``path`` atomically"""
+    started = time.time()
+    lat_axis, lon_axis = grid_axes(bounds, resolution)
+    lon_grid, lat_grid = np.meshgrid(lon_axis, lat_axis)
+    layers = layers_fn(lat_grid, lon_grid)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, values in layers.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"),
+                np.ascontiguousarray(values, dtype=np.float32).reshape(lat_grid.shape))
+    meta = {
+        'epoch': epoch,
+        'bounds': list(bounds),
+        'resolution': resolution,
+        'shape': list(lat_grid.shape),
+        'layers': list(layers),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'build_seconds': round(time.time() - started, 3)
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    os.rename(tmp_path, path)
+    return path
+
+
+class RiskRasterService:
+    """Keeps this process mapped to the raster for the current weather epoch"""
+
+    def __init__(self, root: str, layers_fn: Callable[[np.ndarray, np.ndarray], Dict[str, np.ndarray]],
+                 epoch_fn: Callable[[], str], bounds: Tuple[float, float, float, float] = BANGLADESH_BOUNDS,
+                 resolution: float = 0.01, refresh_seconds: float = 60.0, keep: int = 3):
+        self.root = root
+        self.layers_fn = layers_fn
+        self.epoch_fn = epoch_fn
+        self.bounds = tuple(bounds)
+        self.resolution = float(resolution)
+        self.refresh_seconds = max(1.0, float(refresh_seconds))
+        self.keep = max(1, int(keep))
+
+        self.current = None
+        self.builds = 0
+        self.loads = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def raster_path(self, epoch: str) -> str:
+        return os.path.join(self.root, f"{epoch}-{self.resolution:g}")
+
+    def _matches(self, path: str, epoch: str) -> bool:
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get('epoch') == epoch and tuple(meta.get('bounds', ())) == self.bounds
+
+    def refresh(self) -> bool:
+        """Map (building first if needed) the raster for the current epoch; True if it changed"""
+        epoch = self.epoch_fn()
+        if self.current is not None and self.current.epoch == epoch:
+            return False
+        with self._lock:
+            if self.current is not None and self.current.epoch == epoch:
+                return False
+            path = self.raster_path(epoch)
+            if not self._matches(path, epoch):
+                self._build(path, epoch)
+            self.current = RiskRaster(path)
+            self.loads += 1
+            self._prune()
+            return True
+
+    def _build(self, path: str, epoch: str) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        lock_fd = os.open(os.path.join(self.root, '.build.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            # Another worker may have built it while we waited
+            if self._matches(path, epoch):
+                return
+            shutil.rmtree(path, ignore_errors=True)
+            build_raster(path, epoch, self.layers_fn, self.bounds, self.resolution)
+            self.builds += 1
+            logger.info(f"Built risk raster {os.path.basename(path)}")
+        finally:
+            os.close(lock_fd)
+
+    def _prune(self) -> None:
+        try:
+            entries = [os.path.join(self.root, name) for name in os.listdir(self.root)
+                       if not name.startswith('.') and not name.endswith('.tmp')]
+        except OSError:
+            return
+        entries = [path for path in entries if os.path.isdir(path)]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.keep:]:
+            if self.current is None or path != self.current.path:
+                # Other workers that still map it keep their open mapping
+                shutil.rmtree(path, ignore_errors=True)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def start(self) -> bool:
+        """Start the refresh thread in this process (idempotent; call again after fork)"""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='risk-raster', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.error(f"Risk raster refresh failed: {e}")
+            self._stop.wait(self.refresh_seconds)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'root': self.root,
+            'running': self.running,
+            'resolution': self.resolution,
+            'refresh_seconds': self.refresh_seconds,
+            'current': self.current.info() if self.current is not None else None,
+            'builds': self.builds,
+            'loads': self.loads,
+            'errors': self.errors,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+XYZ map tiles of flood risk.
+
+Each tile is 256x256 pixels in Web Mercator. The centre of every pixel is
+converted to lat/lon and the whole grid goes through a vectorized risk function
+in one call, so a tile costs about as much as a single coordinate prediction.
+Pixels outside the model's bounds are transparent.
+
+Tiles are PNGs encoded with zlib (no imaging library needed in production) and
+cached on disk under the weather epoch they were rendered for::
+
+    data/tiles/<epoch>-<style>/<z>/<x>/<y>.png
+
+A new epoch starts a new directory; only the newest ``keep`` are kept.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import struct
+import zlib
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+
+# (risk, (r, g, b, a)) stops, interpolated linearly and spread over the range the
+# weighted coordinate risk takes across Bangladesh (about 0.015-0.055)
+RISK_COLORMAP = (
+    (0.015, (26, 152, 80, 70)),
+    (0.025, (145, 207, 96, 110)),
+    (0.035, (254, 224, 139, 150)),
+    (0.045, (252, 141, 89, 185)),
+    (0.055, (215, 48, 39, 220))
+)
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(rgba: np.ndarray, level: int = 6) -> bytes:
+    """PNG bytes for an (height, width, 4) uint8 RGBA array
+
+    Every scanline uses the "Up" filter (difference from the row above), which
+    turns the smooth gradients of a heatmap into long runs of zeros for zlib.
+    """
+    rgba = np.ascontiguousarray(rgba, dtype=np.uint8)
+    height, width = rgba.shape[:2]
+    rows = rgba.reshape(height, width * 4)
+    filtered = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    filtered[0, 1:] = rows[0]
+    filtered[1:, 1:] = rows[1:] - rows[:-1]  # uint8 arithmetic wraps mod 256 as PNG expects
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)  # 8-bit RGBA
+    return (_PNG_SIGNATURE + _png_chunk(b'IHDR', header) +
+            _png_chunk(b'IDAT', zlib.compress(filtered.tobytes(), level)) +
+            _png_chunk(b'IEND', b''))
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) covered by a tile"""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), lat(y), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+def tile_pixel_coordinates(z: int, x: int, y: int, size: int = TILE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude grids (size x size) of the pixel centres of a tile"""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    lon_grid, lat_grid = np.meshgrid(lons, lats)
+    return lat_grid, lon_grid
+
+
+def colorize(values: np.ndarray, colormap=RISK_COLORMAP) -> np.ndarray:
+    """RGBA uint8 image for a grid of values; NaN is transparent"""
+    stops = np.array([stop for stop, _ in colormap])
+    colors = np.array([color for _, color in colormap], dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    clipped = np.clip(np.where(missing, stops[0], values), stops[0], stops[-1])
+
+    rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+    for channel in range(4):
+        rgba[..., channel] = np.rint(np.interp(clipped, stops, colors[:, channel]))
+    rgba[missing] = 0
+    return rgba
+
+
+class TileCache:
+    """PNG tiles on disk keyed by (epoch, z, x, y)"""
+
+    def __init__(self, root: str, keep: int = 3):
+        self.root = root
+        self.keep = max(1, int(keep))
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._epochs = set()
+
+    def path(self, epoch: str, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, epoch, str(z), str(x), f"{y}.png")
+
+    def get(self, epoch: str, z: int, x: int, y: int) -> Optional[bytes]:
+        try:
+            with open(self.path(epoch, z, x, y), 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, epoch: str, z: int, x: int, y: int, data: bytes) -> None:
+        path = self.path(epoch, z, x, y)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Concurrent renders of the same tile write identical bytes; rename keeps readers whole
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.writes += 1
+        except OSError as e:
+            logger.warning(f"Could not cache tile {epoch}/{z}/{x}/{y}: {e}")
+            return
+        if epoch not in self._epochs:
+            self._epochs.add(epoch)
+            self._prune()
+
+    def _prune(self) -> None:
+        try:
+            entries = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+        except OSError:
+            return
+        entries = [path for path in entries if os.path.isdir(path)]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.keep:]:
+            shutil.rmtree(path, ignore_errors=True)
+            self._epochs.discard(os.path.basename(path))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'root': self.root,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class TileRenderer:
+    """Renders (and caches) risk tiles from a vectorized ``risk_fn(lats, lons)``"""
+
+    def __init__(self, risk_fn: Callable[[np.ndarray, np.ndarray], np.ndarray],
+                 bounds: Tuple[float, float, float, float], cache: Optional[TileCache] = None,
+                 cache_max_zoom: int = 12, size: int = TILE_SIZE, colormap=RISK_COLORMAP):
+        self.risk_fn = risk_fn
+        self.bounds = tuple(bounds)
+        self.cache = cache
+        self.cache_max_zoom = int(cache_max_zoom)
+        self.size = int(size)
+        self.colormap = colormap
+        # Cached tiles are only valid for the style they were drawn with
+        self.style = hashlib.sha1(json.dumps([self.size, colormap]).encode()).hexdigest()[:8]
+        self.renders = 0
+        self._empty = None
+
+    def empty_tile(self) -> bytes:
+        if self._empty is None:
+            self._empty = encode_png(np.zeros((self.size, self.size, 4), dtype=np.uint8))
+        return self._empty
+
+    def overlaps(self, z: int, x: int, y: int) -> bool:
+        min_lat, max_lat, min_lon, max_lon = tile_bounds(z, x, y)
+        return not (max_lat < self.bounds[0] or min_lat > self.bounds[1] or
+                    max_lon < self.bounds[2] or min_lon > self.bounds[3])
+
+    def render(self, z: int, x: int, y: int) -> bytes:
+        """Evaluate the risk at every pixel centre of the tile in one vectorized call"""
+        if not self.overlaps(z, x, y):
+            return self.empty_tile()
+        lats, lons = tile_pixel_coordinates(z, x, y, self.size)
+        inside = ((lats >= self.bounds[0]) & (lats <= self.bounds[1]) &
+                  (lons >= self.bounds[2]) & (lons <= self.bounds[3]))
+        values = np.where(inside, self.risk_fn(lats, lons), np.nan)
+        self.renders += 1
+        return encode_png(colorize(values, self.colormap))
+
+    def tile(self, epoch: str, z: int, x: int, y: int) -> bytes:
+        """Cached tile for the given weather epoch, rendering it on a miss"""
+        if self.cache is None or z > self.cache_max_zoom:
+            return self.render(z, x, y)
+        key = f"{epoch}-{self.style}"
+        data = self.cache.get(key, z, x, y)
+        if data is None:
+            data = self.render(z, x, y)
+            self.cache.put(key, z, x, y, data)
+        return data
+
+    def stats(self):
+        return {
+            'renders': self.renders,
+            'style': self.style,
+            'cache_max_zoom': self.cache_max_zoom,
+            'cache': self.cache.stats() if self.cache is not None else None
+        }
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Spatial index over station coordinates.
+
+A ball tree with the haversine metric answers k-nearest and radius queries in
+great-circle kilometres in O(log n) per query, so coordinate lookups keep up
+as the station list grows from a handful of cities to thousands of river
+gauges. Queries accept arrays of points as well as single points.
+"""
+
+from typing import List, Mapping, Tuple
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+# Length of one degree of latitude; used to carry the old degree-based thresholds over to km
+KM_PER_DEGREE = 111.32
+
+
+def degrees_to_km(degrees: float) -> float:
+    return degrees * KM_PER_DEGREE
+
+
+def km_to_degrees(km):
+    return km / KM_PER_DEGREE
+
+
+class StationIndex:
+    """Immutable ball tree over named (lat, lon) stations; build a new one to add stations"""
+
+    def __init__(self, stations: Mapping[str, Tuple[float, float]], leaf_size: int = 40):
+        self.names = list(stations)
+        if not self.names:
+            raise ValueError("StationIndex needs at least one station")
+        self.coordinates = np.array([stations[name] for name in self.names], dtype=np.float64)
+        self._tree = BallTree(np.radians(self.coordinates), metric='haversine', leaf_size=leaf_size)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def query(self, lats, lons, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Distances (km) and station indices of the k nearest stations to each point, nearest first"""
+        points = np.radians(np.column_stack([np.ravel(lats), np.ravel(lons)]).astype(np.float64))
+        distances, indices = self._tree.query(points, k=min(int(k), len(self.names)))
+        return distances * EARTH_RADIUS_KM, indices
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[str, float]]:
+        """[(station, km), ...] for the k nearest stations, nearest first"""
+        distances, indices = self.query(lat, lon, k)
+        return [(self.names[i], float(d)) for d, i in zip(distances[0], indices[0])]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """[(station, km), ...] for stations within ``radius_km``, nearest first"""
+        point = np.radians([[lat, lon]])
+        indices, distances = self._tree.query_radius(point, r=radius_km / EARTH_RADIUS_KM,
+                                                     return_distance=True, sort_results=True)
+        return [(self.names[i], float(d) * EARTH_RADIUS_KM) for d, i in zip(distances[0], indices[0])]
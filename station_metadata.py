@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Validation and cross-worker persistence of admin edits to station metadata.
+
+``validate_station_changes`` checks a PATCH body against the fields the risk
+model reads, so a bad value is rejected before it reaches GEOGRAPHIC_DATA.
+
+``StationOverrides`` keeps every accepted edit in one JSON file::
+
+    {"Sylhet": {"urbanization_factor": 0.9}, ...}
+
+Writers merge under a ``flock`` and rename the file into place, so edits made
+in different gunicorn workers never overwrite each other and readers never see
+a half-written file. Every write is a new inode, so workers notice a newer file
+by its (inode, mtime) and apply it; a restarted worker applies it at import.
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DRAINAGE_QUALITIES = ('Poor', 'Moderate', 'Good')
+
+
+def _number(low: Optional[float] = None, high: Optional[float] = None):
+    def check(value):
+        return (isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+                and (low is None or value >= low) and (high is None or value <= high))
+    return check
+
+
+def _text(value):
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _text_list(value):
+    return isinstance(value, list) and all(_text(item) for item in value)
+
+
+# field -> (check, what a valid value looks like)
+STATION_METADATA_FIELDS = {
+    'elevation': (_number(-20, 1000), 'a number of metres between -20 and 1000'),
+    'distance_to_major_river': (_number(0, 1000), 'a number of km between 0 and 1000'),
+    'drainage_quality': (lambda value: value in DRAINAGE_QUALITIES, f"one of {', '.join(DRAINAGE_QUALITIES)}"),
+    'river_confluence_distance': (_number(0, 1000), 'a number of km between 0 and 1000'),
+    'topography': (_text, 'a non-empty string'),
+    'base_risk_factor': (_number(0, 1), 'a number between 0 and 1'),
+    'annual_rainfall_mm': (_number(0, 20000), 'a number of mm between 0 and 20000'),
+    'flood_history_frequency': (_number(0, 100), 'a number of floods per decade between 0 and 100'),
+    'population_density': (_number(0, 1e6), 'a non-negative number of people per km²'),
+    'urbanization_factor': (_number(0, 1), 'a number between 0 and 1'),
+    'soil_type': (_text, 'a non-empty string'),
+    'river_systems': (_text_list, 'a list of river names')
+}
+
+
+def validate_station_changes(changes: Mapping[str, Any]) -> Dict[str, str]:
+    """Problems with a metadata change, by field; empty when every field is valid"""
+    errors = {}
+    for field, value in changes.items():
+        spec = STATION_METADATA_FIELDS.get(field)
+        if spec is None:
+            errors[field] = 'unknown field'
+        elif not spec[0](value):
+            errors[field] = f"expected {spec[1]}"
+    return errors
+
+
+class StationOverrides:
+    """Accepted station edits in a JSON file shared by every worker"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.loaded_version = None  # version() of the file this process last applied or wrote
+
+    def version(self) -> Optional[Tuple[int, int]]:
+        """(inode, mtime_ns) of the file, or None if there is none yet"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def changed(self) -> bool:
+        version = self.version()
+        return version is not None and version != self.loaded_version
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Every valid override in the file (invalid entries are logged and skipped)"""
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read station overrides {self.path}: {e}")
+            return {}
+
+        overrides = {}
+        for location, changes in (stored.items() if isinstance(stored, dict) else ()):
+            if not isinstance(changes, dict) or validate_station_changes(changes):
+                logger.warning(f"Ignoring invalid station override for {location}")
+                continue
+            overrides[location] = changes
+        return overrides
+
+    def merge(self, location: str, changes: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Add changes for a location to the file and return every override it now holds"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            # Only a caller that had already applied the file can skip re-reading it later
+            up_to_date = self.version() == self.loaded_version
+            overrides = self.load()
+            overrides[location] = {**overrides.get(location, {}), **changes}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(overrides, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            if up_to_date:
+                self.loaded_version = self.version()
+            return overrides
+        finally:
+            os.close(lock_fd)  # also releases the flock
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched multi-station prediction endpoint
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+import app
+
+FEATURE_COLS = ['rainfall_1day', 'rainfall_3day', 'rainfall_7day',
+                'water_level_lag1', 'water_level_trend', 'is_monsoon',
+                'elevation', 'river_distance', 'geographic_risk']
+
+
+def use_nine_feature_model(monkeypatch):
+    """Swap in a small 9-feature forest so the ML path runs"""
+    rng = np.random.RandomState(0)
+    X = rng.gamma(2, 3, (400, 9))
+    y = (X[:, 1] + X[:, 3] > 12).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0)
+    model.fit(scaler.transform(X), y)
+
+    monkeypatch.setattr(app, 'rf_model', model)
+    monkeypatch.setattr(app, 'scaler', scaler)
+    monkeypatch.setattr(app, 'feature_cols', FEATURE_COLS)
+    monkeypatch.setattr(app, 'log_prediction', lambda *args: None)
+    return model, scaler
+
+
+def test_batch_scores_all_stations_in_one_call(monkeypatch):
+    model, scaler = use_nine_feature_model(monkeypatch)
+    batch_sizes = []
+    real_predict = app.predict_flood_probabilities
+
+    def counting_predict(features):
+        batch_sizes.append(len(features))
+        return real_predict(features)
+
+    monkeypatch.setattr(app, 'predict_flood_probabilities', counting_predict)
+
+    response = app.app.test_client().get('/api/predict/batch')
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert batch_sizes == [len(app.LOCATIONS)]
+    assert set(data['predictions']) == set(app.LOCATIONS)
+
+    # Each station's probability is what the forest gives for its own row
+    for prediction in data['predictions'].values():
+        debug = prediction['model_info']['debug']
+        row = np.array([[debug['features_used'][name] for name in FEATURE_COLS]])
+        expected = model.predict_proba(scaler.transform(row))[0, 1]
+        assert abs(debug['ml_risk_probability'] - expected) < 1e-12
+
+
+def test_batch_matches_single_station_payload(monkeypatch):
+    use_nine_feature_model(monkeypatch)
+    weather = pd.DataFrame({'date': [f'2025-07-{i + 1:02d}' for i in range(7)],
+                            'rainfall': [0.0, 2.5, 8.0, 14.2, 3.1, 0.4, 6.6]})
+    monkeypatch.setattr(app, 'fetch_real_weather_data', lambda location, days=7: weather.copy())
+    client = app.app.test_client()
+
+    np.random.seed(42)
+    single = client.get('/api/predict/Sylhet').get_json()
+    np.random.seed(42)
+    batch = client.get('/api/predict/batch?locations=Sylhet').get_json()['predictions']['Sylhet']
+
+    for key in ('risk_probability', 'current_water_level', 'status', 'flood_risk_profile'):
+        assert batch[key] == single[key]
+    assert batch['model_info']['debug']['ml_risk_probability'] == \
+        single['model_info']['debug']['ml_risk_probability']
+
+
+def test_flat_engine_gives_same_probabilities(monkeypatch):
+    model, scaler = use_nine_feature_model(monkeypatch)
+    monkeypatch.setattr(app, 'INFERENCE_ENGINE', 'flat')
+    monkeypatch.setattr(app, 'flat_forest', app.build_inference_engine(model))
+    assert app.flat_forest is not None
+
+    features = np.random.RandomState(3).gamma(2, 3, (5, 9))
+    expected = model.predict_proba(scaler.transform(features))[:, 1]
+    assert np.array_equal(app.predict_flood_probabilities(features), expected)
+
+
+def test_compiled_engine_skips_scaler(monkeypatch):
+    model, scaler = use_nine_feature_model(monkeypatch)
+    monkeypatch.setattr(app, 'INFERENCE_ENGINE', 'compiled')
+    monkeypatch.setattr(app, 'flat_forest', app.build_inference_engine(model, scaler))
+    assert app.flat_forest is not None and app.flat_forest.raw_features
+
+    features = np.random.RandomState(4).gamma(2, 3, (5, 9))
+    expected = model.predict_proba(scaler.transform(features))[:, 1]
+    monkeypatch.setattr(app, 'scaler', None)
+    assert np.array_equal(app.predict_flood_probabilities(features), expected)
+
+
+def test_prediction_memo_skips_forest_for_near_identical_rows(monkeypatch):
+    model, scaler = use_nine_feature_model(monkeypatch)
+    monkeypatch.setattr(app, 'PREDICTION_MEMO_ENABLED', True)
+    monkeypatch.setattr(app, 'prediction_memo', app.QuantizedMemo(0.01, 64))
+
+    features = np.round(np.random.RandomState(5).gamma(2, 3, (4, 9)), 2) + 0.001
+    first = app.predict_flood_probabilities(features)
+    snapped = np.round(features / 0.01) * 0.01
+    assert np.array_equal(first, model.predict_proba(scaler.transform(snapped))[:, 1])
+
+    def forest_must_not_run(*args, **kwargs):
+        raise AssertionError('forest evaluated for a memoized row')
+
+    monkeypatch.setattr(model, 'predict_proba', forest_must_not_run)
+    assert np.array_equal(app.predict_flood_probabilities(features + 0.001), first)
+    assert app.prediction_memo.stats()['hits'] == 4
+
+
+def test_batch_reports_unknown_locations(monkeypatch):
+    monkeypatch.setattr(app, 'log_prediction', lambda *args: None)
+    response = app.app.test_client().post('/api/predict/batch',
+                                          json={'locations': ['Dhaka', 'Atlantis', 'Dhaka']})
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert list(data['predictions']) == ['Dhaka']
+    assert data['errors'] == {'Atlantis': 'Location not found'}
+
+
+def test_batch_rejects_malformed_location_lists():
+    client = app.app.test_client()
+    for body in ({'locations': [['Dhaka']]}, {'locations': ['Dhaka', {'name': 'Sylhet'}]},
+                 {'locations': 'Dhaka'}, ['Dhaka']):
+        response = client.post('/api/predict/batch', json=body)
+        assert response.status_code == 400, body
+        assert 'error' in response.get_json()
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_batch_prediction.py")
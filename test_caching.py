@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-process caching primitives
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from caching import QuantizedMemo, SingleFlight, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_hit_and_expiry():
+    """Entries are served until the TTL elapses"""
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=60, max_entries=4, clock=clock)
+
+    assert cache.get('Dhaka') is None
+    cache.set('Dhaka', 1.5)
+    assert cache.get('Dhaka') == 1.5
+
+    clock.now = 61
+    assert cache.get('Dhaka') is None
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['expirations'] == 1
+    assert stats['size'] == 0
+
+
+def test_ttl_cache_lru_eviction():
+    """The least recently used entry is evicted when the cache is full"""
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set('Dhaka', 1)
+    cache.set('Sylhet', 2)
+    cache.get('Dhaka')  # Sylhet is now least recently used
+    cache.set('Rangpur', 3)
+
+    assert cache.get('Sylhet') is None
+    assert cache.get('Dhaka') == 1
+    assert cache.get('Rangpur') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_serves_stale_within_window():
+    """Expired entries stay available to get_stale until the stale window closes"""
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=60, max_entries=4, max_stale_seconds=600, clock=clock)
+    cache.set('Dhaka', 'observation')
+
+    clock.now = 120
+    assert cache.get('Dhaka') is None
+    assert cache.get_stale('Dhaka') == ('observation', 120)
+    assert cache.stats()['stale_hits'] == 1
+
+    clock.now = 700
+    assert cache.get_stale('Dhaka') is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_counts_stale_entry_once():
+    """Repeated lookups of a stale entry count one expiry; each is a miss served stale"""
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=60, max_entries=4, max_stale_seconds=600, clock=clock)
+    cache.set('Dhaka', 'observation')
+    assert cache.get('Dhaka') == 'observation'
+
+    clock.now = 120
+    for _ in range(5):
+        assert cache.get('Dhaka') is None
+        assert cache.get_stale('Dhaka')[0] == 'observation'
+
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['misses'] == 5
+    assert stats['stale_hits'] == 5 and stats['hit_rate'] == round(1 / 6, 4)
+
+    # A caller that never falls back to get_stale (blocking mode) still sees misses
+    assert cache.get('Dhaka') is None
+    assert cache.stats()['misses'] == 6 and cache.stats()['stale_hits'] == 5
+
+    # A refreshed entry that goes stale again is a new expiry
+    cache.set('Dhaka', 'newer')
+    clock.now = 200
+    cache.get('Dhaka')
+    assert cache.stats()['expirations'] == 2
+
+
+def test_ttl_cache_disabled_with_zero_ttl():
+    """A zero TTL turns the cache into a pass-through"""
+    cache = TTLCache(ttl_seconds=0)
+    cache.set('Dhaka', 1)
+    assert cache.get('Dhaka') is None
+    assert cache.stats()['enabled'] is False
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Concurrent callers for one key share a single execution"""
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(2)
+        return 'weather'
+
+    threads = [threading.Thread(target=lambda: results.append(flights.do('Dhaka', slow_fetch)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flights.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['weather'] * 5
+    assert flights.stats() == {'executions': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_single_flight_propagates_errors_and_resets():
+    """A failed flight raises for its caller and does not block the next one"""
+    flights = SingleFlight()
+
+    def failing_fetch():
+        raise RuntimeError('upstream down')
+
+    try:
+        flights.do('Dhaka', failing_fetch)
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+
+    assert flights.do('Dhaka', lambda: 'recovered') == 'recovered'
+
+
+def test_quantized_memo_skips_repeat_cells():
+    memo = QuantizedMemo(quantum=0.1, max_entries=8)
+    calls = []
+
+    def row_sums(rows):
+        calls.append(len(rows))
+        return rows.sum(axis=1)
+
+    first = memo.lookup(np.array([[1.01, 2.0], [5.0, 5.0]]), row_sums)
+    # 1.04 lands in the same 0.1 cell as 1.01, so only the new row is computed
+    second = memo.lookup(np.array([[1.04, 2.0], [7.0, 0.0]]), row_sums)
+
+    assert calls == [2, 1]
+    assert np.allclose(first, [3.0, 10.0])
+    assert second[0] == first[0]
+    assert memo.stats()['hits'] == 1
+    assert memo.stats()['hit_rate'] == 0.25
+
+
+def test_quantized_memo_namespaces_and_eviction():
+    memo = QuantizedMemo(quantum=1.0, max_entries=2)
+    memo.lookup(np.array([[1.0]]), lambda rows: rows[:, 0], namespace='v1')
+    assert memo.lookup(np.array([[1.0]]), lambda rows: rows[:, 0] * 10, namespace='v2')[0] == 10.0
+
+    memo.lookup(np.array([[2.0]]), lambda rows: rows[:, 0], namespace='v2')
+    assert len(memo) == 2
+    assert memo.stats()['evictions'] == 1
+
+
+if __name__ == "__main__":
+    test_ttl_cache_hit_and_expiry()
+    test_ttl_cache_lru_eviction()
+    test_ttl_cache_serves_stale_within_window()
+    test_ttl_cache_disabled_with_zero_ttl()
+    test_single_flight_coalesces_concurrent_calls()
+    test_single_flight_propagates_errors_and_resets()
+    test_quantized_memo_skips_repeat_cells()
+    test_quantized_memo_namespaces_and_eviction()
+    print("✅ Caching tests passed")
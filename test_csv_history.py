@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for tail-only CSV history reads and the per-location offset sidecar
+"""
+
+import io
+import os
+
+import pandas as pd
+
+import app
+from csv_history import CsvHistoryIndex, iter_lines_backward
+from history_buffer import RecentHistory
+from prediction_log import PredictionLogWriter
+
+COLUMNS = ['timestamp', 'location', 'risk_probability']
+LOCATIONS = ['Dhaka', 'Sylhet', 'Rangpur']
+
+
+def write_log(path, rows, header=True):
+    with open(path, 'a') as f:
+        if header:
+            f.write(','.join(COLUMNS) + '\n')
+        for i, location in rows:
+            f.write(f'2025-01-01 00:00:00,{location},{i}\n')
+
+
+def expected_tail(path, location, limit):
+    df = pd.read_csv(path, dtype=str)
+    return df[df['location'] == location].tail(limit).to_dict('records')
+
+
+def test_iter_lines_backward_matches_forward_order():
+    data = b'header\n' + b''.join(f'line-{i}\n'.encode() for i in range(200))
+    f = io.BytesIO(data)
+    lines = [line for _, line in iter_lines_backward(f, len(data), block_size=7)]
+    assert lines[::-1] == data.split(b'\n')[:-1]
+    for offset, line in iter_lines_backward(f, len(data), block_size=13):
+        assert data[offset:offset + len(line)] == line
+
+
+def test_history_matches_full_parse(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    # Sylhet only appears early in the file, Rangpur never
+    write_log(path, [(i, 'Sylhet') for i in range(40)] + [(i, LOCATIONS[i % 2]) for i in range(1000)])
+    index = CsvHistoryIndex(path, keep=16)
+
+    for location in LOCATIONS:
+        for limit in (1, 30):
+            assert index.history(location, limit) == expected_tail(path, location, limit)
+
+
+def test_appends_are_indexed_without_rescanning(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(i, LOCATIONS[i % 3]) for i in range(300)])
+    index = CsvHistoryIndex(path, keep=32)
+    writer = PredictionLogWriter(path, COLUMNS, max_batch=10, on_append=index.refresh)
+
+    index.history('Dhaka', 30)
+    scans = index.backward_scans
+    for i in range(300, 360):
+        writer.write({'timestamp': '2025-01-02 00:00:00', 'location': LOCATIONS[i % 3], 'risk_probability': i})
+    writer.flush()
+
+    assert index.history('Dhaka', 30) == expected_tail(path, 'Dhaka', 30)
+    assert index.backward_scans == scans
+    writer.close()
+
+    # A new process picks the index up from the sidecar
+    reopened = CsvHistoryIndex(path, keep=32)
+    assert reopened.history('Dhaka', 30) == expected_tail(path, 'Dhaka', 30)
+    assert reopened.backward_scans == 0
+
+
+def test_catches_up_with_appends_from_other_writers(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(i, 'Dhaka') for i in range(50)])
+    index = CsvHistoryIndex(path)
+    index.history('Dhaka')
+
+    write_log(path, [(i, 'Dhaka') for i in range(50, 55)], header=False)
+    with open(path, 'a') as f:
+        f.write('2025-01-01 00:00:00,Dhaka')  # half-written row is ignored
+    rows = index.history('Dhaka', 5)
+    assert [row['risk_probability'] for row in rows] == ['50', '51', '52', '53', '54']
+
+
+def test_rewritten_log_resets_index(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(i, 'Dhaka') for i in range(100)])
+    index = CsvHistoryIndex(path)
+    index.history('Dhaka')
+
+    os.remove(path)
+    write_log(path, [(i, 'Sylhet') for i in range(10)] + [(i, 'Dhaka') for i in range(500, 520)])
+    assert index.history('Dhaka', 30) == expected_tail(path, 'Dhaka', 30)
+    assert index.history('Sylhet', 30) == expected_tail(path, 'Sylhet', 30)
+
+
+def test_unknown_locations_do_not_grow_the_index(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(i, LOCATIONS[i % 3]) for i in range(300)])
+    index = CsvHistoryIndex(path)
+
+    for name in ('Atlantis', 'Gotham', 'Atlantis'):
+        assert index.history(name, 30) == []
+    assert index.stats()['locations'] == 0
+    assert index.history('Sylhet', 30) == expected_tail(path, 'Sylhet', 30)
+    assert index.stats()['locations'] == 1
+
+
+def test_known_station_without_rows_is_scanned_once(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(i, LOCATIONS[i % 3]) for i in range(300)])
+    index = CsvHistoryIndex(path, locations=LOCATIONS + ['Chittagong'])
+
+    for _ in range(3):
+        assert index.history('Chittagong', 30) == []
+    assert index.backward_scans == 1
+
+    # Rows appended later are still picked up forward
+    write_log(path, [(300, 'Chittagong')], header=False)
+    assert [row['risk_probability'] for row in index.history('Chittagong', 30)] == ['300']
+    assert index.backward_scans == 1
+
+
+def test_history_endpoint_reads_csv_index(tmp_path, monkeypatch):
+    path = str(tmp_path / 'predictions.csv')
+    with open(path, 'w') as f:
+        f.write(','.join(app.PREDICTION_LOG_COLUMNS) + '\n')
+        for i in range(100):
+            f.write(f'2025-01-01 00:00:00,Dhaka,2025-01-01,{i},4.0,5.5,0,0.{i:02d},0.9,LOW RISK\n')
+    monkeypatch.setattr(app, 'PREDICTION_STORE', 'csv')
+    monkeypatch.setattr(app, 'prediction_history_index', CsvHistoryIndex(path))
+    monkeypatch.setattr(app, 'recent_history', RecentHistory(app.read_history_from_disk))
+
+    history = app.app.test_client().get('/api/history/Dhaka').get_json()['history']
+    assert len(history) == 30
+    assert history[0]['rainfall'] == 70.0 and history[-1]['probability'] == 0.99
+
+    # Unknown names are rejected before they reach the index
+    response = app.app.test_client().get('/api/history/Atlantis')
+    assert response.status_code == 404
+    assert app.prediction_history_index.stats()['locations'] == 1
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_csv_history.py")
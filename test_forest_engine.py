@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the flattened NumPy random-forest evaluator
+"""
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from forest_engine import FlatForest, compile_forest, verify_flat_forest
+
+
+def train_forest(**params):
+    rng = np.random.RandomState(1)
+    X = rng.gamma(2, 3, (1500, 9))
+    y = ((X[:, 1] + X[:, 3] > 12) | (X[:, 8] > 9)).astype(int)
+    model = RandomForestClassifier(random_state=42, **params).fit(X, y)
+    return model, rng.gamma(2, 3, (2000, 9))
+
+
+def test_probabilities_identical_to_sklearn():
+    model, X = train_forest(n_estimators=200, max_depth=12, min_samples_split=5,
+                            min_samples_leaf=3, max_features='sqrt', class_weight='balanced')
+    flat = FlatForest.from_sklearn(model)
+
+    assert np.array_equal(flat.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(flat.predict_positive(X[:1]), model.predict_proba(X[:1])[:, 1])
+
+
+def test_unbounded_depth_forest():
+    model, X = train_forest(n_estimators=30)
+    flat = FlatForest.from_sklearn(model)
+
+    assert flat.max_depth == max(e.tree_.max_depth for e in model.estimators_)
+    assert verify_flat_forest(model, flat, X)
+
+
+def test_shipped_model_artifact():
+    """The forest in models/rf_flood_model.pkl exports without loss"""
+    model = joblib.load('models/rf_flood_model.pkl')
+    flat = FlatForest.from_sklearn(model)
+    X = np.random.RandomState(0).normal(0, 2, (500, model.n_features_in_))
+
+    assert np.array_equal(flat.predict_proba(X), model.predict_proba(X))
+
+
+def test_rejects_wrong_feature_count():
+    model, _ = train_forest(n_estimators=5)
+    flat = FlatForest.from_sklearn(model)
+    try:
+        flat.predict_proba(np.zeros((1, 6)))
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+
+def test_folded_scaler_matches_scaled_sklearn():
+    rng = np.random.RandomState(2)
+    X = rng.gamma(2, 3, (1500, 9))
+    y = ((X[:, 1] + X[:, 3] > 12) | (X[:, 8] > 9)).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=50, max_depth=10, random_state=42).fit(scaler.transform(X), y)
+    compiled = compile_forest(model, scaler)
+
+    assert compiled.raw_features
+    X_test = rng.gamma(2, 3, (2000, 9))
+    assert np.array_equal(compiled.predict_proba(X_test), model.predict_proba(scaler.transform(X_test)))
+
+    # Inputs sitting exactly on (and one ulp either side of) each naively folded threshold
+    tree = model.estimators_[0].tree_
+    rows = []
+    for node in np.flatnonzero(tree.children_left != -1):
+        f = tree.feature[node]
+        raw = tree.threshold[node] * scaler.scale_[f] + scaler.mean_[f]
+        for value in (np.nextafter(raw, -np.inf), raw, np.nextafter(raw, np.inf)):
+            row = scaler.mean_.copy()
+            row[f] = value
+            rows.append(row)
+    assert verify_flat_forest(model, compiled, np.array(rows), scaler=scaler)
+
+
+def test_save_and_memory_map(tmp_path):
+    model, X = train_forest(n_estimators=40, max_depth=8)
+    FlatForest.from_sklearn(model).save(str(tmp_path))
+    loaded = FlatForest.load(str(tmp_path))
+
+    assert isinstance(loaded.threshold, np.memmap)
+    assert loaded.stats()['memory_mapped']
+    assert np.array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+
+if __name__ == "__main__":
+    test_probabilities_identical_to_sklearn()
+    test_unbounded_depth_forest()
+    test_shipped_model_artifact()
+    test_rejects_wrong_feature_count()
+    test_folded_scaler_matches_scaled_sklearn()
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_save_and_memory_map(tmp)
+    print("✅ Flat forest engine tests passed")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-location recent history ring buffers
+"""
+
+import threading
+
+import app
+from history_buffer import RecentHistory, RingBuffer
+
+
+def point(i):
+    return {'date': f'2025-01-{1 + i % 28:02d}', 'rainfall': float(i), 'water_level': 4.0,
+            'prediction': i % 2, 'probability': i / 100}
+
+
+class FakeDisk:
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = []
+
+    def __call__(self, location, limit):
+        self.reads.append((location, limit))
+        return [point(i) for i in range(self.rows)][-limit:]
+
+
+def test_ring_buffer_wraps_around():
+    buffer = RingBuffer(4)
+    for i in range(10):
+        buffer.append(('', float(i), 0.0, 0, 0.0))
+    assert buffer.size == 4
+    assert list(buffer.last(4)['rainfall']) == [6.0, 7.0, 8.0, 9.0]
+    assert list(buffer.last(2)['rainfall']) == [8.0, 9.0]
+    assert len(buffer.last(10)) == 4
+
+
+def test_serves_from_memory_after_one_fill():
+    disk = FakeDisk(100)
+    history = RecentHistory(disk, capacity=64, max_age_seconds=0)
+
+    first = history.latest('Dhaka', 30)
+    assert first == [point(i) for i in range(70, 100)]
+    for _ in range(5):
+        assert history.latest('Dhaka', 30) == first
+    assert disk.reads == [('Dhaka', 64)]
+    assert history.stats()['hits'] == 5
+
+
+def test_appends_show_up_without_disk_reads():
+    disk = FakeDisk(10)
+    history = RecentHistory(disk, capacity=16, max_age_seconds=0)
+    history.append('Sylhet', point(99))  # not loaded yet: comes from disk later
+    history.latest('Sylhet', 5)
+
+    for i in range(100, 110):
+        history.append('Sylhet', point(i))
+    latest = history.latest('Sylhet', 16)
+    assert [p['rainfall'] for p in latest] == [float(i) for i in range(4, 10)] + [float(i) for i in range(100, 110)]
+    assert len(disk.reads) == 1
+
+
+def test_older_ranges_and_expiry_go_to_disk():
+    disk = FakeDisk(500)
+    history = RecentHistory(disk, capacity=64, max_age_seconds=0.001)
+
+    assert len(history.latest('Dhaka', 200)) == 200
+    assert disk.reads == [('Dhaka', 200)]
+
+    history.latest('Dhaka', 30)
+    history._filled_at['Dhaka'] -= 1
+    history.latest('Dhaka', 30)
+    assert disk.reads[1:] == [('Dhaka', 64), ('Dhaka', 64)]
+
+
+def test_slow_fill_does_not_block_other_locations():
+    reading, release = threading.Event(), threading.Event()
+    disk = FakeDisk(10)
+
+    def load(location, limit):
+        if location == 'Sylhet':
+            reading.set()
+            assert release.wait(5)
+        return disk(location, limit)
+
+    history = RecentHistory(load, capacity=16, max_age_seconds=0)
+    history.latest('Dhaka', 5)
+    slow = threading.Thread(target=history.latest, args=('Sylhet', 5))
+    slow.start()
+    assert reading.wait(5)
+
+    # Dhaka is served (and Bahadurabad filled) while Sylhet's disk read is stuck
+    assert history.latest('Dhaka', 5) == [point(i) for i in range(5, 10)]
+    assert history.latest('Bahadurabad', 5) == [point(i) for i in range(5, 10)]
+    # A point logged during Sylhet's fill is not lost when its buffer is swapped in
+    history.append('Sylhet', point(42))
+    release.set()
+    slow.join(5)
+    assert history.latest('Sylhet', 2) == [point(9), point(42)]
+
+
+def test_history_endpoint_uses_buffer(monkeypatch):
+    disk = FakeDisk(80)
+    monkeypatch.setattr(app, 'recent_history', RecentHistory(disk, capacity=64, max_age_seconds=0))
+    monkeypatch.setattr(app, 'read_history_from_disk', disk)
+    monkeypatch.setattr(app, 'PREDICTION_LOG_MODE', 'async')
+    monkeypatch.setattr(app.prediction_log, 'write', lambda record: True)
+    client = app.app.test_client()
+
+    assert len(client.get('/api/history/Dhaka').get_json()['history']) == 30
+    app.log_prediction('Dhaka', {'risk_probability': 0.77, 'flood_risk': 1})
+    history = client.get('/api/history/Dhaka').get_json()['history']
+    assert history[-1]['probability'] == 0.77 and history[-1]['prediction'] == 1
+    assert disk.reads == [('Dhaka', 64)]
+
+    assert len(client.get('/api/history/Dhaka?limit=100').get_json()['history']) == 80
+    assert client.get('/api/history/Atlantis').status_code == 404
+    assert disk.reads[1:] == [('Dhaka', 100)]
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_history_buffer.py")
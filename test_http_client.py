@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared pooled HTTP session
+"""
+
+import http_client
+
+
+def test_session_is_reused_within_process():
+    """Repeated calls return the same keep-alive session"""
+    assert http_client.get_session() is http_client.get_session()
+
+
+def test_session_rebuilt_after_fork(monkeypatch):
+    """A forked worker (different pid) gets its own session"""
+    parent_session = http_client.get_session()
+    monkeypatch.setattr(http_client.os, 'getpid', lambda: -1)
+    child_session = http_client.get_session()
+    assert child_session is not parent_session
+
+
+def test_adapter_pool_and_retry_configuration():
+    """Pool size and retry policy are applied to https connections"""
+    session = http_client.build_session(pool_size=4, max_retries=3, backoff_factor=0.5)
+    adapter = session.get_adapter('https://api.openweathermap.org')
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.read == 0  # a read timeout is not waited out again
+    assert adapter.max_retries.backoff_factor == 0.5
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+def test_default_timeout_is_connect_read_pair():
+    connect_timeout, read_timeout = http_client.default_timeout()
+    assert connect_timeout == http_client.HTTP_CONNECT_TIMEOUT
+    assert read_timeout == http_client.HTTP_READ_TIMEOUT
+
+
+if __name__ == "__main__":
+    test_session_is_reused_within_process()
+    test_adapter_pool_and_retry_configuration()
+    test_default_timeout_is_connect_read_pair()
+    print("✅ HTTP client tests passed")
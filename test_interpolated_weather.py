@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent neighbour-station fan-out in get_interpolated_weather_data
+"""
+
+import time
+
+import pandas as pd
+
+import app
+
+
+def make_weather(days, rainfall=2.0):
+    return pd.DataFrame({'date': [f'2025-07-{i + 1:02d}' for i in range(days)],
+                         'rainfall': [rainfall] * days})
+
+
+def test_fanout_latency_bounded_by_slowest_station(monkeypatch):
+    """Neighbouring stations are fetched in parallel, not one after another"""
+    def slow_fetch(location, days=7):
+        time.sleep(0.3)
+        return make_weather(days)
+
+    monkeypatch.setattr(app, 'fetch_real_weather_data', slow_fetch)
+    started = time.time()
+    weather = app.get_interpolated_weather_data(24.5, 90.0)
+    elapsed = time.time() - started
+
+    assert len(weather) == 7
+    assert len(weather.attrs['weather_source']['stations']) >= 3
+    assert elapsed < 0.9  # three serial fetches would take at least 0.9s
+
+
+def test_fanout_returns_partial_results_at_deadline(monkeypatch):
+    """Stations that miss the overall deadline are left out of the blend"""
+    def fetch(location, days=7):
+        time.sleep(1.5 if location == 'Rangpur' else 0.01)
+        return make_weather(days)
+
+    monkeypatch.setattr(app, 'fetch_real_weather_data', fetch)
+    monkeypatch.setattr(app, 'WEATHER_FANOUT_DEADLINE_SECONDS', 0.5)
+    weather = app.get_interpolated_weather_data(24.5, 90.0)
+
+    stations = weather.attrs['weather_source']['stations']
+    assert 'Rangpur' not in stations
+    assert 'Dhaka' in stations
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_interpolated_weather.py")
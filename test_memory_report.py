@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-process memory report shown on /api/status
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app
+from memory_report import cached_memory_report, child_pids, memory_report, read_smaps_rollup
+
+requires_proc = pytest.mark.skipif(not os.path.exists(f'/proc/{os.getpid()}/smaps_rollup'),
+                                   reason='needs /proc/<pid>/smaps_rollup')
+
+
+@requires_proc
+def test_reads_own_smaps():
+    usage = read_smaps_rollup(os.getpid())
+    assert usage['rss_kb'] > 0
+    assert usage['rss_kb'] >= usage['pss_kb']
+    assert usage['shared_kb'] + usage['private_kb'] <= usage['rss_kb'] + 4
+
+
+@requires_proc
+def test_finds_child_processes():
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+    try:
+        assert child.pid in child_pids(os.getpid())
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_report_outside_gunicorn():
+    report = memory_report()
+    assert report['pid'] == os.getpid()
+    assert 'processes' not in report
+
+
+def test_status_reports_process_memory():
+    response = app.app.test_client().get('/api/status')
+    process = response.get_json()['process']
+
+    assert process['pid'] == os.getpid()
+    assert process['preloaded'] is False
+    assert process['memory']['pid'] == os.getpid()
+
+
+def test_status_reuses_recent_memory_report(monkeypatch):
+    import memory_report as memory_module
+    calls = []
+    monkeypatch.setattr(memory_module, '_cached', None)
+    monkeypatch.setattr(memory_module, 'memory_report', lambda: calls.append(1) or {'pid': os.getpid()})
+
+    for _ in range(3):
+        assert cached_memory_report(60)['pid'] == os.getpid()
+    assert len(calls) == 1
+    cached_memory_report(0)
+    assert len(calls) == 2
+
+
+PRELOAD_SCRIPT = """
+import json, os, runpy, threading
+conf = runpy.run_path('gunicorn.conf.py')
+import app
+master = sorted(t.name for t in threading.enumerate())
+conf['post_fork'](None, None)
+worker = sorted(t.name for t in threading.enumerate())
+print(json.dumps([master, worker]))
+"""
+
+
+def test_gunicorn_preload_starts_threads_only_after_fork(tmp_path):
+    env = dict(os.environ, GUNICORN_PRELOAD='true', MODEL_WATCH_INTERVAL_SECONDS='60',
+               RISK_RASTER_ENABLED='true', RISK_RASTER_DIR=str(tmp_path / 'raster'),
+               PREDICTION_DB_PATH=str(tmp_path / 'p.db'), PREDICTION_ARCHIVE_DIR='')
+    env.pop('BACKGROUND_THREADS_AT_IMPORT', None)
+    result = subprocess.run([sys.executable, '-c', PRELOAD_SCRIPT], env=env, capture_output=True,
+                            text=True, timeout=120, cwd=os.path.dirname(os.path.abspath(__file__)))
+    master, worker = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert 'model-watcher' not in master and 'risk-raster' not in master
+    assert 'model-watcher' in worker and 'risk-raster' in worker
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_memory_report.py")
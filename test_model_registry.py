@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for hot model reload through the model registry
+"""
+
+import threading
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+import app
+from model_registry import ModelRegistry, ModelValidationError
+from model_store import activate_version, current_version, save_artifacts
+from model_training import FEATURE_COLUMNS, generate_training_data
+
+
+def save_version(root, version, invert_labels=False, activate=True):
+    X, y = generate_training_data(800, seed=1)
+    if invert_labels:
+        y = 1 - y
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    save_artifacts(root, model, scaler, FEATURE_COLUMNS, version=version, activate=activate)
+    return model, scaler
+
+
+@pytest.fixture
+def isolated_models(tmp_path, monkeypatch):
+    """Point the app at an empty model directory and restore its model globals afterwards"""
+    for name in ('rf_model', 'scaler', 'feature_cols', 'flat_forest', 'model_metadata'):
+        monkeypatch.setattr(app, name, getattr(app, name))
+    monkeypatch.setattr(app, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'MODEL_FORMAT', 'joblib')
+    registry = ModelRegistry(str(tmp_path), app.load_model_candidate, app.validate_model_candidate,
+                             app.activate_model_candidate)
+    monkeypatch.setattr(app, 'model_registry', registry)
+    return str(tmp_path), registry
+
+
+def test_registry_outcomes(tmp_path):
+    activated = []
+
+    def validate(candidate):
+        if candidate == 'bad':
+            raise ModelValidationError('bad model')
+        return {'ok': True}
+
+    registry = ModelRegistry(str(tmp_path), load_fn=lambda version: version,
+                             validate_fn=validate, activate_fn=activated.append)
+
+    assert registry.reload('v1')['status'] == 'activated'
+    assert registry.reload('v1')['status'] == 'unchanged'
+    assert registry.reload('bad')['status'] == 'rejected'
+    assert activated == ['v1']
+
+    stats = registry.stats()
+    assert stats['active_version'] == 'v1'
+    assert stats['reloads'] == 1 and stats['rejections'] == 1
+    assert stats['last_load_seconds'] is not None
+
+
+def test_load_failure_keeps_active_model(tmp_path):
+    def load(version):
+        raise OSError('disk gone')
+
+    registry = ModelRegistry(str(tmp_path), load, lambda c: {}, lambda c: None, active_version='v1')
+    assert registry.reload('v2')['status'] == 'failed'
+    assert registry.active_version == 'v1'
+    assert registry.stats()['failures'] == 1
+
+
+def test_watcher_picks_up_new_current(isolated_models):
+    root, registry = isolated_models
+    model, scaler = save_version(root, 'v1')
+
+    outcome = registry.check_for_update()
+    assert outcome['status'] == 'activated'
+    assert app.rf_model is not None and app.model_metadata['version'] == 'v1'
+    assert outcome['validation']['holdout_accuracy'] >= app.MODEL_RELOAD_MIN_ACCURACY
+
+    features = generate_training_data(5, seed=9)[0]
+    expected = model.predict_proba(scaler.transform(features))[:, 1]
+    assert np.array_equal(app.predict_flood_probabilities(features), expected)
+    assert registry.check_for_update() is None
+
+
+def test_rejected_version_is_not_swapped_in(isolated_models):
+    root, registry = isolated_models
+    save_version(root, 'v1')
+    registry.check_for_update()
+    active_model = app.rf_model
+
+    save_version(root, 'v2', invert_labels=True)
+    assert registry.check_for_update()['status'] == 'rejected'
+    assert app.rf_model is active_model
+    assert app.model_metadata['version'] == 'v1'
+    # The watcher does not retry the same rejected version
+    assert registry.check_for_update() is None
+
+
+def test_watcher_keeps_pinned_version(isolated_models, monkeypatch):
+    root, _ = isolated_models
+    save_version(root, 'v1')
+    registry = ModelRegistry(root, app.load_model_candidate, app.validate_model_candidate,
+                             app.activate_model_candidate, pinned_version='v1')
+    monkeypatch.setattr(app, 'model_registry', registry)
+    assert registry.check_for_update() is None
+    assert registry.reload()['status'] == 'activated'
+
+    # CURRENT moves on (e.g. another deployment activated v2); the pinned process stays put
+    save_version(root, 'v2')
+    assert current_version(root) == 'v2'
+    assert registry.check_for_update() is None
+    assert registry.active_version == 'v1' and app.model_metadata['version'] == 'v1'
+    assert registry.stats()['pinned_version'] == 'v1'
+
+
+def test_swap_during_concurrent_scoring(isolated_models):
+    root, registry = isolated_models
+    save_version(root, 'v1')
+    save_version(root, 'v2', activate=False)
+    registry.reload('v1')
+
+    features = generate_training_data(3, seed=5)[0]
+    errors = []
+    stop = threading.Event()
+
+    def score():
+        while not stop.is_set():
+            try:
+                assert len(app.predict_flood_probabilities(features)) == 3
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=score) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for version in ('v2', 'v1', 'v2'):
+        assert registry.reload(version)['status'] == 'activated'
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_admin_reload_endpoint(isolated_models, monkeypatch):
+    root, registry = isolated_models
+    save_version(root, 'v1')
+    save_version(root, 'v2', activate=False)
+    client = app.app.test_client()
+
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', '')
+    assert client.post('/api/admin/model/reload').status_code == 403
+
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/api/admin/model/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+
+    response = client.post('/api/admin/model/reload', json={'version': 'v2'},
+                           headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'activated'
+    assert current_version(root) == 'v2'
+
+    status = client.get('/api/status').get_json()['model']
+    assert status['version'] == 'v2'
+    assert status['registry']['active_version'] == 'v2'
+
+    # Without the watcher the other workers will not follow, and the response says so
+    assert 'only' in response.get_json()['warning']
+
+
+def test_holdout_validation_bypasses_prediction_memo(isolated_models, monkeypatch):
+    root, registry = isolated_models
+    save_version(root, 'v1')
+    memo = app.QuantizedMemo(0.01, 64)
+    monkeypatch.setattr(app, 'PREDICTION_MEMO_ENABLED', True)
+    monkeypatch.setattr(app, 'prediction_memo', memo)
+
+    assert registry.reload('v1')['status'] == 'activated'
+    assert registry.reload('v1', force=True)['status'] == 'activated'
+    assert len(memo) == 0 and memo.stats()['misses'] == 0
+
+
+def test_activate_unknown_version(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        activate_version(str(tmp_path), 'missing')
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_model_registry.py")
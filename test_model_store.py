@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for versioned model artifacts and the serve-only startup mode
+"""
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+import app
+from forest_engine import FlatForest
+from model_store import (ModelNotFoundError, current_version, list_versions,
+                         load_artifacts, save_artifacts)
+
+FEATURES = ['f1', 'f2', 'f3']
+
+
+def small_model():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(scaler.transform(X), y)
+    return model, scaler, X
+
+
+def test_save_and_load_current_version(tmp_path):
+    model, scaler, X = small_model()
+    root = str(tmp_path)
+
+    first = save_artifacts(root, model, scaler, FEATURES, {'version': '2.0.0', 'accuracy': 0.9}, version='v1')
+    second = save_artifacts(root, model, scaler, FEATURES, version='v2')
+
+    assert list_versions(root) == ['v1', 'v2']
+    assert current_version(root) == second
+
+    artifacts = load_artifacts(root)
+    assert artifacts.metadata['version'] == 'v2'
+    assert artifacts.feature_cols == FEATURES
+    assert np.array_equal(artifacts.rf_model.predict_proba(artifacts.scaler.transform(X)),
+                          model.predict_proba(scaler.transform(X)))
+
+    pinned = load_artifacts(root, first)
+    assert pinned.metadata['version'] == 'v1'
+    assert pinned.metadata['model_schema_version'] == '2.0.0'
+
+
+def test_inactive_version_leaves_current(tmp_path):
+    model, scaler, _ = small_model()
+    root = str(tmp_path)
+    save_artifacts(root, model, scaler, FEATURES, version='v1')
+    save_artifacts(root, model, scaler, FEATURES, version='v2', activate=False)
+
+    assert current_version(root) == 'v1'
+    with pytest.raises(FileExistsError):
+        save_artifacts(root, model, scaler, FEATURES, version='v1')
+
+
+def test_legacy_flat_files(tmp_path):
+    model, scaler, _ = small_model()
+    joblib.dump(model, os.path.join(tmp_path, 'rf_flood_model.pkl'))
+    joblib.dump(scaler, os.path.join(tmp_path, 'feature_scaler.pkl'))
+    joblib.dump(FEATURES, os.path.join(tmp_path, 'feature_columns.pkl'))
+
+    assert load_artifacts(str(tmp_path)).metadata['version'] == 'legacy'
+
+
+def test_missing_artifacts(tmp_path):
+    with pytest.raises(ModelNotFoundError):
+        load_artifacts(str(tmp_path))
+
+
+def test_mmap_format(tmp_path):
+    model, scaler, X = small_model()
+    root = str(tmp_path)
+    save_artifacts(root, model, scaler, FEATURES, version='v1')
+
+    artifacts = load_artifacts(root, model_format='mmap')
+    assert isinstance(artifacts.rf_model, FlatForest)
+    assert artifacts.metadata['format'] == 'mmap'
+    assert np.array_equal(artifacts.rf_model.predict_proba(scaler.transform(X)),
+                          model.predict_proba(scaler.transform(X)))
+
+
+def test_mmap_falls_back_to_joblib_for_older_versions(tmp_path):
+    model, scaler, _ = small_model()
+    root = str(tmp_path)
+    save_artifacts(root, model, scaler, FEATURES, version='v1')
+    for name in os.listdir(os.path.join(root, 'versions', 'v1', 'flat_forest')):
+        os.remove(os.path.join(root, 'versions', 'v1', 'flat_forest', name))
+    os.rmdir(os.path.join(root, 'versions', 'v1', 'flat_forest'))
+
+    artifacts = load_artifacts(root, model_format='mmap')
+    assert isinstance(artifacts.rf_model, RandomForestClassifier)
+    assert artifacts.metadata['format'] == 'joblib'
+
+
+def test_memory_mapped_model_uses_flat_engine(tmp_path, monkeypatch):
+    model, scaler, X = small_model()
+    save_artifacts(str(tmp_path), model, scaler, FEATURES, version='v1')
+    artifacts = load_artifacts(str(tmp_path), model_format='mmap')
+    monkeypatch.setattr(app, 'INFERENCE_ENGINE', 'sklearn')
+
+    engine = app.build_inference_engine(artifacts.rf_model, artifacts.scaler)
+    assert engine is artifacts.rf_model
+
+    monkeypatch.setattr(app, 'INFERENCE_ENGINE', 'compiled')
+    compiled = app.build_inference_engine(artifacts.rf_model, artifacts.scaler)
+    assert compiled.raw_features
+    assert np.array_equal(compiled.predict_proba(X), model.predict_proba(scaler.transform(X)))
+
+
+def test_serve_mode_refuses_to_train(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'MODEL_SERVE_MODE', 'serve')
+    monkeypatch.setattr(app, 'create_and_train_models', lambda: pytest.fail('trained in-process'))
+
+    with pytest.raises(RuntimeError):
+        app.load_models()
+
+
+def test_serve_mode_loads_prebuilt_version(tmp_path, monkeypatch):
+    model, scaler, _ = small_model()
+    save_artifacts(str(tmp_path), model, scaler, FEATURES, version='v7')
+    monkeypatch.setattr(app, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'MODEL_SERVE_MODE', 'serve')
+    monkeypatch.setattr(app, 'model_metadata', {})
+
+    loaded_model, loaded_scaler, feature_cols = app.load_models()
+    assert feature_cols == FEATURES
+    assert app.model_metadata['version'] == 'v7'
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_model_store.py")
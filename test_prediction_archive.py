@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the date/location partitioned columnar prediction archive
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import app
+from prediction_archive import PredictionArchive, main
+from prediction_log import PredictionLogWriter
+
+
+def rows(day, location, count, **extra):
+    return [dict({'timestamp': f'2025-01-{day:02d} {h:02d}:00:00', 'location': location,
+                  'risk_probability': h / 100, 'status': 'LOW RISK'}, **extra)
+            for h in range(count)]
+
+
+def test_scan_prunes_partitions_and_rows(tmp_path):
+    archive = PredictionArchive(str(tmp_path))
+    for day in range(1, 11):
+        archive.append(rows(day, 'Dhaka', 24) + rows(day, 'Sylhet', 24))
+
+    assert len(archive.partitions()) == 20
+    assert len(archive.partitions(start='2025-01-03', end='2025-01-05')) == 6
+
+    result = archive.scan(['risk_probability'], start='2025-01-03 12:00:00', end='2025-01-05',
+                          locations=['Sylhet'])
+    assert set(result) == {'timestamp', 'location', 'risk_probability'}
+    assert len(result['timestamp']) == 12 + 24
+    assert result['timestamp'][0] == np.datetime64('2025-01-03T12:00:00')
+    assert np.all(np.diff(result['timestamp'].astype(np.int64)) >= 0)
+    assert set(result['location']) == {'Sylhet'}
+
+
+def test_scan_loads_only_requested_columns(tmp_path, monkeypatch):
+    archive = PredictionArchive(str(tmp_path))
+    archive.append(rows(1, 'Dhaka', 5))
+    loaded = []
+    real_load = np.load
+
+    def tracking_load(path, *args, **kwargs):
+        loaded.append(os.path.basename(path))
+        return real_load(path, *args, **kwargs)
+
+    monkeypatch.setattr(np, 'load', tracking_load)
+    archive.scan(['risk_probability'])
+    assert set(loaded) == {'timestamp.npy', 'risk_probability.npy'}
+
+
+def test_different_column_sets_share_the_archive(tmp_path):
+    archive = PredictionArchive(str(tmp_path))
+    archive.append(rows(1, 'Dhaka', 2))
+    archive.append([{'timestamp': '2025-01-01 05:00:00', 'location': 'Dhaka',
+                     'xgboost_probability': 0.7, 'lstm_probability': 0.6}])
+
+    result = archive.scan(['risk_probability', 'xgboost_probability', 'status'])
+    assert np.allclose(result['risk_probability'][:2], [0.0, 0.01])
+    assert np.isnan(result['risk_probability'][2])
+    assert np.isnan(result['xgboost_probability'][0]) and result['xgboost_probability'][2] == 0.7
+    assert list(result['status']) == ['LOW RISK', 'LOW RISK', '']
+
+
+def test_small_parts_are_compacted(tmp_path):
+    archive = PredictionArchive(str(tmp_path), compact_parts=4)
+    for hour in range(11):
+        archive.append([{'timestamp': f'2025-01-01 {hour:02d}:00:00', 'location': 'Dhaka',
+                         'risk_probability': hour / 10}])
+
+    partition = archive.partition_path('2025-01-01', 'Dhaka')
+    # Two level-1 parts of 4 rows each, plus 3 level-0 parts still waiting for a fourth
+    assert len(archive._live_parts(partition)) == 5
+    assert archive.compactions == 2
+    assert archive.compact() == 1
+    assert len(archive._live_parts(partition)) == 1
+    assert np.allclose(archive.scan(['risk_probability'])['risk_probability'], np.arange(11) / 10)
+
+
+def test_compaction_is_tiered(tmp_path):
+    archive = PredictionArchive(str(tmp_path), compact_parts=4)
+    for i in range(64):
+        archive.append([{'timestamp': f'2025-01-01 {i // 60:02d}:{i % 60:02d}:00', 'location': 'Dhaka',
+                         'risk_probability': i / 100}])
+
+    # 16 + 4 + 1 merges leave one level-3 part; each row was rewritten once per level
+    parts = archive._live_parts(archive.partition_path('2025-01-01', 'Dhaka'))
+    assert [meta['level'] for _, meta in parts] == [3]
+    assert archive.compactions == 21
+    assert archive.compacted_rows == 64 * 3
+    assert np.allclose(archive.scan(['risk_probability'])['risk_probability'], np.arange(64) / 100)
+
+
+def test_superseded_parts_are_not_read_twice(tmp_path):
+    archive = PredictionArchive(str(tmp_path))
+    archive.append(rows(1, 'Dhaka', 3))
+    archive.append(rows(1, 'Dhaka', 3))
+    partition = archive.partition_path('2025-01-01', 'Dhaka')
+    parts = archive._live_parts(partition)
+    merged = archive.scan(['risk_probability'])
+
+    # A merged part that was written but whose inputs were not yet deleted
+    archive._write_part(partition, {key: value for key, value in merged.items() if key != 'location'},
+                        replaces=[os.path.basename(path) for path, _ in parts])
+    assert len(archive.scan(['risk_probability'])['timestamp']) == 6
+
+
+def test_import_csv_matches_source(tmp_path):
+    archive_root = str(tmp_path / 'archive')
+    assert main(['--root', archive_root, 'import', 'logs/flood_predictions.csv']) == 0
+
+    source = pd.read_csv('logs/flood_predictions.csv')
+    result = PredictionArchive(archive_root).scan(['risk_probability'], locations=['Dhaka'])
+    expected = source[source['location'] == 'Dhaka']
+    assert len(result['timestamp']) == len(expected)
+    assert np.isclose(result['risk_probability'].sum(), expected['risk_probability'].sum())
+
+
+def test_writer_mirrors_batches_and_summary_endpoint(tmp_path, monkeypatch):
+    archive = PredictionArchive(str(tmp_path / 'archive'))
+    writer = PredictionLogWriter(str(tmp_path / 'log.csv'), app.PREDICTION_LOG_COLUMNS, mirror=archive.append)
+    monkeypatch.setattr(app, 'prediction_archive', archive)
+
+    for probability, flood_risk in ((0.2, 0), (0.9, 1), (0.4, 0)):
+        writer.write({'timestamp': '2025-03-01 10:00:00', 'location': 'Sylhet',
+                      'risk_probability': probability, 'flood_risk': flood_risk})
+    writer.close()
+
+    client = app.app.test_client()
+    summary = client.get('/api/analytics/risk-summary?start=2025-03-01&end=2025-03-02').get_json()
+    sylhet = summary['locations']['Sylhet']
+    assert sylhet['predictions'] == 3 and sylhet['high_risk_predictions'] == 1
+    assert sylhet['max_risk_probability'] == 0.9 and sylhet['mean_risk_probability'] == 0.5
+    assert client.get('/api/analytics/risk-summary?start=soon').status_code == 400
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_prediction_archive.py")
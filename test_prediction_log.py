@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the buffered background prediction log writer
+"""
+
+import csv
+import multiprocessing
+import os
+import queue
+import time
+
+import pytest
+
+import app
+from prediction_log import PredictionLogWriter
+
+COLUMNS = ['timestamp', 'location', 'risk_probability']
+
+
+def read_rows(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def record(i, location='Dhaka'):
+    return {'timestamp': f'2025-01-01 00:00:{i % 60:02d}', 'location': location, 'risk_probability': i / 1000}
+
+
+def test_flushes_full_batches_with_one_header(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    writer = PredictionLogWriter(path, COLUMNS, max_batch=10, flush_interval_seconds=60)
+
+    for i in range(25):
+        assert writer.write(record(i))
+    deadline = time.time() + 5
+    while writer.written < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    # Two full batches are on disk; the remaining 5 wait for the timer or a flush
+    assert writer.written == 20 and writer.batches == 2
+
+    assert writer.flush()
+    rows = read_rows(path)
+    assert rows[0] == COLUMNS
+    assert len(rows) == 26
+    assert rows[-1] == ['2025-01-01 00:00:24', 'Dhaka', '0.024']
+    writer.close()
+
+
+def test_flushes_after_interval(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    writer = PredictionLogWriter(path, COLUMNS, max_batch=1000, flush_interval_seconds=0.05)
+
+    writer.write(record(1))
+    deadline = time.time() + 5
+    while writer.written == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert writer.written == 1
+    writer.close()
+
+
+def test_counts_dropped_records(tmp_path):
+    writer = PredictionLogWriter(str(tmp_path / 'log.csv'), COLUMNS, max_queue=1)
+    # Hold the writer thread back so the queue stays full
+    writer._pid = os.getpid()
+    writer._queue = queue.Queue(maxsize=1)
+    writer._ensure_started = lambda: None
+
+    assert writer.write(record(1))
+    assert not writer.write(record(2))
+    assert writer.stats()['dropped'] == 1
+
+
+def test_close_flushes_and_rejects_later_writes(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    writer = PredictionLogWriter(path, COLUMNS, max_batch=1000, flush_interval_seconds=60)
+    for i in range(3):
+        writer.write(record(i))
+
+    writer.close()
+    assert len(read_rows(path)) == 4
+    assert not writer.write(record(9))
+    assert writer.dropped == 1
+
+
+def _append_from_child(path, worker, count):
+    writer = PredictionLogWriter(path, COLUMNS, max_batch=7, flush_interval_seconds=0.01)
+    for i in range(count):
+        writer.write(record(i, location=f'worker-{worker}'))
+    writer.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_concurrent_processes_append_whole_rows(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_append_from_child, args=(path, w, 200)) for w in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    rows = read_rows(path)
+    assert rows.count(COLUMNS) == 1
+    assert len(rows) == 1 + 4 * 200
+    assert all(len(row) == 3 for row in rows)
+
+
+def test_log_prediction_uses_background_writer(tmp_path, monkeypatch):
+    path = str(tmp_path / 'predictions.csv')
+    writer = PredictionLogWriter(path, app.PREDICTION_LOG_COLUMNS, flush_interval_seconds=60)
+    monkeypatch.setattr(app, 'prediction_log', writer)
+    monkeypatch.setattr(app, 'PREDICTION_LOG_MODE', 'async')
+
+    app.log_prediction('Sylhet', {'risk_probability': 0.42, 'status': 'MODERATE RISK'})
+    assert not os.path.exists(path)
+
+    writer.flush()
+    rows = read_rows(path)
+    assert rows[0] == app.PREDICTION_LOG_COLUMNS
+    assert rows[1][1] == 'Sylhet' and rows[1][7] == '0.42'
+    writer.close()
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_prediction_log.py")
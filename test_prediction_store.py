@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite prediction store
+"""
+
+import csv
+import multiprocessing
+import os
+
+import pytest
+
+import app
+from history_buffer import RecentHistory
+from prediction_log import PredictionLogWriter
+from prediction_store import PredictionStore, main
+
+
+def record(i, location='Dhaka'):
+    return {
+        'timestamp': f'2025-01-{1 + i // 24:02d} {i % 24:02d}:00:00',
+        'location': location,
+        'date': f'2025-01-{1 + i // 24:02d}',
+        'rainfall': i * 0.5,
+        'water_level': 4.0,
+        'flood_threshold': 5.5,
+        'flood_risk': i % 2,
+        'risk_probability': i / 100,
+        'confidence': 0.8,
+        'status': 'LOW RISK'
+    }
+
+
+def test_history_returns_latest_rows_oldest_first(tmp_path):
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    store.insert_many([record(i, location) for i in range(50) for location in ('Dhaka', 'Sylhet')])
+
+    history = store.history('Dhaka', limit=30)
+    assert len(history) == 30
+    assert [row['risk_probability'] for row in history] == [i / 100 for i in range(20, 50)]
+    assert all(row['location'] == 'Dhaka' for row in history)
+    assert store.count() == 100 and store.count('Sylhet') == 50
+
+
+def test_history_query_uses_location_timestamp_index(tmp_path):
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    plan = store.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM predictions WHERE location = ? "
+        "ORDER BY timestamp DESC, id DESC LIMIT 30", ('Dhaka',)
+    ).fetchall()
+    details = ' '.join(row['detail'] for row in plan)
+    assert 'idx_predictions_location_timestamp' in details
+    assert 'TEMP B-TREE' not in details
+
+
+def test_stats_row_count_does_not_scan(tmp_path):
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    store.insert_many(record(i) for i in range(25))
+    assert store.stats()['rows'] == store.count() == 25
+
+    plan = store.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT COALESCE(MAX(id), 0) FROM predictions"
+    ).fetchall()
+    assert not any(row['detail'].startswith('SCAN') for row in plan)
+
+
+def test_wal_mode(tmp_path):
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    assert store.connection().execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_automated_columns_fill_shared_columns(tmp_path):
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    store.insert({'location': 'Rangpur', 'date': '2025-01-01', 'recent_rainfall': 12.5,
+                  'estimated_water_level': 5.1, 'ensemble_probability': 0.7,
+                  'ensemble_prediction': 1, 'ensemble_confidence': 0.7, 'xgboost_probability': 0.65},
+                 source='automated')
+
+    row = store.history('Rangpur')[0]
+    assert row['rainfall'] == 12.5 and row['water_level'] == 5.1
+    assert row['flood_risk'] == 1 and row['risk_probability'] == 0.7
+    assert row['source'] == 'automated'
+    assert '"xgboost_probability": 0.65' in row['details']
+
+
+def test_csv_import_runs_once(tmp_path):
+    csv_path = str(tmp_path / 'log.csv')
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=app.PREDICTION_LOG_COLUMNS)
+        writer.writeheader()
+        writer.writerows(record(i) for i in range(10))
+
+    db_path = str(tmp_path / 'p.db')
+    assert main(['--db', db_path, 'import', csv_path]) == 0
+    store = PredictionStore(db_path)
+    assert store.count() == 10
+    assert store.import_csv(csv_path) == 0
+    assert store.import_csv(csv_path, force=True) == 10
+    assert store.history('Dhaka', limit=1)[0]['rainfall'] == 4.5
+
+
+def write_log(csv_path, records):
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=app.PREDICTION_LOG_COLUMNS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def _import_from_child(path, csv_path):
+    PredictionStore(path).import_csv(csv_path)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_concurrent_imports_run_once(tmp_path):
+    csv_path = str(tmp_path / 'log.csv')
+    write_log(csv_path, (record(i) for i in range(50)))
+    path = str(tmp_path / 'p.db')
+    PredictionStore(path).connection()
+
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_import_from_child, args=(path, csv_path)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert PredictionStore(path).count() == 50
+
+
+def test_seeding_is_keyed_on_imports_not_emptiness(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'log.csv')
+    write_log(csv_path, (record(i, 'Sylhet') for i in range(10)))
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    monkeypatch.setattr(app, 'prediction_store', store)
+    monkeypatch.setattr(app, 'PREDICTION_LOG_FILE', csv_path)
+
+    # A worker already wrote a prediction before the log was seeded
+    store.insert(record(99, 'Dhaka'))
+    app.ensure_prediction_store()
+    app.ensure_prediction_store()
+
+    assert store.was_imported(csv_path)
+    assert store.count('Sylhet') == 10 and store.count() == 11
+
+
+def _insert_from_child(path, worker):
+    PredictionStore(path).insert_many([record(i, f'worker-{worker}') for i in range(100)])
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_concurrent_process_writers(tmp_path):
+    path = str(tmp_path / 'p.db')
+    PredictionStore(path).connection()
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_insert_from_child, args=(path, w)) for w in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert PredictionStore(path).count() == 400
+
+
+def test_history_endpoint_reads_sqlite(tmp_path, monkeypatch):
+    store = PredictionStore(str(tmp_path / 'p.db'))
+    writer = PredictionLogWriter(store.path, app.PREDICTION_LOG_COLUMNS, sink=store.insert_many)
+    monkeypatch.setattr(app, 'PREDICTION_STORE', 'sqlite')
+    monkeypatch.setattr(app, 'PREDICTION_LOG_MODE', 'async')
+    monkeypatch.setattr(app, 'prediction_store', store)
+    monkeypatch.setattr(app, 'prediction_log', writer)
+    monkeypatch.setattr(app, 'recent_history', RecentHistory(app.read_history_from_disk))
+
+    store.insert_many(record(i, 'Sylhet') for i in range(40))
+    app.log_prediction('Sylhet', {'risk_probability': 0.99, 'flood_risk': 1, 'current_rainfall': 30})
+
+    history = app.app.test_client().get('/api/history/Sylhet').get_json()['history']
+    assert len(history) == 30
+    assert history[-1]['probability'] == 0.99 and history[-1]['prediction'] == 1
+    writer.close()
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_prediction_store.py")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the precomputed national risk raster
+"""
+
+import numpy as np
+import pandas as pd
+
+import app
+from caching import TTLCache
+from risk_raster import RiskRaster, RiskRasterService
+
+
+def exact_risk(lat, lon):
+    return app.calculate_weighted_overall_risk(app.calculate_flood_risk_profile(None, lat=lat, lon=lon))
+
+
+def weather(rainfall):
+    return pd.DataFrame({'date': pd.date_range('2025-07-01', periods=len(rainfall)), 'rainfall': rainfall})
+
+
+def plane(lats, lons):
+    return {'risk': 0.1 * lats + 0.02 * lons}
+
+
+def test_vectorized_risk_matches_scalar_model():
+    lats, lons = np.meshgrid(np.linspace(20.5, 26.7, 25), np.linspace(88.0, 92.8, 25))
+    expected = np.vectorize(exact_risk)(lats, lons)
+    assert np.allclose(app.calculate_coordinate_overall_risk_grid(lats, lons), expected, atol=1e-12)
+
+
+def test_bilinear_sampling(tmp_path):
+    service = RiskRasterService(str(tmp_path), plane, lambda: 'e1', resolution=0.1)
+    service.refresh()
+    raster = service.current
+
+    # Exact at nodes, and bilinear interpolation reproduces a plane everywhere
+    assert abs(raster.sample('risk', 23.5, 90.0) - (2.35 + 1.8)) < 1e-5
+    lats = np.array([20.5, 21.234, 26.7, 25.55])
+    lons = np.array([88.0, 91.777, 92.8, 88.05])
+    assert np.allclose(raster.sample_many('risk', lats, lons), 0.1 * lats + 0.02 * lons, atol=1e-5)
+    assert abs(raster.sample('risk', 21.234, 91.777) - (2.1234 + 1.83554)) < 1e-5
+    assert np.isnan(raster.sample_many('risk', [27.0], [90.0])[0])
+    assert not raster.contains(27.0, 90.0)
+
+
+def test_raster_is_memory_mapped_and_shared(tmp_path):
+    service = RiskRasterService(str(tmp_path), plane, lambda: 'e1', resolution=0.1)
+    service.refresh()
+    assert isinstance(service.current.layers['risk'], np.memmap)
+    assert service.current.shape == (63, 49)
+
+    # A second worker maps the finished raster instead of rebuilding it
+    other = RiskRasterService(str(tmp_path), plane, lambda: 'e1', resolution=0.1)
+    other.refresh()
+    assert other.builds == 0 and other.current.epoch == 'e1'
+    assert isinstance(RiskRaster(other.current.path).layers['risk'], np.memmap)
+
+
+def test_rebuilds_only_when_epoch_changes(tmp_path):
+    epoch = ['e1']
+    service = RiskRasterService(str(tmp_path), plane, lambda: epoch[0], resolution=0.1, keep=2)
+    assert service.refresh()
+    assert not service.refresh()
+    for next_epoch in ('e2', 'e3'):
+        epoch[0] = next_epoch
+        assert service.refresh()
+
+    assert service.builds == 3 and service.current.epoch == 'e3'
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith('.')) == ['e2-0.1', 'e3-0.1']
+
+
+def test_weather_epoch_tracks_cached_station_rainfall(monkeypatch):
+    cache = TTLCache(ttl_seconds=600)
+    monkeypatch.setattr(app, 'weather_cache', cache)
+    assert app.weather_epoch() == 'geo'
+
+    cache.set(('Dhaka', 7), weather([1.0, 2.0, 3.0, 4.0]))
+    first = app.weather_epoch()
+    assert first != 'geo' and app.weather_epoch() == first
+    cache.set(('Dhaka', 7), weather([1.0, 2.0, 3.0, 9.0]))
+    assert app.weather_epoch() != first
+    assert cache.stats()['hits'] == 0
+
+
+def test_rainfall_layers_interpolate_station_weather(monkeypatch):
+    cache = TTLCache(ttl_seconds=600)
+    monkeypatch.setattr(app, 'weather_cache', cache)
+    for location in app.LOCATIONS:
+        cache.set((location, 7), weather([0.0, 5.0, 10.0]))
+    cache.set(('Sylhet', 7), weather([0.0, 5.0, 40.0]))
+
+    lat, lon = app.LOCATIONS['Dhaka']
+    layers = app.build_risk_raster_layers(np.array([[lat, 24.89]]), np.array([[lon, 91.87]]))
+    assert layers['rainfall'].shape == (1, 2)
+    assert 10.0 < layers['rainfall'][0, 0] < layers['rainfall'][0, 1] < 40.0
+    assert layers['rainfall_3day'][0, 1] > 40.0
+
+
+def test_coordinate_endpoint_reads_raster(tmp_path, monkeypatch):
+    cache = TTLCache(ttl_seconds=600)
+    monkeypatch.setattr(app, 'weather_cache', cache)
+    for location in app.LOCATIONS:
+        cache.set((location, 7), weather([2.0, 4.0, 6.0]))
+    service = RiskRasterService(str(tmp_path), app.build_risk_raster_layers, app.weather_epoch, resolution=0.05)
+    service.refresh()
+    monkeypatch.setattr(app, 'risk_raster', service)
+    client = app.app.test_client()
+
+    data = client.get('/api/predict/coordinates/23.0/90.0').get_json()
+    assert data['model_info']['prediction_method'] == 'risk_raster'
+    assert abs(data['risk_probability'] - exact_risk(23.0, 90.0)) < 1e-3
+    assert abs(data['current_rainfall'] - 6.0) < 1e-4
+    assert data['weather_source'] == {'source': 'risk_raster', 'epoch': service.current.epoch}
+    assert data['status'] == 'MINIMAL RISK' and set(data['flood_risk_profile']) == {'riverine', 'urban_drainage', 'flash', 'tidal'}
+
+    exact = client.get('/api/predict/coordinates/23.0/90.0?exact=true').get_json()
+    assert exact['model_info']['prediction_method'] != 'risk_raster'
+    assert abs(exact['risk_probability'] - data['risk_probability']) < 1e-3
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_risk_raster.py")
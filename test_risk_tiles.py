@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for flood-risk map tiles
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+import app
+from risk_tiles import TileCache, TileRenderer, colorize, encode_png, tile_bounds, tile_pixel_coordinates
+
+
+def decode_png(data):
+    """Minimal decoder for the 8-bit RGBA PNGs encode_png writes (filters 0 and 2)"""
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    pos, idat = 8, b''
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        assert struct.unpack('>I', data[pos + 8 + length:pos + 12 + length])[0] == zlib.crc32(kind + body)
+        if kind == b'IHDR':
+            width, height = struct.unpack('>II', body[:8])
+        elif kind == b'IDAT':
+            idat += body
+        pos += 12 + length
+
+    raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * 4 + 1)
+    rows = np.zeros((height, width * 4), dtype=np.uint8)
+    previous = np.zeros(width * 4, dtype=np.uint8)
+    for i in range(height):
+        assert raw[i, 0] in (0, 2)
+        rows[i] = raw[i, 1:] + (previous if raw[i, 0] == 2 else 0)
+        previous = rows[i]
+    return rows.reshape(height, width, 4)
+
+
+def tile_for(lat, lon, z):
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2 * n)
+    return z, x, y
+
+
+def test_png_round_trip():
+    rgba = np.random.default_rng(0).integers(0, 256, size=(7, 5, 4), dtype=np.uint8)
+    assert np.array_equal(decode_png(encode_png(rgba)), rgba)
+
+
+def test_tile_pixel_coordinates():
+    lats, lons = tile_pixel_coordinates(0, 0, 0, size=2)
+    assert np.allclose(lons, [[-90, 90], [-90, 90]])
+    assert np.allclose(lats[0], 66.51326, atol=1e-4) and np.allclose(lats[1], -66.51326, atol=1e-4)
+
+    z, x, y = tile_for(23.81, 90.41, 9)
+    min_lat, max_lat, min_lon, max_lon = tile_bounds(z, x, y)
+    lats, lons = tile_pixel_coordinates(z, x, y)
+    assert min_lat < lats.min() < lats.max() < max_lat and min_lon < lons.min() < lons.max() < max_lon
+
+
+def test_tile_pixels_follow_model():
+    renderer = TileRenderer(app.calculate_coordinate_overall_risk_grid, app.BANGLADESH_BOUNDS)
+    z, x, y = tile_for(23.81, 90.41, 8)
+    pixels = decode_png(renderer.render(z, x, y))
+
+    lats, lons = tile_pixel_coordinates(z, x, y)
+    expected = np.array([[app.calculate_weighted_overall_risk(app.calculate_flood_risk_profile(None, lat=lat, lon=lon))
+                          for lat, lon in zip(lats[i, ::32], lons[i, ::32])] for i in range(0, 256, 32)])
+    assert np.array_equal(pixels[::32, ::32], colorize(expected))
+
+    # Outside Bangladesh is transparent; a tile entirely outside is not evaluated
+    assert decode_png(renderer.render(*tile_for(10.0, 80.0, 6)))[..., 3].max() == 0
+    assert renderer.renders == 1
+
+
+def test_tile_endpoint_caches_per_epoch(tmp_path, monkeypatch):
+    renderer = TileRenderer(app.calculate_coordinate_overall_risk_grid, app.BANGLADESH_BOUNDS,
+                            cache=TileCache(str(tmp_path), keep=1))
+    epoch = ['w1']
+    monkeypatch.setattr(app, 'risk_tiles', renderer)
+    monkeypatch.setattr(app, 'weather_epoch', lambda: epoch[0])
+    client = app.app.test_client()
+    url = '/api/tiles/risk/{}/{}/{}.png'.format(*tile_for(23.81, 90.41, 7))
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.mimetype == 'image/png'
+    assert client.get(url).data == first.data
+    assert renderer.renders == 1 and renderer.cache.hits == 1
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # A new weather epoch renders into a fresh directory and drops the old one
+    epoch[0] = 'w2'
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+    assert renderer.renders == 2
+    assert [p.name for p in tmp_path.iterdir()] == [f'w2-{renderer.style}']
+
+
+def test_tile_endpoint_rejects_invalid_tiles():
+    client = app.app.test_client()
+    assert client.get('/api/tiles/risk/3/8/0.png').status_code == 400
+    assert client.get(f'/api/tiles/risk/{app.RISK_TILE_MAX_ZOOM + 1}/0/0.png').status_code == 400
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_risk_tiles.py")
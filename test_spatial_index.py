@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the haversine ball-tree station index
+"""
+
+import numpy as np
+import pytest
+
+import app
+from spatial_index import EARTH_RADIUS_KM, StationIndex, degrees_to_km
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+@pytest.fixture(scope='module')
+def gauges():
+    rng = np.random.RandomState(3)
+    lats = rng.uniform(20.5, 26.7, 3000)
+    lons = rng.uniform(88.0, 92.8, 3000)
+    stations = {f'gauge-{i}': (lat, lon) for i, (lat, lon) in enumerate(zip(lats, lons))}
+    return stations, lats, lons
+
+
+def test_nearest_matches_brute_force(gauges):
+    stations, lats, lons = gauges
+    index = StationIndex(stations)
+    for lat, lon in [(23.81, 90.41), (21.0, 92.5), (26.5, 88.1)]:
+        brute = haversine_km(lat, lon, lats, lons)
+        expected = np.argsort(brute)[:5]
+        result = index.nearest(lat, lon, k=5)
+        assert [name for name, _ in result] == [f'gauge-{i}' for i in expected]
+        assert np.allclose([km for _, km in result], brute[expected])
+
+
+def test_radius_query_matches_brute_force(gauges):
+    stations, lats, lons = gauges
+    index = StationIndex(stations)
+    brute = haversine_km(24.0, 90.0, lats, lons)
+    result = index.within(24.0, 90.0, 25.0)
+    assert {name for name, _ in result} == {f'gauge-{i}' for i in np.flatnonzero(brute <= 25.0)}
+    assert [km for _, km in result] == sorted(km for _, km in result)
+
+
+def test_batch_query_and_k_larger_than_index():
+    index = StationIndex(app.LOCATIONS)
+    distances, indices = index.query([23.8103, 22.3569], [90.4125, 91.7832], k=10)
+    assert distances.shape == (2, len(app.LOCATIONS))
+    assert [index.names[i] for i in indices[:, 0]] == ['Dhaka', 'Chittagong']
+    assert np.allclose(distances[:, 0], 0.0)
+
+
+def test_dhaka_to_chittagong_distance():
+    index = StationIndex(app.LOCATIONS)
+    km = dict(index.nearest(23.8103, 90.4125, k=5))['Chittagong']
+    assert 195 < km < 220
+    assert degrees_to_km(1.0) == 111.32
+
+
+def test_coordinate_functions_use_station_index(monkeypatch):
+    # A far-away station added to the index must not change lookups near Dhaka
+    stations = dict(app.LOCATIONS, Distant=(26.6, 88.1))
+    monkeypatch.setattr(app, 'station_index', StationIndex(stations))
+
+    assert app.get_enhanced_interpolated_risk_for_coordinates(23.8104, 90.4126) == 'Dhaka'
+    assert set(app.calculate_transition_zone_factor(23.85, 90.45)) == {'Dhaka'}
+    assert set(app.calculate_enhanced_transition_zone_factor(23.85, 90.45)) == {'Dhaka'}
+    # 0.5 degrees of longitude at Dhaka's latitude is ~51km, outside the ~16.7km zone
+    assert app.calculate_transition_zone_factor(23.8103, 90.9125) is None
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_spatial_index.py")
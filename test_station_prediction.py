@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the reusable per-station prediction used by the coordinate endpoint
+"""
+
+import app
+
+
+def test_compute_station_prediction_returns_plain_data(monkeypatch):
+    """The pure computation returns a dict and writes nothing to the log"""
+    logged = []
+    monkeypatch.setattr(app, 'log_prediction', lambda *args: logged.append(args))
+
+    prediction = app.compute_station_prediction('Dhaka')
+
+    assert isinstance(prediction, dict)
+    assert prediction['location'] == 'Dhaka'
+    assert 0 <= prediction['risk_probability'] <= 1
+    assert logged == []
+
+
+def test_transition_zone_computes_each_station_once(monkeypatch):
+    """Blending stations reuses one computation per station and logs nothing"""
+    computed = []
+    logged = []
+    real_compute = app.compute_station_prediction
+
+    def counting_compute(location):
+        computed.append(location)
+        return real_compute(location)
+
+    monkeypatch.setattr(app, 'compute_station_prediction', counting_compute)
+    monkeypatch.setattr(app, 'log_prediction', lambda *args: logged.append(args))
+    monkeypatch.setattr(app, 'calculate_enhanced_transition_zone_factor',
+                        lambda lat, lon: {'Dhaka': 0.6, 'Sylhet': 0.4})
+
+    client = app.app.test_client()
+    response = client.get('/api/predict/coordinates/24.2/90.9')
+
+    assert response.status_code == 200
+    assert response.get_json()['model_info']['prediction_method'] == 'enhanced_transition_blend'
+    assert sorted(computed) == ['Dhaka', 'Sylhet']
+    assert logged == []
+
+
+def test_station_memo_is_request_scoped(monkeypatch):
+    computed = []
+    monkeypatch.setattr(app, 'compute_station_prediction',
+                        lambda location: computed.append(location) or {'location': location})
+
+    with app.app.test_request_context('/'):
+        app.get_station_prediction('Sylhet')
+        app.get_station_prediction('Sylhet')
+    with app.app.test_request_context('/'):
+        app.get_station_prediction('Sylhet')
+
+    assert computed == ['Sylhet', 'Sylhet']
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_station_prediction.py")
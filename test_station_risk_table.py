@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the precomputed per-station geographic risk table
+"""
+
+import pytest
+
+import app
+from station_metadata import StationOverrides
+
+
+@pytest.fixture
+def restore_station_data(monkeypatch, tmp_path):
+    for location, geo_data in list(app.GEOGRAPHIC_DATA.items()):
+        monkeypatch.setitem(app.GEOGRAPHIC_DATA, location, geo_data)
+    for name in ('station_risk_table', 'station_risk_builds', 'station_risk_built_at', 'ADMIN_TOKEN'):
+        monkeypatch.setattr(app, name, getattr(app, name))
+    monkeypatch.setattr(app, 'station_overrides', StationOverrides(str(tmp_path / 'station_overrides.json')))
+    return app.station_overrides
+
+
+def test_table_matches_direct_computation():
+    assert set(app.station_risk_table) == set(app.GEOGRAPHIC_DATA)
+    for location in app.GEOGRAPHIC_DATA:
+        entry = app.station_risk_table[location]
+        profile = app.calculate_flood_risk_profile(location)
+
+        assert entry['geographic_risk'] == app.calculate_enhanced_geographic_risk(location)
+        assert entry['weighted_overall_risk'] == app.calculate_weighted_overall_risk(profile)
+        assert {t: dict(p) for t, p in entry['flood_risk_profile'].items()} == profile
+
+
+def test_table_is_read_only():
+    entry = app.station_risk_table['Dhaka']
+    with pytest.raises(TypeError):
+        entry['geographic_risk'] = 1.0
+    with pytest.raises(TypeError):
+        entry['flood_risk_profile']['riverine']['risk_percentage'] = 99.0
+
+
+def test_predictions_do_not_recompute_static_risk(monkeypatch):
+    def must_not_run(*args, **kwargs):
+        raise AssertionError('static risk recomputed per request')
+
+    monkeypatch.setattr(app, 'calculate_enhanced_geographic_risk', must_not_run)
+    monkeypatch.setattr(app, 'calculate_flood_risk_profile', must_not_run)
+    monkeypatch.setattr(app, 'log_prediction', lambda *args: None)
+
+    response = app.app.test_client().get('/api/predict/Dhaka')
+    assert response.status_code == 200
+    assert 'riverine' in response.get_json()['flood_risk_profile']
+
+
+def test_metadata_update_rebuilds_table(restore_station_data):
+    before = app.station_risk_table
+    builds = app.station_risk_builds
+
+    app.update_station_metadata('Rangpur', {'elevation': 2, 'drainage_quality': 'Poor'})
+
+    assert app.station_risk_table is not before
+    assert app.station_risk_builds == builds + 1
+    assert before['Rangpur']['geographic_risk'] < app.station_risk_table['Rangpur']['geographic_risk']
+    assert app.station_risk_table['Rangpur']['geographic_risk'] == app.calculate_enhanced_geographic_risk('Rangpur')
+
+
+def test_admin_station_update_endpoint(restore_station_data):
+    client = app.app.test_client()
+    app.ADMIN_TOKEN = 'secret'
+
+    response = client.patch('/api/admin/stations/Sylhet', json={'urbanization_factor': 0.9},
+                            headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert app.GEOGRAPHIC_DATA['Sylhet']['urbanization_factor'] == 0.9
+
+    assert client.patch('/api/admin/stations/Atlantis', json={'elevation': 1},
+                        headers={'X-Admin-Token': 'secret'}).status_code == 404
+    assert client.patch('/api/admin/stations/Sylhet', json={'elevation': 1}).status_code == 401
+
+
+def test_invalid_station_updates_are_rejected(restore_station_data):
+    client = app.app.test_client()
+    app.ADMIN_TOKEN = 'secret'
+    before = dict(app.GEOGRAPHIC_DATA['Dhaka'])
+    table = app.station_risk_table
+
+    for changes in ({'elevation': 'high'}, {'drainage_quality': 'Excellent'}, {'urbanization_factor': 3},
+                    {'elevation': True}, {'river_systems': 'Buriganga'}, {'favourite_colour': 'blue'}):
+        response = client.patch('/api/admin/stations/Dhaka', json=changes, headers={'X-Admin-Token': 'secret'})
+        assert response.status_code == 400
+        assert set(response.get_json()['fields']) == set(changes)
+
+    with pytest.raises(ValueError):
+        app.update_station_metadata('Dhaka', {'drainage_quality': 'Excellent'})
+
+    assert app.GEOGRAPHIC_DATA['Dhaka'] == before
+    assert app.station_risk_table is table
+    assert restore_station_data.version() is None
+
+
+def test_failed_rebuild_leaves_data_untouched(restore_station_data, monkeypatch):
+    before = dict(app.GEOGRAPHIC_DATA['Dhaka'])
+    table = app.station_risk_table
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('build failed')
+
+    monkeypatch.setattr(app, 'calculate_weighted_overall_risk', broken)
+    with pytest.raises(RuntimeError):
+        app.update_station_metadata('Dhaka', {'elevation': 3})
+
+    assert app.GEOGRAPHIC_DATA['Dhaka'] == before
+    assert app.station_risk_table is table
+
+
+def test_station_updates_reach_other_workers(restore_station_data):
+    app.update_station_metadata('Sylhet', {'urbanization_factor': 0.9})
+    assert restore_station_data.load() == {'Sylhet': {'urbanization_factor': 0.9}}
+
+    # Another worker edits Rangpur; this one applies it on its next check
+    other_worker = StationOverrides(restore_station_data.path)
+    other_worker.merge('Rangpur', {'elevation': 2, 'drainage_quality': 'Poor'})
+    builds = app.station_risk_builds
+
+    assert app.sync_station_overrides(force=True)
+    assert app.GEOGRAPHIC_DATA['Rangpur']['drainage_quality'] == 'Poor'
+    assert app.GEOGRAPHIC_DATA['Sylhet']['urbanization_factor'] == 0.9
+    assert app.station_risk_table['Rangpur']['geographic_risk'] == app.calculate_enhanced_geographic_risk('Rangpur')
+    assert app.station_risk_builds == builds + 1
+    assert not app.sync_station_overrides(force=True)
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test_station_risk_table.py")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the background weather prefetcher
+"""
+
+import time
+
+import pandas as pd
+
+import app
+from caching import TTLCache
+from weather_prefetcher import SharedWeatherStore, WeatherPrefetcher
+
+STATIONS = ['Dhaka', 'Sylhet', 'Rangpur', 'Bahadurabad', 'Chittagong']
+
+
+def test_refresh_all_visits_every_station():
+    refreshed = []
+    prefetcher = WeatherPrefetcher(STATIONS, refresh_fn=refreshed.append, interval_seconds=60)
+    prefetcher.refresh_all()
+
+    assert refreshed == STATIONS
+    assert prefetcher.stats()['refreshes'] == 5
+    assert prefetcher.stats()['cycles'] == 1
+
+
+def test_default_stagger_spreads_calls_over_interval():
+    prefetcher = WeatherPrefetcher(STATIONS, refresh_fn=lambda location: None, interval_seconds=300)
+    assert prefetcher.stagger_seconds == 60
+
+
+def test_failures_are_counted_and_do_not_stop_cycle():
+    refreshed = []
+
+    def flaky_refresh(location):
+        if location == 'Sylhet':
+            raise ConnectionError('timeout')
+        refreshed.append(location)
+
+    prefetcher = WeatherPrefetcher(STATIONS, refresh_fn=flaky_refresh, interval_seconds=60)
+    prefetcher.refresh_all()
+
+    assert 'Sylhet' not in refreshed
+    assert len(refreshed) == 4
+    assert prefetcher.stats()['errors'] == 1
+
+
+def test_background_thread_runs_and_stops():
+    refreshed = []
+    prefetcher = WeatherPrefetcher(STATIONS, refresh_fn=refreshed.append,
+                                   interval_seconds=1, stagger_seconds=0)
+    assert prefetcher.start()
+    assert not prefetcher.start()  # already running
+
+    deadline = time.time() + 2
+    while len(refreshed) < len(STATIONS) and time.time() < deadline:
+        time.sleep(0.01)
+    prefetcher.stop()
+
+    assert not prefetcher.running
+    assert set(refreshed) == set(STATIONS)
+
+
+def test_one_leader_refreshes_and_followers_load(tmp_path):
+    lock_path = str(tmp_path / 'prefetch.lock')
+    refreshed, followed = [], []
+    leader = WeatherPrefetcher(STATIONS, refresh_fn=refreshed.append, interval_seconds=60,
+                               follow_fn=followed.append, leader_lock_path=lock_path)
+    follower = WeatherPrefetcher(STATIONS, refresh_fn=refreshed.append, interval_seconds=1,
+                                 stagger_seconds=0, follow_fn=followed.append, leader_lock_path=lock_path)
+    assert leader.elect() and leader.elect()
+    assert not follower.elect()
+
+    follower.start()
+    deadline = time.time() + 2
+    while len(followed) < len(STATIONS) and time.time() < deadline:
+        time.sleep(0.01)
+    follower.stop()
+    assert refreshed == [] and set(followed) == set(STATIONS)
+    assert follower.stats()['role'] == 'follower'
+
+    # A follower takes over once the leader goes away
+    leader.stop()
+    assert follower.elect() and follower.stats()['role'] == 'leader'
+    follower.stop()
+
+
+def test_followers_load_published_weather(tmp_path, monkeypatch):
+    store = SharedWeatherStore(str(tmp_path))
+    cache = TTLCache(ttl_seconds=600)
+    monkeypatch.setattr(app, 'shared_weather', store)
+    monkeypatch.setattr(app, 'weather_cache', cache)
+    monkeypatch.setattr(app, '_shared_weather_seen', {})
+    assert not app.load_shared_weather('Sylhet')
+
+    frame = pd.DataFrame({'date': ['2025-07-01', '2025-07-02'], 'rainfall': [3.0, 12.5]})
+    frame.attrs['fetched_at'] = time.time() - 30
+    store.write('Sylhet', 7, frame)
+
+    assert app.load_shared_weather('Sylhet')
+    assert not app.load_shared_weather('Sylhet')  # unchanged file is not re-read
+    assert cache.get(('Sylhet', 7))['rainfall'].tolist() == [3.0, 12.5]
+    assert cache.get_stale(('Sylhet', 7))[1] >= 30
+
+
+if __name__ == "__main__":
+    test_refresh_all_visits_every_station()
+    test_default_stagger_spreads_calls_over_interval()
+    test_failures_are_counted_and_do_not_stop_cycle()
+    test_background_thread_runs_and_stops()
+    print("✅ Weather prefetcher tests passed")
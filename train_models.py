@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Train flood prediction models offline and write versioned artifacts.
+
+Run this at build/deploy time, then start the web app with
+MODEL_SERVE_MODE=serve so workers only load the prebuilt files:
+
+    python train_models.py                                   # app.py model -> models/
+    python train_models.py --target ml-production            # app_ml_production.py -> models/ml_production/
+    python train_models.py --version 2025-06-monsoon --no-activate
+"""
+
+import argparse
+import logging
+import sys
+
+import sklearn
+
+from model_store import list_versions, save_artifacts
+
+DEFAULT_OUTPUT = {
+    'app': 'models',
+    'ml-production': 'models/ml_production'
+}
+
+
+def train_app_model():
+    from model_training import train_flood_model
+    rf_model, scaler, feature_cols, metadata = train_flood_model()
+    metadata['trainer'] = 'model_training.train_flood_model'
+    return rf_model, scaler, feature_cols, metadata
+
+
+def train_ml_production_model():
+    import app_ml_production
+    if not app_ml_production.train_ml_model():
+        raise RuntimeError("app_ml_production.train_ml_model() failed")
+    metadata = {
+        'trainer': 'app_ml_production.train_ml_model',
+        'samples': 2500
+    }
+    return (app_ml_production.rf_model, app_ml_production.scaler,
+            app_ml_production.feature_cols, metadata)
+
+
+TRAINERS = {
+    'app': train_app_model,
+    'ml-production': train_ml_production_model
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Train flood models and write versioned artifacts")
+    parser.add_argument('--target', choices=sorted(TRAINERS), default='app',
+                        help="which application's model to train (default: app)")
+    parser.add_argument('--output', help="model directory (default depends on --target)")
+    parser.add_argument('--version', help="version name (default: current timestamp)")
+    parser.add_argument('--no-activate', action='store_true',
+                        help="write the version without pointing CURRENT at it")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    output = args.output or DEFAULT_OUTPUT[args.target]
+
+    rf_model, scaler, feature_cols, metadata = TRAINERS[args.target]()
+    metadata['sklearn_version'] = sklearn.__version__
+    version = save_artifacts(output, rf_model, scaler, feature_cols, metadata,
+                             version=args.version, activate=not args.no_activate)
+
+    print(f"✅ Wrote model version {version} to {output}"
+          f"{'' if args.no_activate else ' (now CURRENT)'}")
+    print(f"Available versions: {', '.join(list_versions(output))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Background weather prefetcher: keeps the shared weather store warm for every
+monitored station so prediction requests never wait on the network
+
+With several worker processes only one of them calls the API: the prefetchers
+elect a leader through a non-blocking file lock, the leader refreshes stations
+on the staggered schedule and publishes each frame to a ``SharedWeatherStore``,
+and the others (followers) load those frames into their own caches. If the
+leader exits its lock is released and a follower takes over on its next pass.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no election, every process refreshes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SharedWeatherStore:
+    """Weather frames shared between processes, one pickle per (location, days)"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.root, 'prefetch.lock')
+
+    def path(self, location: str, days: int) -> str:
+        return os.path.join(self.root, f"{location}-{days}.pkl")
+
+    def write(self, location: str, days: int, weather_data: pd.DataFrame) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(location, days)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        weather_data.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def read(self, location: str, days: int) -> Optional[pd.DataFrame]:
+        try:
+            return pd.read_pickle(self.path(location, days))
+        except (OSError, EOFError):
+            return None
+
+    def mtime(self, location: str, days: int) -> Optional[float]:
+        try:
+            return os.stat(self.path(location, days)).st_mtime
+        except OSError:
+            return None
+
+
+class WeatherPrefetcher:
+    """Refresh every station on a fixed cadence, spacing calls to respect API rate limits"""
+
+    def __init__(self, locations: Iterable[str], refresh_fn: Callable[[str], object],
+                 interval_seconds: float = 300, stagger_seconds: Optional[float] = None,
+                 follow_fn: Optional[Callable[[str], object]] = None,
+                 leader_lock_path: Optional[str] = None):
+        self.locations = list(locations)
+        self.refresh_fn = refresh_fn
+        # Without a lock path every prefetcher leads (single-process deployments)
+        self.follow_fn = follow_fn
+        self.leader_lock_path = leader_lock_path
+        self.interval_seconds = max(1.0, float(interval_seconds))
+        if stagger_seconds is None:
+            # Spread one cycle's calls evenly across the interval
+            stagger_seconds = self.interval_seconds / max(1, len(self.locations))
+        self.stagger_seconds = max(0.0, float(stagger_seconds))
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.cycles = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.follows = 0
+        self.last_refresh: Dict[str, float] = {}
+        self._leader_fd = None
+        self._leader_pid = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Start the refresh thread; safe to call again (e.g. in a freshly forked worker)"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='weather-prefetcher', daemon=True)
+            self._thread.start()
+            logger.info(f"Weather prefetcher started for {len(self.locations)} stations "
+                        f"(every {self.interval_seconds:.0f}s, {self.stagger_seconds:.1f}s apart)")
+            return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._resign()
+
+    @property
+    def is_leader(self) -> bool:
+        if self.leader_lock_path is None or fcntl is None:
+            return True
+        return self._leader_fd is not None and self._leader_pid == os.getpid()
+
+    def elect(self) -> bool:
+        """Try to become (or stay) the one process that calls the API"""
+        if self.is_leader:
+            return True
+        os.makedirs(os.path.dirname(self.leader_lock_path) or '.', exist_ok=True)
+        fd = os.open(self.leader_lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # Held for the life of the process (or until stop()); the kernel drops it on exit
+        self._leader_fd, self._leader_pid = fd, os.getpid()
+        logger.info(f"Weather prefetcher elected leader in pid {os.getpid()}")
+        return True
+
+    def _resign(self) -> None:
+        if self._leader_fd is not None and self._leader_pid == os.getpid():
+            os.close(self._leader_fd)
+        self._leader_fd = self._leader_pid = None
+
+    def refresh_all(self) -> None:
+        """Run one full cycle synchronously (no staggering)"""
+        for location in list(self.locations):
+            self._refresh_one(location)
+        self.cycles += 1
+
+    def _refresh_one(self, location: str) -> None:
+        try:
+            self.refresh_fn(location)
+            self.refreshes += 1
+            self.last_refresh[location] = time.time()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Weather prefetch failed for {location}: {e}")
+
+    def follow_all(self) -> None:
+        """Follower pass: pick up what the leader published"""
+        if self.follow_fn is None:
+            return
+        for location in list(self.locations):
+            try:
+                self.follow_fn(location)
+                self.follows += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Loading shared weather failed for {location}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.leader_lock_path is not None and not self.elect():
+                self.follow_all()
+                if self._stop.wait(max(1.0, self.stagger_seconds)):
+                    return
+                continue
+
+            cycle_started = time.monotonic()
+            for location in list(self.locations):
+                if self._stop.is_set():
+                    return
+                self._refresh_one(location)
+                if self._stop.wait(self.stagger_seconds):
+                    return
+            self.cycles += 1
+
+            remaining = self.interval_seconds - (time.monotonic() - cycle_started)
+            if remaining > 0 and self._stop.wait(remaining):
+                return
+
+    def stats(self) -> Dict[str, object]:
+        now = time.time()
+        return {
+            'running': self.running,
+            'role': 'leader' if self.is_leader else 'follower',
+            'stations': len(self.locations),
+            'interval_seconds': self.interval_seconds,
+            'stagger_seconds': self.stagger_seconds,
+            'cycles': self.cycles,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'follows': self.follows,
+            'last_refresh_age_seconds': {
+                location: round(now - refreshed_at, 1)
+                for location, refreshed_at in self.last_refresh.items()
+            }
+        }